@@ -0,0 +1,67 @@
+"""
+Benchmark of the cache backends with cached calendars: the file based cache
+compared with the SQLite cache, to write all the keys, read them one by one and
+read them with get_many.
+
+Usage:
+    TELESCOOP_DEV=1 python benchmarks/cache_backends.py [n_keys ...]
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from read_events import START_DATE, FakeProjectFinder, synthetic_calendar, timed
+
+from django.core.cache.backends.filebased import FileBasedCache  # noqa: E402
+
+from white_rabbit.event_store import EventStore  # noqa: E402
+from white_rabbit.events import read_events  # noqa: E402
+from white_rabbit.models import Employee  # noqa: E402
+from white_rabbit.sqlite_cache import SQLiteCache  # noqa: E402
+
+DEFAULT_SIZES = [50, 500, 5_000]
+EVENTS_PER_CALENDAR = 500
+
+
+def cached_calendar() -> dict:
+    employee = Employee(start_time_tracking_from=START_DATE)
+    events = read_events(
+        synthetic_calendar(EVENTS_PER_CALENDAR), employee, FakeProjectFinder()
+    )
+    return {"events": EventStore.from_events(events), "fetched_at": time.time()}
+
+
+def read_one_by_one(cache, keys):
+    return [cache.get(key) for key in keys]
+
+
+def main(sizes):
+    value = cached_calendar()
+    print(
+        f"{'keys':>6} {'backend':>8} {'set_many (s)':>13} {'get (s)':>8} "
+        f"{'get_many (s)':>13}"
+    )
+    for n_keys in sizes:
+        keys = [str(key) for key in range(n_keys)]
+        data = {key: value for key in keys}
+        for name, backend in [("file", FileBasedCache), ("sqlite", SQLiteCache)]:
+            with tempfile.TemporaryDirectory() as directory:
+                cache = backend(
+                    os.path.join(directory, "cache"),
+                    {"OPTIONS": {"MAX_ENTRIES": n_keys * 2}},
+                )
+                write, _ = timed(cache.set_many, data)
+                read, values = timed(read_one_by_one, cache, keys)
+                assert values[0]["events"] == value["events"]
+                read_many, values = timed(cache.get_many, keys)
+                assert len(values) == n_keys
+                print(
+                    f"{n_keys:>6} {name:>8} {write:>13.3f} {read:>8.3f} "
+                    f"{read_many:>13.3f}"
+                )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
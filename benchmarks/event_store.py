@@ -0,0 +1,53 @@
+"""
+Benchmark of the cached events payload: a list of event dicts compared with an
+EventStore, for the pickled size, the loading time and the time to load and
+iterate over the events.
+
+Usage:
+    TELESCOOP_DEV=1 python benchmarks/event_store.py [n_events ...]
+"""
+
+import pickle
+import sys
+
+from read_events import START_DATE, FakeProjectFinder, synthetic_calendar, timed
+
+from white_rabbit.event_store import EventStore  # noqa: E402
+from white_rabbit.events import read_events  # noqa: E402
+from white_rabbit.models import Employee  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000]
+
+
+def load_and_iterate(payload: bytes) -> float:
+    return sum(event["duration"] for event in pickle.loads(payload))
+
+
+def main(sizes):
+    employee = Employee(start_time_tracking_from=START_DATE)
+    print(
+        f"{'events':>8} {'list (kB)':>10} {'store (kB)':>11} "
+        f"{'list load (s)':>14} {'store load (s)':>15} "
+        f"{'list iter (s)':>14} {'store iter (s)':>15}"
+    )
+    for n_events in sizes:
+        events = read_events(
+            synthetic_calendar(n_events), employee, FakeProjectFinder()
+        )
+        store = EventStore.from_events(events)
+        assert store == events
+        list_payload = pickle.dumps(events)
+        store_payload = pickle.dumps(store)
+        list_load, _ = timed(pickle.loads, list_payload)
+        store_load, _ = timed(pickle.loads, store_payload)
+        list_iter, _ = timed(load_and_iterate, list_payload)
+        store_iter, _ = timed(load_and_iterate, store_payload)
+        print(
+            f"{n_events:>8} {len(list_payload) / 1000:>10.0f} "
+            f"{len(store_payload) / 1000:>11.0f} {list_load:>14.3f} "
+            f"{store_load:>15.3f} {list_iter:>14.3f} {store_iter:>15.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
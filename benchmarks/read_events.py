@@ -0,0 +1,114 @@
+"""
+Benchmark of read_events on synthetic calendars.
+
+Compares the current implementation with the previous one, which re-sorted the
+whole list of events after each added day slice.
+
+Usage:
+    TELESCOOP_DEV=1 python benchmarks/read_events.py [n_events ...]
+"""
+
+import datetime
+import os
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "white_rabbit.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from white_rabbit.events import get_event_data, iter_day_slices, read_events  # noqa
+from white_rabbit.models import Employee  # noqa: E402
+
+DEFAULT_SIZES = [1_000, 10_000, 50_000]
+START_DATE = datetime.date(2020, 1, 1)
+
+
+class FakeProjectFinder:
+    """Resolves names without touching the database, to only measure parsing."""
+
+    def __init__(self):
+        self.projects = {}
+
+    def get_project(self, name, company, date):
+        if name not in self.projects:
+            self.projects[name] = SimpleNamespace(
+                pk=len(self.projects) + 1, name=name, category=None
+            )
+        return self.projects[name]
+
+
+def synthetic_calendar(n_events: int, seed: int = 0) -> str:
+    """An ical calendar with n_events events, some on whole or multiple days."""
+    rng = random.Random(seed)
+    n_days = (datetime.date.today() - START_DATE).days
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//white-rabbit//bench//FR"]
+    for index in range(n_events):
+        day = START_DATE + datetime.timedelta(days=rng.randrange(n_days))
+        lines += ["BEGIN:VEVENT", f"UID:{index}@bench"]
+        lines.append(f"SUMMARY:Project {rng.randrange(40)} [sub {rng.randrange(3)}]")
+        if rng.random() < 0.05:
+            end = day + datetime.timedelta(days=rng.randint(1, 3))
+            lines += [
+                f"DTSTART;VALUE=DATE:{day:%Y%m%d}",
+                f"DTEND;VALUE=DATE:{end:%Y%m%d}",
+            ]
+        else:
+            start = datetime.datetime.combine(day, datetime.time(rng.randint(8, 16)))
+            end = start + datetime.timedelta(minutes=30 * rng.randint(1, 6))
+            lines += [f"DTSTART:{start:%Y%m%dT%H%M%SZ}", f"DTEND:{end:%Y%m%dT%H%M%SZ}"]
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines)
+
+
+def read_events_with_resort(calendar_data, employee, project_finder):
+    """Previous implementation: the list is sorted again after each day slice."""
+    events_data = []
+    for start, end, calendar_name in iter_day_slices(
+        calendar_data, employee.start_time_tracking_from
+    ):
+        events_data.append(
+            get_event_data(start, end, calendar_name, project_finder, employee)
+        )
+        events_data = sorted(
+            events_data,
+            key=lambda ev: (
+                ev["start_datetime"].date()
+                if isinstance(ev["start_datetime"], datetime.datetime)
+                else ev["start_datetime"]
+            ),
+        )
+    return events_data
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def main(sizes):
+    employee = Employee(start_time_tracking_from=START_DATE)
+    print(f"{'events':>8} {'slices':>8} {'previous (s)':>13} {'current (s)':>12}")
+    for n_events in sizes:
+        calendar_data = synthetic_calendar(n_events)
+        previous_time, previous = timed(
+            read_events_with_resort, calendar_data, employee, FakeProjectFinder()
+        )
+        current_time, current = timed(
+            read_events, calendar_data, employee, FakeProjectFinder()
+        )
+        assert previous == current
+        print(
+            f"{n_events:>8} {len(current):>8} {previous_time:>13.2f} {current_time:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main([int(size) for size in sys.argv[1:]] or DEFAULT_SIZES)
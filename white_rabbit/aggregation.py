@@ -0,0 +1,268 @@
+import datetime
+from bisect import bisect_left
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from white_rabbit.event_store import EventStore
+from white_rabbit.typing import Event, ProjectTime
+from white_rabbit.utils import (
+    day_of,
+    filter_events_per_time_period,
+    period_day_ranges,
+)
+
+
+class EventColumns(NamedTuple):
+    """
+    Events to aggregate as numpy arrays, sorted by day. Identifiers (project ids
+    or categories) and details (subproject names or project ids) are stored as
+    indexes in identifier_table and detail_table.
+    """
+
+    days: np.ndarray
+    durations: np.ndarray
+    identifiers: np.ndarray
+    details: np.ndarray
+    identifier_table: List[Hashable]
+    detail_table: List[Hashable]
+
+
+def intern(values: Iterable[Hashable]) -> Tuple[np.ndarray, List[Hashable]]:
+    """Index of each value in a table of the distinct values."""
+    indexes: Dict[Hashable, int] = {}
+    codes = [indexes.setdefault(value, len(indexes)) for value in values]
+    return np.array(codes, dtype=np.int64), list(indexes)
+
+
+def columns_from_events(events: Iterable[Event], group_by: str) -> EventColumns:
+    events = list(events)
+    identifier_key, detail_key = (
+        ("project_id", "subproject_name")
+        if group_by == "project"
+        else ("category", "project_id")
+    )
+    identifiers, identifier_table = intern(event[identifier_key] for event in events)
+    details, detail_table = intern(event[detail_key] for event in events)
+    return EventColumns(
+        days=np.array(
+            [day_of(event["start_datetime"]).toordinal() for event in events],
+            dtype=np.int64,
+        ),
+        durations=np.array([event["duration"] for event in events], dtype=float),
+        identifiers=identifiers,
+        details=details,
+        identifier_table=identifier_table,
+        detail_table=detail_table,
+    )
+
+
+def columns_from_store(
+    store: EventStore, indexes: np.ndarray, group_by: str
+) -> EventColumns:
+    projects = np.asarray(store.projects)[indexes]
+    if group_by == "project":
+        # identifiers are project ids, several rows of the table may share one
+        row_identifiers, identifier_table = intern(
+            row[0] for row in store.project_table
+        )
+        # index 0 is for events without subproject
+        details = np.asarray(store.subprojects)[indexes].astype(np.int64) + 1
+        detail_table = [None, *store.subproject_table]
+    else:
+        row_identifiers, identifier_table = intern(
+            row[2] for row in store.project_table
+        )
+        row_details, detail_table = intern(row[0] for row in store.project_table)
+        details = row_details[projects]
+    return EventColumns(
+        days=np.asarray(store.days)[indexes].astype(np.int64),
+        durations=np.asarray(store.duration_seconds)[indexes] / 3600,
+        identifiers=row_identifiers[projects],
+        details=details,
+        identifier_table=identifier_table,
+        detail_table=detail_table,
+    )
+
+
+def period_mask(
+    days: np.ndarray,
+    timeperiod: datetime.date,
+    timeperiod_type: str,
+    period_key: str = None,
+) -> Union[np.ndarray, bool]:
+    """Same as filter_events_per_time_period, for events starting on days."""
+    day_ranges = period_day_ranges(timeperiod, timeperiod_type, period_key)
+    if day_ranges is None:
+        return True
+    mask = np.zeros(len(days), dtype=bool)
+    for start, end in day_ranges:
+        mask |= (days >= start.toordinal()) & (days <= end.toordinal())
+    return mask
+
+
+def select_events(
+    store: EventStore,
+    timeperiod: datetime.date,
+    timeperiod_type: str,
+    period_key: str = None,
+) -> np.ndarray:
+    """Indexes of the events of store kept by filter_events_per_time_period."""
+    days = np.asarray(store.days)
+    selected = np.ones(len(store), dtype=bool)
+    if period_key and period_key.endswith(("todo", "done")):
+        end_days = days + np.asarray(store.end_day_offsets)
+        done = end_days < datetime.date.today().toordinal()
+        selected &= done if period_key.endswith("done") else ~done
+    selected &= period_mask(days, timeperiod, timeperiod_type, period_key)
+    return np.flatnonzero(selected)
+
+
+def full_day_threshold(min_working_hours_for_full_day) -> float:
+    """
+    Smallest float f such that a number of hours h is a full day, ie
+    h >= min_working_hours_for_full_day, if and only if h >= f. The minimum is
+    usually a Decimal, which floats are compared to exactly.
+    """
+    threshold = float(min_working_hours_for_full_day)
+    if Decimal(threshold) < Decimal(min_working_hours_for_full_day):
+        threshold = float(np.nextafter(threshold, np.inf))
+    return threshold
+
+
+def new_project_times() -> Dict[Union[str, int], ProjectTime]:
+    return defaultdict(
+        lambda: {
+            "duration": 0.0,
+            "events": [],
+            "subprojects": defaultdict(lambda: {"duration": 0.0}),
+        }
+    )
+
+
+def add_project_times(
+    total: Dict[Union[str, int], ProjectTime],
+    project_times: Dict[Union[str, int], ProjectTime],
+):
+    """Add to total the time spent on each identifier on days after its days."""
+    for identifier, project_time in project_times.items():
+        total_time = total[identifier]
+        total_time["duration"] += project_time["duration"]
+        total_time["events"] += project_time["events"]
+        for detail, subproject in project_time["subprojects"].items():
+            total_time["subprojects"][detail]["duration"] += subproject["duration"]
+
+
+def aggregate(columns: EventColumns, employee) -> Dict[Union[str, int], ProjectTime]:
+    """
+    Number of days spent on each identifier, as computed by day_distribution for
+    each day then summed. Sums are made with bincount, which adds values in the
+    order of the events, so that the results are exactly the same.
+    """
+    total = new_project_times()
+    if not len(columns.days):
+        return total
+
+    day_values, event_days = np.unique(columns.days, return_inverse=True)
+    time_per_day = np.bincount(event_days, weights=columns.durations)
+    day_working_hours = float(employee.default_day_working_hours)
+    if employee.is_paid_hourly:
+        dividers = np.full(len(day_values), day_working_hours)
+    else:
+        is_full_day = time_per_day >= full_day_threshold(
+            employee.min_working_hours_for_full_day
+        )
+        dividers = np.where(is_full_day, time_per_day, day_working_hours)
+    shares = columns.durations / dividers[event_days]
+
+    # identifiers are added in the order in which they first appear
+    _, first_events = np.unique(columns.identifiers, return_index=True)
+    for event_index in np.sort(first_events).tolist():
+        total[columns.identifier_table[columns.identifiers[event_index]]]
+
+    n_identifiers = len(columns.identifier_table)
+    keys, key_of_event = np.unique(
+        event_days * n_identifiers + columns.identifiers, return_inverse=True
+    )
+    # sorted by day then identifier
+    durations_per_day = np.bincount(key_of_event, weights=shares).tolist()
+    dates = [datetime.date.fromordinal(day) for day in day_values.tolist()]
+    employee_name = employee.name
+    for key, duration in zip(keys.tolist(), durations_per_day):
+        day, identifier = divmod(key, n_identifiers)
+        project_time = total[columns.identifier_table[identifier]]
+        project_time["duration"] += duration
+        project_time["events"].append(
+            {"employee": employee_name, "date": dates[day], "duration": duration}
+        )
+
+    add_details(total, columns, event_days, shares)
+    return total
+
+
+def add_details(
+    total: Dict[Union[str, int], ProjectTime],
+    columns: EventColumns,
+    event_days: np.ndarray,
+    shares: np.ndarray,
+):
+    n_details = len(columns.detail_table)
+    identifier_details = columns.identifiers * n_details + columns.details
+    # details are added in the order in which they first appear
+    _, first_events = np.unique(identifier_details, return_index=True)
+    for event_index in np.sort(first_events).tolist():
+        identifier, detail = divmod(int(identifier_details[event_index]), n_details)
+        total[columns.identifier_table[identifier]]["subprojects"][
+            columns.detail_table[detail]
+        ]
+
+    n_identifier_details = len(columns.identifier_table) * n_details
+    keys, key_of_event = np.unique(
+        event_days * n_identifier_details + identifier_details, return_inverse=True
+    )
+    durations_per_day = np.bincount(key_of_event, weights=shares)
+    # sum the durations of each day, in the order of the days
+    identifier_details, key_of_day = np.unique(
+        keys % n_identifier_details, return_inverse=True
+    )
+    durations = np.bincount(key_of_day, weights=durations_per_day)
+    for identifier_detail, duration in zip(
+        identifier_details.tolist(), durations.tolist()
+    ):
+        identifier, detail = divmod(identifier_detail, n_details)
+        total[columns.identifier_table[identifier]]["subprojects"][
+            columns.detail_table[detail]
+        ]["duration"] += duration
+
+
+def projects_for_time_period(
+    events: Iterable[Event],
+    employee,
+    timeperiod: datetime.date,
+    timeperiod_type: Union[str, None],
+    period_key: str = None,
+    group_by: str = "project",
+    from_day: datetime.date = None,
+) -> Dict[Union[str, int], ProjectTime]:
+    """
+    Time spent by employee on each project or category during a period, computed
+    on arrays instead of event dicts. If from_day is given, only its events and
+    those of the following days are counted.
+    """
+    if isinstance(events, EventStore):
+        indexes = select_events(events, timeperiod, timeperiod_type, period_key)
+        if from_day is not None:
+            indexes = indexes[indexes >= bisect_left(events.days, from_day.toordinal())]
+        columns = columns_from_store(events, indexes, group_by)
+    else:
+        events = filter_events_per_time_period(
+            events, timeperiod, timeperiod_type, period_key=period_key
+        )
+        if from_day is not None:
+            events = [
+                event for event in events if day_of(event["start_datetime"]) >= from_day
+            ]
+        columns = columns_from_events(events, group_by)
+    return aggregate(columns, employee)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class WhiteRabbitConfig(AppConfig):
     name = "white_rabbit"
     verbose_name = "Lapin Blanc"
+
+    def ready(self):
+        # invalidate cached events when projects change
+        from white_rabbit import signals  # noqa: F401
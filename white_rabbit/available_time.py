@@ -1,11 +1,72 @@
 import datetime
 from typing import Iterable
 
-from jours_feries_france import JoursFeries
+import numpy as np
 
+from white_rabbit.event_store import EventStore, day_of
 from white_rabbit.models import Employee
 from white_rabbit.typing import Event
-from white_rabbit.utils import group_events_by_day
+from white_rabbit.utils import events_between
+from white_rabbit.working_days import working_days_flags
+
+
+class BusyHours:
+    """
+    Hours of the events of an employee on each day from start to end, and the
+    cumulative sums of the availability of these days, so that the availability
+    over any range of days in between is the difference of two sums.
+    """
+
+    def __init__(
+        self,
+        employee: Employee,
+        events: Iterable[Event],
+        start: datetime.date,
+        end: datetime.date,
+    ):
+        start, end = day_of(start), day_of(end)
+        self.start = start.toordinal()
+        n_days = max(end.toordinal() - self.start + 1, 0)
+        busy_hours = np.zeros(n_days)
+        if isinstance(events, EventStore):
+            index_range = events.index_range(start, end)
+            np.add.at(
+                busy_hours,
+                np.asarray(events.days[index_range.start : index_range.stop])
+                - self.start,
+                np.asarray(
+                    events.duration_seconds[index_range.start : index_range.stop]
+                )
+                / 3600,
+            )
+        else:
+            for event in events_between(events, start, end):
+                busy_hours[
+                    day_of(event["start_datetime"]).toordinal() - self.start
+                ] += event["duration"]
+        self.busy_hours = busy_hours
+
+        # working days are available for the hours they are not busy
+        day_hours = employee.default_day_working_hours
+        is_working_day = np.frombuffer(
+            working_days_flags(start, end, employee), dtype=np.uint8
+        )[:n_days].astype(bool)
+        availability = np.where(
+            is_working_day, np.maximum(day_hours - busy_hours, 0) / day_hours, 0
+        )
+        self.cumulative_availability = np.concatenate(([0.0], np.cumsum(availability)))
+
+    def offset(self, day: datetime.date, days: int = 0) -> int:
+        offset = day_of(day).toordinal() + days - self.start
+        return min(max(offset, 0), len(self.busy_hours))
+
+    def availability(self, start: datetime.date, end: datetime.date) -> float:
+        """Number of available working days from start to end (included)."""
+        first = self.offset(start)
+        stop = max(self.offset(end, days=1), first)
+        return float(
+            self.cumulative_availability[stop] - self.cumulative_availability[first]
+        )
 
 
 def available_time_of_employee(
@@ -19,26 +80,6 @@ def available_time_of_employee(
 
     Note: days in the past cannot be available.
     """
-    events_per_day = group_events_by_day(events)
-    availability_duration = 0
-
-    day = start_datetime - datetime.timedelta(days=1)
-
-    while day < end_datetime:
-        day += datetime.timedelta(days=1)
-
-        if isinstance(day, datetime.datetime):
-            day = day.date()
-
-        # for weekend and blank holiday
-        if day.weekday() >= 5 or JoursFeries.is_bank_holiday(day, zone="Métropole"):
-            continue
-
-        busy_duration = sum(event["duration"] for event in events_per_day.get(day, []))
-
-        availability_duration += (
-            max(employee.default_day_working_hours - busy_duration, 0)
-            / employee.default_day_working_hours
-        )
-
-    return availability_duration
+    return BusyHours(employee, events, start_datetime, end_datetime).availability(
+        start_datetime, end_datetime
+    )
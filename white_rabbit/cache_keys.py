@@ -0,0 +1,72 @@
+"""
+Keys of the values cached by white rabbit.
+
+Keys are namespaced and start with CACHE_SCHEMA_VERSION, to change when the
+format of cached values changes. Values that depend on the projects of a company
+are cached under its data version, a counter increased when its projects,
+aliases or categories change (see signals.py): values computed with outdated
+projects are no longer found, while other companies keep their cached values.
+"""
+
+import time
+from typing import Dict, Iterable, Optional
+
+from django.core.cache import cache
+
+CACHE_KEY_PREFIX = "white_rabbit"
+CACHE_SCHEMA_VERSION = 3
+
+
+def make_key(*parts) -> str:
+    return ":".join(
+        str(part) for part in [CACHE_KEY_PREFIX, f"v{CACHE_SCHEMA_VERSION}", *parts]
+    )
+
+
+def data_version_key(company_id: Optional[int]) -> str:
+    return make_key("company", company_id, "data_version")
+
+
+def calendar_key(employee) -> str:
+    # calendar entries do not depend on projects, which are resolved when read
+    return make_key("calendar", employee.pk)
+
+
+def occurrences_key(employee, data_version: int) -> str:
+    return make_key(
+        "company", employee.company_id, data_version, "occurrences", employee.pk
+    )
+
+
+def daily_project_times_key(company_id: Optional[int]) -> str:
+    return make_key("company", company_id, "daily_project_times_saved_at")
+
+
+def get_data_versions(
+    company_ids: Iterable[Optional[int]],
+) -> Dict[Optional[int], int]:
+    """Current data version of each company, read with a single get_many."""
+    company_id_per_key = {
+        data_version_key(company_id): company_id for company_id in set(company_ids)
+    }
+    versions = cache.get_many(company_id_per_key.keys())
+    for key in company_id_per_key.keys() - versions.keys():
+        # versions start from a timestamp, so that they are not reused when the
+        # counter is removed from the cache
+        version = time.time_ns()
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+        versions[key] = version
+    return {company_id: versions[key] for key, company_id in company_id_per_key.items()}
+
+
+def get_data_version(company_id: Optional[int]) -> int:
+    return get_data_versions([company_id])[company_id]
+
+
+def bump_data_version(company_id: Optional[int]):
+    """Invalidate the events cached for a company."""
+    key = data_version_key(company_id)
+    # added and increased atomically, so that concurrent bumps are not lost
+    cache.add(key, time.time_ns(), None)
+    cache.incr(key)
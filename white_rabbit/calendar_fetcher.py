@@ -0,0 +1,94 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from white_rabbit.settings import (
+    CALENDAR_FETCH_BACKOFF,
+    CALENDAR_FETCH_CONCURRENCY_PER_HOST,
+    CALENDAR_FETCH_RETRIES,
+    CALENDAR_FETCH_TIMEOUT,
+)
+
+# statuses for which the request is tried again
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CalendarRequest = Tuple[str, Dict[str, str]]
+
+
+async def fetch_with_retries(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    url: str,
+    headers: Dict[str, str],
+    retries: int,
+) -> Optional[httpx.Response]:
+    """
+    Fetch url, trying again with an exponential backoff if it fails.
+    Returns None if the calendar could not be downloaded.
+    """
+    response = None
+    for attempt in range(retries + 1):
+        if attempt:
+            await asyncio.sleep(CALENDAR_FETCH_BACKOFF * 2 ** (attempt - 1))
+        try:
+            async with semaphore:
+                # the timeout is for the whole request, so that a server sending
+                # data very slowly cannot hold it indefinitely
+                response = await asyncio.wait_for(
+                    client.get(url, headers=headers), CALENDAR_FETCH_TIMEOUT
+                )
+        except (httpx.HTTPError, asyncio.TimeoutError) as e:
+            print(f"Error fetching calendar {urlsplit(url).netloc} ({attempt=}): {e!r}")
+            response = None
+            continue
+        if response.status_code not in RETRY_STATUSES:
+            return response
+    return response
+
+
+async def fetch_all(
+    calendar_requests: List[CalendarRequest], retries: int
+) -> List[Optional[httpx.Response]]:
+    # one client, hence one connection pool, for all requests
+    async with httpx.AsyncClient(
+        follow_redirects=True, timeout=CALENDAR_FETCH_TIMEOUT
+    ) as client:
+        semaphore_per_host: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(CALENDAR_FETCH_CONCURRENCY_PER_HOST)
+        )
+        return await asyncio.gather(
+            *(
+                fetch_with_retries(
+                    client,
+                    semaphore_per_host[urlsplit(url).netloc],
+                    url,
+                    headers,
+                    retries,
+                )
+                for url, headers in calendar_requests
+            )
+        )
+
+
+def fetch_calendars(
+    calendar_requests: List[CalendarRequest], retries: int = CALENDAR_FETCH_RETRIES
+) -> List[Optional[httpx.Response]]:
+    """
+    Download calendars concurrently, given (url, headers) for each of them.
+
+    Responses are returned in the same order as the requests, with None for
+    calendars that could not be downloaded. Responses are gzip-compressed in
+    transit when the server supports it.
+    """
+    if not calendar_requests:
+        return []
+    return asyncio.run(fetch_all(calendar_requests, retries))
+
+
+def fetch_calendar(
+    url: str, headers: Dict[str, str] = None, retries: int = CALENDAR_FETCH_RETRIES
+) -> Optional[httpx.Response]:
+    return fetch_calendars([(url, headers or {})], retries)[0]
@@ -6,3 +6,8 @@ def user_is_staff(request):
         "user_is_staff": request.user.is_staff,
         "current_month": datetime.date.today().strftime("%m-%Y"),
     }
+
+
+def events_fetched_at(request):
+    """When the calendars used to render the page were fetched, if any."""
+    return {"events_fetched_at": getattr(request, "events_fetched_at", None)}
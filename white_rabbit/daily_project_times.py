@@ -0,0 +1,146 @@
+"""
+Time spent by employees on each project on each day, saved by hydrate_cache, so
+that the time spent during a period is summed from them instead of being
+computed from all the events of the period (see project_time_cube.py).
+"""
+
+import datetime
+import time
+from collections import defaultdict
+from itertools import groupby
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from white_rabbit.cache_keys import daily_project_times_key
+from white_rabbit.event_occurrences import BATCH_SIZE, saved_day_settings
+from white_rabbit.event_store import EventStore
+from white_rabbit.models import DailyProjectTime, Employee
+
+# fields compared to find the days that changed
+DAILY_PROJECT_TIME_FIELDS = [
+    "position",
+    "project_id",
+    "subproject_name",
+    "category",
+    "end_day",
+    "hours",
+    "fraction",
+]
+
+
+def day_divider(hours: float, employee: Employee) -> float:
+    """Hours of a day that count as a full day, as in day_distribution."""
+    if hours >= employee.min_working_hours_for_full_day and not employee.is_paid_hourly:
+        return hours
+    return float(employee.default_day_working_hours)
+
+
+def daily_project_times_from_store(
+    employee: Employee, store: EventStore
+) -> Dict[datetime.date, List[DailyProjectTime]]:
+    """
+    Times spent on each project on each day of the events of store. Fractions of
+    days are summed event by event, in the order of the events, as in aggregate.
+    """
+    durations = [seconds / 3600 for seconds in store.duration_seconds]
+    times_per_day = {}
+    for day, indexes in groupby(range(len(store)), key=store.days.__getitem__):
+        indexes = list(indexes)
+        date = datetime.date.fromordinal(day)
+        divider = day_divider(sum(durations[index] for index in indexes), employee)
+        times: Dict[tuple, DailyProjectTime] = {}
+        for position, index in enumerate(indexes):
+            project_id, _, category, _ = store.project_table[store.projects[index]]
+            subproject = store.subprojects[index]
+            subproject_name = (
+                None if subproject < 0 else store.subproject_table[subproject]
+            )
+            end_day = datetime.date.fromordinal(day + store.end_day_offsets[index])
+            key = (project_id, subproject_name, category, end_day)
+            if key not in times:
+                times[key] = DailyProjectTime(
+                    employee=employee,
+                    day=date,
+                    position=position,
+                    project_id=project_id,
+                    subproject_name=subproject_name,
+                    category=category,
+                    end_day=end_day,
+                    hours=0.0,
+                    fraction=0.0,
+                )
+            times[key].hours += durations[index]
+            times[key].fraction += durations[index] / divider
+        times_per_day[date] = list(times.values())
+    return times_per_day
+
+
+def save_daily_project_times(employee: Employee, store: EventStore) -> int:
+    """
+    Rewrite the daily project times of the days whose events changed, so that
+    they match the store. Returns the number of days rewritten.
+    """
+    existing = defaultdict(list)
+    for day, *values in (
+        DailyProjectTime.objects.filter(employee=employee)
+        .order_by("day", "position")
+        .values_list("day", *DAILY_PROJECT_TIME_FIELDS)
+    ):
+        existing[day].append(tuple(values))
+    changed_days = []
+    changed_times = []
+    for day, times in daily_project_times_from_store(employee, store).items():
+        values = [
+            tuple(getattr(time, field) for field in DAILY_PROJECT_TIME_FIELDS)
+            for time in times
+        ]
+        if existing.pop(day, None) != values:
+            changed_days.append(day)
+            changed_times += times
+    # days which no longer have events
+    changed_days += existing.keys()
+
+    with transaction.atomic():
+        for batch_start in range(0, len(changed_days), BATCH_SIZE):
+            DailyProjectTime.objects.filter(
+                employee=employee,
+                day__in=changed_days[batch_start : batch_start + BATCH_SIZE],
+            ).delete()
+        DailyProjectTime.objects.bulk_create(changed_times, batch_size=BATCH_SIZE)
+    return len(changed_days)
+
+
+def mark_daily_project_times_saved(company_ids: Iterable[Optional[int]]):
+    """
+    Remember when daily project times of employees of the companies were saved,
+    so that the sums of their times held by workers are computed again.
+    """
+    cache.set_many(
+        {
+            daily_project_times_key(company_id): time.time_ns()
+            for company_id in set(company_ids)
+        },
+        None,
+    )
+
+
+def daily_project_times_saved_at(company_id: Optional[int]) -> Optional[int]:
+    return cache.get(daily_project_times_key(company_id))
+
+
+def employees_with_current_daily_project_times(
+    employees: List[Employee], data_versions: Optional[Dict[int, int]] = None
+) -> List[Employee]:
+    """
+    Employees whose daily project times were saved with the current projects of
+    their company and their current day settings.
+    """
+    return [
+        employee
+        for employee, day_settings in saved_day_settings(
+            employees, data_versions
+        ).items()
+        if day_settings == employee.day_settings
+    ]
@@ -0,0 +1,106 @@
+"""
+State of each working day of employees, saved by hydrate_cache, so that their
+missing days over any range are read in one query instead of being computed
+from all the events of the range (see DayCompleteness).
+"""
+
+import datetime
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+
+from white_rabbit.constants import DayState
+from white_rabbit.event_occurrences import BATCH_SIZE
+from white_rabbit.event_store import EventStore
+from white_rabbit.models import DayCompleteness, Employee
+from white_rabbit.state_of_day import display_state_of_hours, state_of_hours
+from white_rabbit.working_days import working_days
+
+MISSING_DAY_STATES = [DayState.empty, DayState.incomplete]
+
+
+def day_completeness_from_store(
+    employee: Employee, store: EventStore, end: datetime.date
+) -> Dict[datetime.date, Tuple[str, float]]:
+    """
+    (state, hours) of each working day of employee from the start of time
+    tracking to end (included), with the events of store.
+    """
+    hours_per_day: Dict[int, float] = defaultdict(float)
+    for day, seconds in zip(store.days, store.duration_seconds):
+        # summed event by event, as in state_of_day
+        hours_per_day[day] += seconds / 3600
+    completeness = {}
+    for day in working_days(employee.start_time_tracking_from, end, employee):
+        hours = hours_per_day.get(day.toordinal(), 0.0)
+        completeness[day] = (state_of_hours(hours, employee), hours)
+    return completeness
+
+
+def save_day_completeness(
+    employee: Employee, store: EventStore, end: Optional[datetime.date] = None
+) -> int:
+    """
+    Rewrite the completeness of the days whose state or hours changed, so that
+    it matches the store until end (today by default). Returns the number of
+    days rewritten.
+    """
+    if end is None:
+        end = datetime.date.today()
+    existing = {
+        day: (state, hours)
+        for day, state, hours in DayCompleteness.objects.filter(
+            employee=employee
+        ).values_list("day", "state", "hours")
+    }
+    changed = []
+    for day, values in day_completeness_from_store(employee, store, end).items():
+        if existing.pop(day, None) != values:
+            state, hours = values
+            changed.append(
+                DayCompleteness(employee=employee, day=day, state=state, hours=hours)
+            )
+    # days which are no longer working days
+    changed_days = [completeness.day for completeness in changed] + list(existing)
+
+    with transaction.atomic():
+        for batch_start in range(0, len(changed_days), BATCH_SIZE):
+            DayCompleteness.objects.filter(
+                employee=employee,
+                day__in=changed_days[batch_start : batch_start + BATCH_SIZE],
+            ).delete()
+        DayCompleteness.objects.bulk_create(changed, batch_size=BATCH_SIZE)
+    return len(changed_days)
+
+
+def missing_days_of_employees(
+    employees: List[Employee], start: datetime.date, end: datetime.date
+) -> Dict[Employee, List[Tuple[datetime.date, Dict[str, str]]]]:
+    """
+    Days from start to end (included) which are not complete, with their state,
+    for the employees with such days, as in incomplete_working_days.
+    """
+    employees_by_id = {employee.pk: employee for employee in employees}
+    missing_days = defaultdict(list)
+    for employee_id, day, state, hours in (
+        DayCompleteness.objects.filter(
+            employee__in=employees_by_id.keys(),
+            state__in=MISSING_DAY_STATES,
+            day__gte=start,
+            day__lte=end,
+        )
+        .order_by("employee_id", "day")
+        .values_list("employee_id", "day", "state", "hours")
+    ):
+        employee = employees_by_id[employee_id]
+        missing_days[employee].append(
+            (
+                day,
+                {
+                    "state": state,
+                    "display_state": display_state_of_hours(hours, employee),
+                },
+            )
+        )
+    return dict(missing_days)
@@ -0,0 +1,241 @@
+import datetime
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Union
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.db import transaction
+
+from white_rabbit.cache_keys import get_data_versions, occurrences_key
+from white_rabbit.event_store import WHOLE_DAY, EventStore, to_date_or_datetime
+from white_rabbit.models import Employee, EventOccurrence
+from white_rabbit.typing import Event
+
+# fields updated when an occurrence changed
+OCCURRENCE_FIELDS = [
+    "project",
+    "name",
+    "subproject_name",
+    "start_time",
+    "end_day",
+    "end_time",
+    "time_zone",
+    "duration",
+]
+BATCH_SIZE = 500
+# markers of saved occurrences are written again by each hydrate_cache run, so
+# that those of previous data versions expire instead of piling up
+OCCURRENCES_MARKER_TIMEOUT = 60 * 60 * 24
+
+
+def time_zone_name(
+    timezone: Optional[datetime.tzinfo], start: Union[datetime.date, datetime.datetime]
+) -> str:
+    """
+    Name of a time zone, or its UTC offset at start ("UTC+01:00") if it has no
+    name in the tz database, such as time zones defined in a calendar.
+    """
+    if timezone is None:
+        return ""
+    if isinstance(timezone, ZoneInfo):
+        return timezone.key
+    return datetime.timezone(timezone.utcoffset(start)).tzname(None)
+
+
+def time_zone_from_name(name: str) -> Optional[datetime.tzinfo]:
+    if not name:
+        return None
+    if name == "UTC":
+        return datetime.timezone.utc
+    if name.startswith(("UTC+", "UTC-")):
+        sign = -1 if name[3] == "-" else 1
+        hours, minutes = name[4:].split(":")
+        return datetime.timezone(
+            sign * datetime.timedelta(hours=int(hours), minutes=int(minutes))
+        )
+    return ZoneInfo(name)
+
+
+def to_time(minute: int) -> Optional[datetime.time]:
+    if minute == WHOLE_DAY:
+        return None
+    return datetime.time(minute // 60, minute % 60)
+
+
+def occurrences_from_store(
+    employee: Employee, store: EventStore
+) -> List[EventOccurrence]:
+    occurrences = []
+    position = 0
+    for index in range(len(store)):
+        day = store.days[index]
+        position = position + 1 if index and store.days[index - 1] == day else 0
+        start_minute = store.start_minutes[index]
+        subproject = store.subprojects[index]
+        occurrences.append(
+            EventOccurrence(
+                employee=employee,
+                day=datetime.date.fromordinal(day),
+                position=position,
+                project_id=store.project_table[store.projects[index]][0],
+                name=store.project_table[store.projects[index]][3],
+                subproject_name=(
+                    None if subproject < 0 else store.subproject_table[subproject]
+                ),
+                start_time=to_time(start_minute),
+                end_day=datetime.date.fromordinal(day + store.end_day_offsets[index]),
+                end_time=to_time(store.end_minutes[index]),
+                time_zone=time_zone_name(
+                    store.timezone_table[store.timezones[index]],
+                    to_date_or_datetime(day, start_minute, None),
+                ),
+                duration=store.duration_seconds[index] / 3600,
+            )
+        )
+    return occurrences
+
+
+def occurrence_values(occurrence: EventOccurrence) -> tuple:
+    return (
+        occurrence.project_id,
+        *(getattr(occurrence, field) for field in OCCURRENCE_FIELDS[1:]),
+    )
+
+
+def save_occurrences(employee: Employee, store: EventStore) -> int:
+    """
+    Upsert the occurrences of the events of an employee, so that they match the
+    store. Only occurrences that changed are written. Returns their number.
+    """
+    existing = {
+        (day, position): (pk, tuple(values))
+        for pk, day, position, *values in EventOccurrence.objects.filter(
+            employee=employee
+        ).values_list("pk", "day", "position", "project_id", *OCCURRENCE_FIELDS[1:])
+    }
+    changed = []
+    for occurrence in occurrences_from_store(employee, store):
+        _, values = existing.pop((occurrence.day, occurrence.position), (None, None))
+        if values != occurrence_values(occurrence):
+            changed.append(occurrence)
+    # occurrences of events which are no longer in the calendar
+    removed = [pk for pk, _ in existing.values()]
+
+    with transaction.atomic():
+        EventOccurrence.objects.bulk_create(
+            changed,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["employee", "day", "position"],
+            update_fields=OCCURRENCE_FIELDS,
+        )
+        for batch_start in range(0, len(removed), BATCH_SIZE):
+            EventOccurrence.objects.filter(
+                pk__in=removed[batch_start : batch_start + BATCH_SIZE]
+            ).delete()
+    return len(changed) + len(removed)
+
+
+def mark_occurrences_saved(data_versions: Dict[Employee, int]):
+    """
+    Remember that the events of the employees were saved with the projects of
+    the given data versions of their company, and their daily project times with
+    their current day settings.
+    """
+    cache.set_many(
+        {
+            occurrences_key(employee, data_version): employee.day_settings
+            for employee, data_version in data_versions.items()
+        },
+        OCCURRENCES_MARKER_TIMEOUT,
+    )
+
+
+def saved_day_settings(
+    employees: List[Employee], data_versions: Optional[Dict[int, int]] = None
+) -> Dict[Employee, Any]:
+    """
+    Day settings that the events of employees were saved with, for the employees
+    whose events were saved with the current projects of their company.
+    """
+    if data_versions is None:
+        data_versions = get_data_versions(employee.company_id for employee in employees)
+    keys = {
+        employee: occurrences_key(employee, data_versions[employee.company_id])
+        for employee in employees
+    }
+    saved = cache.get_many(keys.values())
+    return {employee: saved[key] for employee, key in keys.items() if key in saved}
+
+
+def employees_with_current_occurrences(
+    employees: List[Employee], data_versions: Optional[Dict[int, int]] = None
+) -> List[Employee]:
+    """
+    Employees whose events were saved with the current projects of their
+    company, so that they can be used instead of their calendar.
+    """
+    return list(saved_day_settings(employees, data_versions))
+
+
+def stored_events(employees: List[Employee]) -> Dict[Employee, EventStore]:
+    """Events saved by hydrate_cache, for the employees who have some."""
+    employees_by_id = {employee.pk: employee for employee in employees}
+    events: Dict[int, List[Event]] = defaultdict(list)
+    for (
+        employee_id,
+        day,
+        start_time,
+        end_day,
+        end_time,
+        time_zone,
+        duration,
+        project_id,
+        project_name,
+        category,
+        name,
+        subproject_name,
+    ) in (
+        EventOccurrence.objects.filter(employee__in=employees)
+        .order_by("employee_id", "day", "position")
+        .values_list(
+            "employee_id",
+            "day",
+            "start_time",
+            "end_day",
+            "end_time",
+            "time_zone",
+            "duration",
+            "project_id",
+            "project__name",
+            "project__category__name",
+            "name",
+            "subproject_name",
+        )
+        .iterator()
+    ):
+        timezone = time_zone_from_name(time_zone)
+        events[employee_id].append(
+            {
+                "project_id": project_id,
+                "project_name": project_name,
+                "category": category,
+                "name": name,
+                "subproject_name": subproject_name,
+                "start_datetime": (
+                    datetime.datetime.combine(day, start_time, timezone)
+                    if start_time is not None
+                    else day
+                ),
+                "end_datetime": (
+                    datetime.datetime.combine(end_day, end_time, timezone)
+                    if end_time is not None
+                    else end_day
+                ),
+                "duration": duration,
+            }
+        )
+    return {
+        employees_by_id[employee_id]: EventStore.from_events(employee_events)
+        for employee_id, employee_events in events.items()
+    }
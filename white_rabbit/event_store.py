@@ -0,0 +1,349 @@
+import datetime
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from white_rabbit.typing import Event
+
+# minute of day of whole day events, whose start or end is a date
+WHOLE_DAY = -1
+# subproject index of events without subproject
+NO_SUBPROJECT = -1
+
+# (project_id, project_name, category, name), project fields are None for the
+# entries of a calendar whose projects are not resolved yet
+ProjectRow = Tuple[Optional[int], Optional[str], Optional[str], str]
+
+# integer type codes in which arrays are pickled, from the narrowest
+PICKLED_TYPECODES = ["b", "B", "h", "H", "i"]
+# arrays pickled in the narrowest type which holds their values, days and
+# timezones are pickled apart
+NARROWED_ARRAYS = [
+    "start_minutes",
+    "end_day_offsets",
+    "end_minutes",
+    "duration_seconds",
+    "projects",
+    "subprojects",
+]
+
+
+class EventStore:
+    """
+    Events of an employee, sorted by day, stored as parallel arrays with one
+    item per event. Projects and subprojects are stored once in tables, and
+    referenced by their index in these tables. Start and end times are stored
+    to the minute, and durations to the second.
+
+    Iterating over the store yields events as dicts, so that it can be used
+    wherever a list of events is expected. between() only builds the events
+    of a range of days.
+
+    Pickled stores keep their arrays in the narrowest integer types which hold
+    their values, their days as the differences between consecutive days, and
+    no timezone per event when all events have the same timezone.
+    """
+
+    __slots__ = (
+        "days",
+        "start_minutes",
+        "end_day_offsets",
+        "end_minutes",
+        "duration_seconds",
+        "projects",
+        "subprojects",
+        "timezones",
+        "project_table",
+        "subproject_table",
+        "timezone_table",
+    )
+
+    def __init__(self):
+        # day ordinal and minute of day of the start of each event
+        self.days = array("i")
+        self.start_minutes = array("h")
+        # number of days between the start and the end, and minute of day of the end
+        self.end_day_offsets = array("h")
+        self.end_minutes = array("h")
+        self.duration_seconds = array("i")
+        # index in project_table
+        self.projects = array("H")
+        # index in subproject_table, -1 for events without subproject
+        self.subprojects = array("h")
+        # index in timezone_table
+        self.timezones = array("B")
+        self.project_table: List[ProjectRow] = []
+        self.subproject_table: List[str] = []
+        self.timezone_table: List[Optional[datetime.tzinfo]] = []
+
+    @classmethod
+    def from_events(cls, events: Iterable[Event]) -> "EventStore":
+        store = cls()
+        project_indexes: Dict[ProjectRow, int] = {}
+        subproject_indexes: Dict[str, int] = {}
+        timezone_indexes: Dict[Optional[datetime.tzinfo], int] = {}
+
+        def intern(value, indexes, table) -> int:
+            if value not in indexes:
+                indexes[value] = len(table)
+                table.append(value)
+            return indexes[value]
+
+        for event in sorted(events, key=lambda event: day_of(event["start_datetime"])):
+            start = event["start_datetime"]
+            end = event["end_datetime"]
+            timezone = getattr(start, "tzinfo", None)
+            if timezone is not None and isinstance(end, datetime.datetime):
+                # the end is stored in the timezone of the start
+                end = end.astimezone(timezone)
+            day = day_of(start).toordinal()
+            store.days.append(day)
+            store.start_minutes.append(minute_of_day(start))
+            store.end_day_offsets.append(day_of(end).toordinal() - day)
+            store.end_minutes.append(minute_of_day(end))
+            store.duration_seconds.append(round(event["duration"] * 3600))
+            store.projects.append(
+                intern(
+                    (
+                        event["project_id"],
+                        event["project_name"],
+                        event["category"],
+                        event["name"],
+                    ),
+                    project_indexes,
+                    store.project_table,
+                )
+            )
+            store.subprojects.append(
+                NO_SUBPROJECT
+                if event["subproject_name"] is None
+                else intern(
+                    event["subproject_name"],
+                    subproject_indexes,
+                    store.subproject_table,
+                )
+            )
+            store.timezones.append(
+                intern(timezone, timezone_indexes, store.timezone_table)
+            )
+        return store
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __iter__(self) -> Iterator[Event]:
+        return self.events(0, len(self))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (EventStore, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"<EventStore: {len(self)} events>"
+
+    def __getstate__(self) -> dict:
+        state = {attribute: getattr(self, attribute) for attribute in self.__slots__}
+        days = np.frombuffer(self.days, dtype=self.days.typecode)
+        state["first_day"] = int(days[0]) if len(days) else 0
+        state["days"] = narrowed(np.diff(days, prepend=days[:1]))
+        for attribute in NARROWED_ARRAYS:
+            values = getattr(self, attribute)
+            state[attribute] = narrowed(np.frombuffer(values, dtype=values.typecode))
+        if len(self.timezone_table) <= 1:
+            state["timezones"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__init__()
+        self.days = widened(
+            np.cumsum(np.frombuffer(state["days"], dtype=state["days"].typecode))
+            + state["first_day"],
+            self.days.typecode,
+        )
+        for attribute in NARROWED_ARRAYS:
+            values = state[attribute]
+            setattr(
+                self,
+                attribute,
+                widened(
+                    np.frombuffer(values, dtype=values.typecode),
+                    getattr(self, attribute).typecode,
+                ),
+            )
+        if state["timezones"] is None:
+            self.timezones = array(self.timezones.typecode, bytes(len(self.days)))
+        else:
+            self.timezones = state["timezones"]
+        self.project_table = state["project_table"]
+        self.subproject_table = state["subproject_table"]
+        self.timezone_table = state["timezone_table"]
+
+    def event(self, index: int) -> Event:
+        return next(self.events(index, index + 1))
+
+    def events(self, start: int, stop: int) -> Iterator[Event]:
+        """Events from index start to index stop (excluded)."""
+        project_table = self.project_table
+        subproject_table = self.subproject_table
+        timezone_table = self.timezone_table
+        for (
+            day,
+            start_minute,
+            end_day_offset,
+            end_minute,
+            seconds,
+            project,
+            subproject,
+            timezone,
+        ) in zip(
+            self.days[start:stop],
+            self.start_minutes[start:stop],
+            self.end_day_offsets[start:stop],
+            self.end_minutes[start:stop],
+            self.duration_seconds[start:stop],
+            self.projects[start:stop],
+            self.subprojects[start:stop],
+            self.timezones[start:stop],
+        ):
+            project_id, project_name, category, name = project_table[project]
+            timezone = timezone_table[timezone]
+            yield {
+                "project_id": project_id,
+                "project_name": project_name,
+                "category": category,
+                "name": name,
+                "subproject_name": (
+                    None
+                    if subproject == NO_SUBPROJECT
+                    else subproject_table[subproject]
+                ),
+                "start_datetime": to_date_or_datetime(day, start_minute, timezone),
+                "end_datetime": to_date_or_datetime(
+                    day + end_day_offset, end_minute, timezone
+                ),
+                "duration": seconds / 3600,
+            }
+
+    def with_projects(
+        self, project_row: Callable[[str, int], ProjectRow]
+    ) -> "EventStore":
+        """
+        Copy of the store, with the project of each event given by project_row
+        for its name and its day ordinal. Arrays other than projects are shared.
+        """
+        store = EventStore()
+        for attribute in self.__slots__:
+            setattr(store, attribute, getattr(self, attribute))
+        row_indexes: Dict[ProjectRow, int] = {}
+        index_per_project_and_day: Dict[Tuple[int, int], int] = {}
+        projects = array("H")
+        for project, day in zip(self.projects, self.days):
+            index = index_per_project_and_day.get((project, day))
+            if index is None:
+                row = project_row(self.project_table[project][3], day)
+                index = row_indexes.setdefault(row, len(row_indexes))
+                index_per_project_and_day[(project, day)] = index
+            projects.append(index)
+        store.projects = projects
+        store.project_table = list(row_indexes)
+        return store
+
+    def with_saved_projects(self) -> "EventStore":
+        """
+        The store without the events whose project is not saved, because it
+        could not be created. Tables are shared with the copy.
+        """
+        unsaved = {
+            index for index, row in enumerate(self.project_table) if row[0] is None
+        }
+        if not unsaved:
+            return self
+        kept = [
+            index
+            for index, project in enumerate(self.projects)
+            if project not in unsaved
+        ]
+        store = EventStore()
+        for attribute in self.__slots__:
+            values = getattr(self, attribute)
+            if isinstance(values, array):
+                values = array(values.typecode, (values[index] for index in kept))
+            setattr(store, attribute, values)
+        return store
+
+    def index_range(self, start: datetime.date, end: datetime.date) -> range:
+        """Indexes of the events starting from start day to end day (included)."""
+        return range(
+            bisect_left(self.days, day_of(start).toordinal()),
+            bisect_right(self.days, day_of(end).toordinal()),
+        )
+
+    def between(self, start: datetime.date, end: datetime.date) -> List[Event]:
+        """Events starting from start day to end day (included)."""
+        indexes = self.index_range(start, end)
+        return list(self.events(indexes.start, indexes.stop))
+
+    def subprojects_per_project(self) -> Dict[int, Set[str]]:
+        """Subproject names used by the events of each project."""
+        to_return: Dict[int, Set[str]] = {}
+        for project, subproject in set(zip(self.projects, self.subprojects)):
+            project_id = self.project_table[project][0]
+            if subproject != NO_SUBPROJECT and project_id:
+                to_return.setdefault(project_id, set()).add(
+                    self.subproject_table[subproject]
+                )
+        return to_return
+
+
+def narrowed(values: np.ndarray) -> array:
+    """Array of the narrowest integer type which holds the values."""
+    for typecode in PICKLED_TYPECODES:
+        limits = np.iinfo(typecode)
+        if not len(values) or limits.min <= values.min() <= values.max() <= limits.max:
+            return array(typecode, values.astype(typecode).tobytes())
+    raise OverflowError("values do not fit in a 32 bits integer array")
+
+
+def widened(values: np.ndarray, typecode: str) -> array:
+    return array(typecode, values.astype(typecode).tobytes())
+
+
+def day_of(d: Union[datetime.date, datetime.datetime]) -> datetime.date:
+    """Returns the day of a date or datetime."""
+    if isinstance(d, datetime.datetime):
+        return d.date()
+    return d
+
+
+def minute_of_day(d: Union[datetime.date, datetime.datetime]) -> int:
+    if isinstance(d, datetime.datetime):
+        return d.hour * 60 + d.minute
+    return WHOLE_DAY
+
+
+# dates are built once per day and times once per minute of day
+date_of_ordinal = lru_cache(maxsize=None)(datetime.date.fromordinal)
+TIMES_OF_DAY = [datetime.time(minute // 60, minute % 60) for minute in range(24 * 60)]
+
+
+def to_date_or_datetime(
+    day: int, minute: int, timezone: Optional[datetime.tzinfo]
+) -> Union[datetime.date, datetime.datetime]:
+    date = date_of_ordinal(day)
+    if minute == WHOLE_DAY:
+        return date
+    return datetime.datetime.combine(date, TIMES_OF_DAY[minute], timezone)
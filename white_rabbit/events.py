@@ -1,58 +1,74 @@
 import datetime
+import hashlib
+import threading
+import time
 from collections import defaultdict
-from datetime import date, timedelta
-from typing import List, Dict, Iterable, Any, Union
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import List, Dict, Iterable, Iterator, Any, Optional, Set, Tuple, Union
 
+import httpx
 import recurring_ical_events
-import requests
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.core.cache import cache
+from django.db import connections
 from icalendar import Calendar
 
-from white_rabbit.available_time import available_time_of_employee
+from white_rabbit import aggregation
+from white_rabbit.available_time import BusyHours
+from white_rabbit.cache_keys import calendar_key
+from white_rabbit.calendar_fetcher import fetch_calendar, fetch_calendars
 from white_rabbit.constants import DEFAULT_NB_WORKING_HOURS
+from white_rabbit.event_occurrences import (
+    employees_with_current_occurrences,
+    stored_events,
+)
+from white_rabbit.event_store import EventStore
 from white_rabbit.models import Employee
 from white_rabbit.project_name_finder import ProjectFinder
-from white_rabbit.settings import DEFAULT_CACHE_DURATION
-from white_rabbit.text_utils import normalize_name
+from white_rabbit.locks import calendar_lock_name, file_lock
+from white_rabbit.settings import (
+    CALENDAR_LOCK_TIMEOUT,
+    DEFAULT_CACHE_DURATION,
+    STALE_CACHE_DURATION,
+)
+from white_rabbit.text_utils import parse_summary
 from white_rabbit.typing import (
+    CachedCalendar,
+    DaySlice,
     EventsPerEmployee,
     Event,
-    ProjectDistribution,
     ProjectTime,
 )
 from white_rabbit.utils import (
+    day_of,
     start_of_day,
     group_events_by_day,
     generate_time_periods,
     filter_events_per_time_period,
-    day_distribution,
     Period,
 )
 
 
-def read_events(
-    calendar_data: str, employee: Employee, project_finder=None
-) -> Iterable[Event]:
-    """Read events from an ical calendar and returns them as a list."""
+def iter_day_slices(
+    calendar_data: str, start_tracking_from: datetime.date
+) -> Iterator[DaySlice]:
+    """
+    Yield (start, end, calendar name) for each day covered by each event of an
+    ical calendar, in the order events are read.
+    """
     cal = Calendar().from_ical(calendar_data)
 
-    if project_finder is None:
-        project_finder = ProjectFinder()
-
-    start_date = employee.start_time_tracking_from
     end_date = datetime.date.today() + datetime.timedelta(days=365)
-    events = recurring_ical_events.of(cal).between(start_date, end_date)
-    events = [
-        event
-        for event in events
-        if event.name == "VEVENT"
-        and event.get("SUMMARY")
-        and not event["SUMMARY"].startswith("!")
-    ]
-    events_data: List[Event] = []
-    for event in events:
+    for event in recurring_ical_events.of(cal).between(start_tracking_from, end_date):
+        if (
+            event.name != "VEVENT"
+            or not event.get("SUMMARY")
+            or event["SUMMARY"].startswith("!")
+        ):
+            continue
+
         start_datetime = event["DTSTART"].dt
 
         try:
@@ -60,12 +76,7 @@ def read_events(
         except KeyError:
             end = start_datetime + datetime.timedelta(hours=1)
 
-        start_date = (
-            start_datetime.date()
-            if isinstance(start_datetime, datetime.datetime)
-            else start_datetime
-        )
-        if start_date < employee.start_time_tracking_from:
+        if day_of(start_datetime) < start_tracking_from:
             continue
 
         calendar_name = event["SUMMARY"].split(" - ")[0]
@@ -74,105 +85,526 @@ def read_events(
         next_day_start = start_of_day(start_datetime + datetime.timedelta(days=1))
 
         while start_datetime < end:
-            event_data = get_event_data(
-                start_datetime, end, calendar_name, project_finder, employee
-            )
-            events_data.append(event_data)
-            events_data = sorted(
-                events_data,
-                key=lambda ev: (
-                    ev["start_datetime"].date()
-                    if isinstance(ev["start_datetime"], datetime.datetime)
-                    else ev["start_datetime"]
-                ),
-            )
+            yield start_datetime, end, calendar_name
             start_datetime = next_day_start
             next_day_start = start_of_day(start_datetime + datetime.timedelta(days=1))
 
-    return events_data
+
+def parse_calendar(
+    calendar_data: bytes, start_tracking_from: datetime.date
+) -> List[DaySlice]:
+    """
+    Day slices of a calendar. Does not access the database, so that it can run
+    in worker processes.
+    """
+    return list(iter_day_slices(calendar_data.decode(), start_tracking_from))
+
+
+def events_from_day_slices(
+    day_slices: Iterable[DaySlice], employee: Employee, project_finder
+) -> List[Event]:
+    """Resolve the projects of day slices and returns events sorted by day."""
+    # slices are bucketed by day ordinal as they are emitted, and days are sorted
+    # once at the end, slices of a same day keep the order they were read in
+    events_per_day_ordinal: Dict[int, List[Event]] = defaultdict(list)
+    for start_datetime, end, calendar_name in day_slices:
+        event_data = get_event_data(
+            start_datetime, end, calendar_name, project_finder, employee
+        )
+        events_per_day_ordinal[day_of(start_datetime).toordinal()].append(event_data)
+
+    return [
+        event_data
+        for day_ordinal in sorted(events_per_day_ordinal)
+        for event_data in events_per_day_ordinal[day_ordinal]
+    ]
+
+
+def read_events(
+    calendar_data: str, employee: Employee, project_finder=None
+) -> List[Event]:
+    """Read events from an ical calendar and returns them as a list sorted by day."""
+    if project_finder is None:
+        project_finder = ProjectFinder()
+
+    return events_from_day_slices(
+        iter_day_slices(calendar_data, employee.start_time_tracking_from),
+        employee,
+        project_finder,
+    )
 
 
 def get_event_data(start, end, calendar_name, project_finder, employee) -> Event:
-    start_datetime = start
+    event_data = get_entry_data(start, end, calendar_name)
+    project = project_finder.get_project(event_data["name"], employee.company, start)
+    event_data["project_id"] = project.pk
+    event_data["project_name"] = project.name
+    event_data["category"] = project.category and project.category.name
+    return event_data
 
-    project_name = calendar_name.split(" [")[0]
-    subproject_name = None
-    if len(calendar_name.split(" [")) > 1:
-        subproject_name = normalize_name(
-            calendar_name[calendar_name.find("[") + 1 : calendar_name.find("]")]
-        )
 
-    project = project_finder.get_project(project_name, employee.company, start_datetime)
+def get_entry_data(start, end, calendar_name) -> Event:
+    """Event of a calendar entry, without its project."""
+    project_name, _, subproject_name = parse_summary(calendar_name)
 
     return {
-        "project_id": project.pk,
-        "project_name": project.name,
-        "category": project.category and project.category.name,
+        "project_id": None,
+        "project_name": None,
+        "category": None,
         "name": project_name,
         "subproject_name": subproject_name,
-        "start_datetime": start_datetime,
+        "start_datetime": start,
         "end_datetime": end,
         "duration": min((end - start).total_seconds() / 3600, DEFAULT_NB_WORKING_HOURS),
     }
 
 
+def entries_from_day_slices(day_slices: Iterable[DaySlice]) -> EventStore:
+    """
+    Entries of a calendar, sorted by day. Their projects are resolved when they
+    are read, so that changes to projects and aliases apply to cached entries.
+    """
+    return EventStore.from_events(
+        get_entry_data(start, end, calendar_name)
+        for start, end, calendar_name in day_slices
+    )
+
+
+def resolve_projects(
+    entries: EventStore, employee: Employee, project_finder
+) -> EventStore:
+    """Events of calendar entries, with the project of their name on their day."""
+    company = employee.company
+
+    def project_row(name: str, day: int):
+        project = project_finder.get_project(
+            name, company, datetime.date.fromordinal(day)
+        )
+        return (
+            project.pk,
+            project.name,
+            project.category and project.category.name,
+            name,
+        )
+
+    return entries.with_projects(project_row)
+
+
+# employees whose calendars are being refreshed in the background by this process
+refreshing_employee_ids: Set[int] = set()
+refreshing_lock = threading.Lock()
+
+
+def valid_cached_calendar(cached_calendar) -> Optional[CachedCalendar]:
+    # ignore calendars cached in a previous format, such as plain lists of events
+    if not isinstance(cached_calendar, dict) or not isinstance(
+        cached_calendar.get("entries"), EventStore
+    ):
+        return None
+    return cached_calendar
+
+
+def get_cached_calendar(employee: Employee) -> Optional[CachedCalendar]:
+    return get_cached_calendars([employee]).get(employee)
+
+
+def get_cached_calendars(employees: List[Employee]) -> Dict[Employee, CachedCalendar]:
+    """Cached calendars of the employees who have one, read with a single get_many."""
+    keys = {employee: calendar_key(employee) for employee in employees}
+    cached_calendars = cache.get_many(keys.values())
+    return {
+        employee: cached_calendar
+        for employee, key in keys.items()
+        if (cached_calendar := valid_cached_calendar(cached_calendars.get(key)))
+    }
+
+
+def set_cached_calendar(employee: Employee, cached_calendar: CachedCalendar):
+    cache.set(
+        calendar_key(employee),
+        {**cached_calendar, "fetched_at": time.time()},
+        DEFAULT_CACHE_DURATION + STALE_CACHE_DURATION,
+    )
+
+
+def is_fresh(cached_calendar: CachedCalendar) -> bool:
+    return time.time() - cached_calendar.get("fetched_at", 0) < DEFAULT_CACHE_DURATION
+
+
+def refresh_calendars(employees: List[Employee]):
+    """
+    Refresh the cached calendars of the employees that are not being refreshed
+    by another process, and that it did not refresh in the meantime.
+    """
+    try:
+        with ExitStack() as stack:
+            employees_to_refresh = [
+                employee
+                for employee in employees
+                if stack.enter_context(file_lock(calendar_lock_name(employee), 0))
+                and not is_fresh(get_cached_calendar(employee) or {})
+            ]
+            get_events_of_employees(employees_to_refresh, ProjectFinder())
+    except Exception as e:
+        print(f"Error refreshing calendars in the background: {e!r}")
+    finally:
+        with refreshing_lock:
+            refreshing_employee_ids.difference_update(
+                employee.pk for employee in employees
+            )
+        # connections are per thread, close the ones opened by this thread
+        connections.close_all()
+
+
+def refresh_in_background(employees: List[Employee]):
+    """
+    Refresh the cached calendars of the employees in a background thread,
+    unless they are already being refreshed by this process.
+    """
+    with refreshing_lock:
+        employees = [
+            employee
+            for employee in employees
+            if employee.pk not in refreshing_employee_ids
+        ]
+        refreshing_employee_ids.update(employee.pk for employee in employees)
+    if employees:
+        threading.Thread(
+            target=refresh_calendars, args=(employees,), daemon=True
+        ).start()
+
+
+def usable_cached_calendar(employee: Employee) -> Optional[CachedCalendar]:
+    """
+    Returns the cached calendar of the employee if it can be reused when the
+    online calendar did not change.
+    """
+    return usable_cached_calendars([employee])[0]
+
+
+def usable_cached_calendars(
+    employees: List[Employee],
+) -> List[Optional[CachedCalendar]]:
+    cached_calendars = get_cached_calendars(employees)
+    return [
+        (
+            cached_calendar
+            if (cached_calendar := cached_calendars.get(employee))
+            and cached_calendar["start_time_tracking_from"]
+            == employee.start_time_tracking_from
+            else None
+        )
+        for employee in employees
+    ]
+
+
+def conditional_headers(cached_calendar: Optional[CachedCalendar]) -> Dict[str, str]:
+    """Headers so that the calendar is only sent back if it changed."""
+    headers: Dict[str, str] = {}
+    if cached_calendar is None:
+        return headers
+    if cached_calendar["etag"]:
+        headers["If-None-Match"] = cached_calendar["etag"]
+    if cached_calendar["last_modified"]:
+        headers["If-Modified-Since"] = cached_calendar["last_modified"]
+    return headers
+
+
+def response_validators(response: httpx.Response, employee: Employee) -> Dict:
+    return {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+        "sha256": hashlib.sha256(response.content).hexdigest(),
+        "start_time_tracking_from": employee.start_time_tracking_from,
+    }
+
+
+def unchanged_calendar(
+    response: httpx.Response,
+    employee: Employee,
+    cached_calendar: Optional[CachedCalendar],
+) -> Optional[CachedCalendar]:
+    """
+    Returns the cached calendar if the response to a (conditional) request shows
+    that the calendar did not change, None otherwise.
+    """
+    if cached_calendar is None:
+        return None
+    if response.status_code == 304:
+        return cached_calendar
+    validators = response_validators(response, employee)
+    if cached_calendar["sha256"] == validators["sha256"]:
+        return {**cached_calendar, **validators}
+    return None
+
+
+def new_cached_calendar(
+    entries: EventStore, response: httpx.Response, employee: Employee
+) -> CachedCalendar:
+    return {"entries": entries, **response_validators(response, employee)}
+
+
+def calendar_from_response(
+    response: httpx.Response,
+    employee: Employee,
+    cached_calendar: Optional[CachedCalendar] = None,
+) -> Tuple[CachedCalendar, bool]:
+    """
+    Returns the calendar of the employee for the response to a (conditional)
+    request, and whether reading entries was skipped because it did not change.
+    """
+    if (
+        calendar := unchanged_calendar(response, employee, cached_calendar)
+    ) is not None:
+        return calendar, True
+
+    entries = entries_from_day_slices(
+        iter_day_slices(response.content.decode(), employee.start_time_tracking_from)
+    )
+    return new_cached_calendar(entries, response, employee), False
+
+
+def events_from_response(
+    response: Optional[httpx.Response],
+    employee: Employee,
+    project_finder,
+    cached_calendar: Optional[CachedCalendar] = None,
+) -> EventStore:
+    """
+    Read and cache the entries of the calendar of the employee from the response
+    to a (conditional) request, and returns its events. Raises ValueError if the
+    calendar is not available.
+    """
+    if response is None:
+        if cached_calendar is not None:
+            # calendar temporarily unavailable, keep serving what we have
+            return resolve_projects(
+                cached_calendar["entries"], employee, project_finder
+            )
+        raise ValueError(f"could not download the calendar of {employee}")
+    cached_calendar, _ = calendar_from_response(response, employee, cached_calendar)
+    set_cached_calendar(employee, cached_calendar)
+    return resolve_projects(cached_calendar["entries"], employee, project_finder)
+
+
 def get_events_by_url(
     url: str, employee: Employee, project_finder=None
 ) -> Iterable[Event]:
-    """Read events from an ical calendar available at given URL."""
+    """
+    Read events from an ical calendar available at given URL.
+
+    The calendar is only downloaded and read again if it changed since it was
+    last cached.
+    """
+    cached_calendar = usable_cached_calendar(employee)
+    response = fetch_calendar(url, conditional_headers(cached_calendar))
+    return events_from_response(
+        response, employee, project_finder or ProjectFinder(), cached_calendar
+    )
 
-    r = requests.get(url)
-    data = r.content.decode()
-    return read_events(data, employee, project_finder=project_finder)
+
+def is_tracking_time(employee: Employee) -> bool:
+    return bool(employee.start_time_tracking_from) and (
+        employee.start_time_tracking_from <= datetime.date.today()
+    )
+
+
+def get_events_of_employees(
+    employees: List[Employee], project_finder=None
+) -> Dict[Employee, Optional[List[Event]]]:
+    """
+    Download the calendars of the employees concurrently and read their events.
+    Events are None for employees whose calendar could not be read.
+    """
+    if not employees:
+        return {}
+    if project_finder is None:
+        project_finder = ProjectFinder()
+    cached_calendars = usable_cached_calendars(employees)
+    responses = fetch_calendars(
+        [
+            (employee.calendar_ical_url, conditional_headers(cached_calendar))
+            for employee, cached_calendar in zip(employees, cached_calendars)
+        ]
+    )
+    events: Dict[Employee, Optional[List[Event]]] = {}
+    for employee, response, cached_calendar in zip(
+        employees, responses, cached_calendars
+    ):
+        try:
+            events[employee] = events_from_response(
+                response, employee, project_finder, cached_calendar
+            )
+        except ValueError:
+            events[employee] = None
+    return events
+
+
+def calendar_error(employee: Employee, request=None):
+    message = (
+        f"Impossible de récupérer le calendrier de {employee}. Il doit être "
+        "mal configuré. Dans sa configuration, bien mettre l'\"adresse "  # codespell:ignore
+        'secrète au format iCal" de son calendrier'
+    )
+    if request:
+        messages.error(request, message)
+    else:
+        print(message)
 
 
 def process_employee_events(
     employee: Employee, project_finder=None, request=None
 ) -> Iterable[Event]:
-    if not employee.start_time_tracking_from or (
-        employee.start_time_tracking_from > datetime.date.today()
-    ):
-        return []
-
-    try:
-        return get_events_by_url(employee.calendar_ical_url, employee, project_finder)
-    except ValueError:
-        message = (
-            f"Impossible de récupérer le calendrier de {employee}. Il doit être "
-            "mal configuré. Dans sa configuration, bien mettre l'\"adresse "  # codespell:ignore
-            'secrète au format iCal" de son calendrier'
-        )
-        if request:
-            messages.error(request, message)
-        else:
-            print(message)
-        return []
+    return create_events([employee], project_finder, request)[employee]
 
 
 def create_events(
     employees: List[Employee], project_finder=None, request=None
 ) -> EventsPerEmployee:
-    events: EventsPerEmployee = {}
-    for employee in employees:
-        events[employee] = process_employee_events(employee, project_finder, request)
-    return events
+    """Events of the employees, downloaded concurrently from their calendars."""
+    events: EventsPerEmployee = {
+        employee: [] for employee in employees if not is_tracking_time(employee)
+    }
+    events_of_employees = get_events_of_employees(
+        [employee for employee in employees if employee not in events], project_finder
+    )
+    for employee, employee_events in events_of_employees.items():
+        if employee_events is None:
+            calendar_error(employee, request)
+            employee_events = []
+        events[employee] = employee_events
+    # keep the order of employees
+    return {employee: events[employee] for employee in employees}
+
+
+def create_events_single_flight(
+    employees: List[Employee], project_finder=None, request=None
+) -> EventsPerEmployee:
+    """
+    Like create_events, but a calendar is only fetched by one process at a time.
+    Employees whose calendar is being fetched by another process get what it
+    cached, after waiting for it.
+    """
+    with ExitStack() as stack:
+        owned_employees = [
+            employee
+            for employee in employees
+            if stack.enter_context(file_lock(calendar_lock_name(employee), 0))
+        ]
+        events = create_events(owned_employees, project_finder, request)
+
+    # wait for the other processes concurrently
+    others = [employee for employee in employees if employee not in events]
+    if others:
+        with ThreadPoolExecutor(max_workers=len(others)) as executor:
+            cached_calendars = dict(
+                zip(others, executor.map(wait_for_cached_calendar, others))
+            )
+        if project_finder is None:
+            project_finder = ProjectFinder()
+        events.update(
+            {
+                employee: resolve_projects(
+                    cached_calendar["entries"], employee, project_finder
+                )
+                for employee, cached_calendar in cached_calendars.items()
+                if cached_calendar
+            }
+        )
+        # the other processes failed, or took too long
+        events.update(
+            create_events(
+                [employee for employee in others if not cached_calendars[employee]],
+                project_finder,
+                request,
+            )
+        )
+    return {employee: events[employee] for employee in employees}
+
+
+def get_fresh_events_of_employees(
+    employees: List[Employee], project_finder=None
+) -> Dict[Employee, Optional[EventStore]]:
+    """
+    Like get_events_of_employees, but calendars which were cached recently, by
+    hydrate_cache for instance, are not downloaded again.
+    """
+    if project_finder is None:
+        project_finder = ProjectFinder()
+    events: Dict[Employee, Optional[EventStore]] = {
+        employee: resolve_projects(cached_calendar["entries"], employee, project_finder)
+        for employee, cached_calendar in zip(
+            employees, usable_cached_calendars(employees)
+        )
+        if cached_calendar is not None and is_fresh(cached_calendar)
+    }
+    events.update(
+        get_events_of_employees(
+            [employee for employee in employees if employee not in events],
+            project_finder,
+        )
+    )
+    return {employee: events[employee] for employee in employees}
+
+
+def wait_for_cached_calendar(employee: Employee) -> Optional[CachedCalendar]:
+    """Cached calendar of an employee, once it is no longer being fetched."""
+    with file_lock(calendar_lock_name(employee), CALENDAR_LOCK_TIMEOUT):
+        return get_cached_calendar(employee)
 
 
 def get_events_from_employees_from_cache(
     employees: List[Employee], project_finder=None, request=None, force_refresh=False
 ) -> EventsPerEmployee:
+    """
+    Events of the employees, from the cache when possible.
+
+    Cached events that are no longer fresh are still returned, and refreshed in
+    the background, as well as events saved in the database by hydrate_cache
+    when they are not cached. Only employees without any events wait for their
+    calendar to be downloaded, concurrently. When given, request.events_fetched_at
+    is set to when the oldest of the returned calendars was fetched, and
+    request.events_cache_stats to the number of cache hits and misses.
+    """
     events: EventsPerEmployee = {}
-    for employee in employees:
-        if (not force_refresh) and (employee_data := cache.get(str(employee.id), None)):
-            print("got from cache", employee.pk)
-            events[employee] = employee_data
-        else:
-            print("fetching from ical", employee.pk)
-            events[employee] = process_employee_events(
-                employee, project_finder, request
+    fetched_at: List[float] = []
+    to_refresh: List[Employee] = []
+    cached_calendars = {} if force_refresh else get_cached_calendars(employees)
+    if cached_calendars and project_finder is None:
+        project_finder = ProjectFinder()
+    for employee, cached_calendar in cached_calendars.items():
+        # projects are resolved when read, so that they are always up to date
+        events[employee] = resolve_projects(
+            cached_calendar["entries"], employee, project_finder
+        )
+        fetched_at.append(cached_calendar.get("fetched_at", 0))
+        if not is_fresh(cached_calendar):
+            to_refresh.append(employee)
+    to_fetch = [employee for employee in employees if employee not in events]
+    stats = {"hits": len(events) - len(to_refresh), "stale": len(to_refresh)}
+
+    if not force_refresh:
+        # events saved by hydrate_cache are served while the calendar is fetched,
+        # unless projects changed since
+        stored = stored_events(employees_with_current_occurrences(to_fetch))
+        events.update(stored)
+        to_refresh.extend(stored)
+        to_fetch = [employee for employee in to_fetch if employee not in stored]
+        stats["database"] = len(stored)
+    # the calendars are cached when they are fetched
+    events.update(create_events_single_flight(to_fetch, project_finder, request))
+    if to_fetch:
+        fetched_at.append(time.time())
+    refresh_in_background(to_refresh)
+    stats["misses"] = len(to_fetch)
+
+    if request is not None:
+        request.events_cache_stats = stats
+        if fetched_at:
+            request.events_fetched_at = datetime.datetime.fromtimestamp(
+                min(fetched_at), tz=datetime.timezone.utc
             )
-            cache.set(str(employee.id), events[employee], DEFAULT_CACHE_DURATION)
-    return events
+    return {employee: events[employee] for employee in employees}
 
 
 def employees_for_user(user: User) -> List[Employee]:
@@ -192,31 +624,6 @@ def employees_for_user(user: User) -> List[Employee]:
     return []
 
 
-def events_per_day(
-    events: Iterable[Event], start_datetime: date, end_datetime: date
-) -> Dict[datetime.date, Iterable[Event]]:
-    """
-    Returns a dict day -> events for day for each day from start date to end
-    date (included).
-    Days without events are included.
-    """
-    delta = end_datetime - start_datetime
-    events = [
-        event
-        for event in events
-        if start_datetime <= event["start_datetime"] <= end_datetime
-    ]
-    to_return = group_events_by_day(events)
-
-    # also include days without events
-    for i in range(delta.days + 1):
-        day = start_datetime + timedelta(days=i)
-        if day not in to_return:
-            to_return[day] = []
-
-    return to_return
-
-
 class EmployeeEvents:
     def __init__(self, employee: Employee, events, n_periods=12):
         self.employee = employee
@@ -250,15 +657,22 @@ class EmployeeEvents:
             n_periods = self.n_periods
 
         periods = generate_time_periods(n_periods, time_period, time_shift_direction)
+        if not periods:
+            return to_return
+        # busy hours of all periods are computed at once
+        busy_hours = BusyHours(
+            self.employee,
+            self.events,
+            min(period["start"] for period in periods),
+            max(period["end"] for period in periods),
+        )
         for period in periods:
             events = filter_events_per_time_period(
                 self.events, period["start"], time_period
             )
 
             to_return[period["key"]] = {
-                "availability": available_time_of_employee(
-                    self.employee, self.events, period["start"], period["end"]
-                ),
+                "availability": busy_hours.availability(period["start"], period["end"]),
                 "events": events,
                 "period": period,
             }
@@ -269,42 +683,17 @@ class EmployeeEvents:
         period: Period,
         time_period: Union[str, None],
         group_by="project",
+        from_day: datetime.date = None,
     ) -> Dict[Union[str, int], ProjectTime]:
-
-        total: Dict[Union[str, int], ProjectTime] = defaultdict(
-            lambda: {
-                "duration": 0.0,
-                "events": [],
-                "subprojects": defaultdict(lambda: {"duration": 0.0}),
-            }
-        )
-        filtered_events = filter_events_per_time_period(
+        return aggregation.projects_for_time_period(
             self.events,
+            self.employee,
             period.get("start"),
             time_period,
             period_key=period["key"],
+            group_by=group_by,
+            from_day=from_day,
         )
-        for event_date, events_for_day in group_events_by_day(filtered_events).items():
-            distribution: Dict[int, ProjectDistribution] = day_distribution(
-                events_for_day, employee=self.employee, group_by=group_by
-            )
-            # identifier is project_id for projects, category name for categories
-            for identifier, data in distribution.items():
-                total[identifier]["duration"] += data["duration"]
-                total[identifier]["events"].append(
-                    {
-                        "employee": self.employee.name,
-                        "date": event_date,
-                        "duration": data["duration"],
-                    }
-                )
-                if data["details"]:
-                    for detail_name, duration in data["details"].items():
-                        total[identifier]["subprojects"][detail_name][
-                            "duration"
-                        ] += duration
-
-        return total
 
 
 def process_employees_events(  # noqa: C901
@@ -1,47 +1,229 @@
+import multiprocessing
 import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List, Tuple, Union
 
-import grequests
 import datetime
-from django.core.cache import cache
+from django.db import connections
 
-from white_rabbit.events import read_events
+from white_rabbit.cache_keys import get_data_versions
+from white_rabbit.calendar_fetcher import fetch_calendars
+from white_rabbit.daily_project_times import (
+    employees_with_current_daily_project_times,
+    mark_daily_project_times_saved,
+    save_daily_project_times,
+)
+from white_rabbit.day_completeness import save_day_completeness
+from white_rabbit.event_occurrences import mark_occurrences_saved, save_occurrences
+from white_rabbit.events import (
+    conditional_headers,
+    entries_from_day_slices,
+    new_cached_calendar,
+    parse_calendar,
+    resolve_projects,
+    set_cached_calendar,
+    unchanged_calendar,
+    usable_cached_calendars,
+)
+from white_rabbit.locks import calendar_lock_name, file_lock
 from white_rabbit.models import Employee, Project
 from white_rabbit.project_name_finder import ProjectFinder
-from white_rabbit.settings import DEFAULT_CACHE_DURATION
+from white_rabbit.settings import HYDRATE_CACHE_PARSE_WORKERS
+from white_rabbit.event_store import EventStore
+from white_rabbit.text_utils import summary_cache_stats
+from white_rabbit.typing import CachedCalendar, DaySlice
 
 
-def hydrate_cache():
-    employees = Employee.objects.filter(
-        start_time_tracking_from__isnull=False,
-        start_time_tracking_from__lte=datetime.date.today(),
-    )
-    urls = [employee.calendar_ical_url for employee in employees]
-    start = time.time()
-    rs = (grequests.get(u) for u in urls)
-    responses = grequests.map(rs)
-    print(
-        f"Fetching data from online icals for {len(employees)} employees took {time.time() - start:.2f} seconds."
-    )
-    project_finder = ProjectFinder()
-    start = time.time()
-    subprojects_per_project = defaultdict(set)
-    for response, employee in zip(responses, employees):
-        if response:
-            data = response.content.decode()
+def parse_calendars(
+    calendars: List[Tuple[bytes, datetime.date]], workers: int
+) -> List[Union[List[DaySlice], Exception]]:
+    """
+    Parse (calendar data, start of time tracking) calendars in worker processes.
+    Returns for each calendar its day slices, or the exception raised parsing it.
+    """
+    results: List[Union[List[DaySlice], Exception]] = []
+    if workers <= 1 or len(calendars) <= 1:
+        for calendar_data, start_tracking_from in calendars:
+            try:
+                results.append(parse_calendar(calendar_data, start_tracking_from))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    # forked workers must not share the database connections of the parent
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        futures = [
+            executor.submit(parse_calendar, calendar_data, start_tracking_from)
+            for calendar_data, start_tracking_from in calendars
+        ]
+        for future in futures:
             try:
-                events = read_events(data, employee, project_finder=project_finder)
+                results.append(future.result())
             except Exception as e:
-                print(f"Error processing calendar for employee {employee.id} ({employee.user.email}): {e}")
-                continue
-            for event in events:
-                if event["subproject_name"] and event["project_id"]:
-                    subprojects_per_project[event["project_id"]].add(event["subproject_name"])
-            cache.set(str(employee.id), events, DEFAULT_CACHE_DURATION)
+                results.append(e)
+    return results
+
+
+def resolve_calendars(
+    calendars: Dict[Employee, CachedCalendar],
+) -> Tuple[Dict[Employee, EventStore], List[Project]]:
+    """
+    Events of the calendars, and the projects created for names that matched no
+    project. Projects are resolved in this process, with a single project finder,
+    and those of unknown names are created at once when all calendars are read.
+    """
+    project_finder = ProjectFinder(defer_creation=True)
+    events_per_employee = {
+        employee: resolve_projects(calendar["entries"], employee, project_finder)
+        for employee, calendar in calendars.items()
+    }
+    created_projects = project_finder.create_pending_projects()
+    if created_projects:
+        for employee, events in events_per_employee.items():
+            # events resolved to unsaved projects are resolved again
+            if any(project_id is None for project_id, *_ in events.project_table):
+                events_per_employee[employee] = resolve_projects(
+                    calendars[employee]["entries"], employee, project_finder
+                )
+    return events_per_employee, created_projects
+
+
+def update_subproject_names(events_per_employee: Dict[Employee, EventStore]):
+    subprojects_per_project = defaultdict(set)
+    for events in events_per_employee.values():
+        for project_id, subproject_names in events.subprojects_per_project().items():
+            subprojects_per_project[project_id].update(subproject_names)
     projects = Project.objects.filter(pk__in=subprojects_per_project.keys())
     for project in projects:
         project.subproject_names = sorted(subprojects_per_project[project.pk])
     Project.objects.bulk_update(projects, ["subproject_names"])
+
+
+def hydrate_cache(workers: int = HYDRATE_CACHE_PARSE_WORKERS):
+    with file_lock("hydrate_cache", timeout=0) as acquired:
+        if not acquired:
+            print("Previous hydrate_cache run is still running, exiting.")
+            return None
+        with ExitStack() as stack:
+            employees = [
+                employee
+                for employee in Employee.objects.filter(
+                    start_time_tracking_from__isnull=False,
+                    start_time_tracking_from__lte=datetime.date.today(),
+                )
+                # skip calendars being refreshed by a web worker
+                if stack.enter_context(file_lock(calendar_lock_name(employee), 0))
+            ]
+            return hydrate_employees_cache(employees, workers)
+
+
+def hydrate_employees_cache(employees: List[Employee], workers: int):
+    cached_calendars = usable_cached_calendars(employees)
+    start = time.time()
+    responses = fetch_calendars(
+        [
+            (employee.calendar_ical_url, conditional_headers(cached_calendar))
+            for employee, cached_calendar in zip(employees, cached_calendars)
+        ]
+    )
+    print(
+        f"Fetching data from online icals for {len(employees)} employees took {time.time() - start:.2f} seconds."
+    )
+    start = time.time()
+    calendars = {}
+    to_parse = []
+    for response, employee, cached_calendar in zip(
+        responses, employees, cached_calendars
+    ):
+        if response is None or response.is_error:
+            continue
+        calendar = unchanged_calendar(response, employee, cached_calendar)
+        if calendar is not None:
+            calendars[employee] = calendar
+        else:
+            to_parse.append((employee, response))
+    n_unchanged = len(calendars)
+
+    day_slices_per_calendar = parse_calendars(
+        [
+            (response.content, employee.start_time_tracking_from)
+            for employee, response in to_parse
+        ],
+        workers,
+    )
+    print(
+        f"Parsing {len(to_parse)} calendars with {workers} workers took {time.time() - start:.2f} seconds."
+    )
+
+    start = time.time()
+    changed_employees = set()
+    for (employee, response), day_slices in zip(to_parse, day_slices_per_calendar):
+        if isinstance(day_slices, Exception):
+            print(
+                f"Error processing calendar for employee {employee.id} ({employee.user.email}): {day_slices}"
+            )
+            continue
+        calendars[employee] = new_cached_calendar(
+            entries_from_day_slices(day_slices), response, employee
+        )
+        changed_employees.add(employee)
+
+    # read before the projects, so that events are not marked as saved with a
+    # version of the projects more recent than the one they were resolved with
+    data_versions = get_data_versions(employee.company_id for employee in calendars)
+    events_per_employee, created_projects = resolve_calendars(calendars)
+    # events of unchanged calendars are only saved if projects or day settings
+    # changed since
+    with_current_daily_project_times = set(
+        employees_with_current_daily_project_times(list(calendars), data_versions)
+    )
+    n_occurrences = 0
+    n_days = 0
+    n_states = 0
+    companies_with_changed_days = set()
+    # employees with events whose projects could not be created, saved again
+    # by the next run
+    with_unsaved_projects = set()
+    for employee, events in events_per_employee.items():
+        set_cached_calendar(employee, calendars[employee])
+        # states of days change with the day and the settings of the employee
+        # even when the calendar is unchanged, only changed days are rewritten
+        n_states += save_day_completeness(employee, events)
+        saved_events = events.with_saved_projects()
+        if saved_events is not events:
+            print(f"Events of employee {employee.id} without project are not saved")
+            with_unsaved_projects.add(employee)
+        if (
+            employee in changed_employees
+            or employee not in with_current_daily_project_times
+        ):
+            n_occurrences += save_occurrences(employee, saved_events)
+            n_changed_days = save_daily_project_times(employee, saved_events)
+            if n_changed_days:
+                companies_with_changed_days.add(employee.company_id)
+            n_days += n_changed_days
+    mark_occurrences_saved(
+        {
+            employee: data_versions[employee.company_id]
+            for employee in calendars
+            if employee not in with_unsaved_projects
+        }
+    )
+    mark_daily_project_times_saved(companies_with_changed_days)
+    update_subproject_names(events_per_employee)
     print(
         f"Processing events and saving in cache for {len(employees)} employees took {time.time() - start:.2f} seconds."
     )
+    print(
+        f"{n_unchanged} unchanged calendars were not read again, "
+        f"{n_occurrences} event occurrences, the project times of {n_days} days "
+        f"and the states of {n_states} days were saved, "
+        f"{len(created_projects)} projects were created."
+    )
+    print(f"Parsed summaries: {summary_cache_stats()}.")
+    return {"employees": len(employees), "unchanged": n_unchanged}
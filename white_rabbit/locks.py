@@ -0,0 +1,42 @@
+import fcntl
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from white_rabbit.settings import LOCKS_DIR
+
+# delay between two attempts to acquire a lock held by another process
+POLL_INTERVAL = 0.05
+
+
+@contextmanager
+def file_lock(name: str, timeout: Optional[float] = None) -> Iterator[bool]:
+    """
+    Exclusive lock shared by all processes of the machine, such as gunicorn
+    workers and management commands.
+
+    Waits at most timeout seconds for the lock (forever if None, not at all if 0),
+    and yields whether it was acquired. The lock is released when the process
+    exits, even if it crashed.
+    """
+    LOCKS_DIR.mkdir(parents=True, exist_ok=True)
+    deadline = None if timeout is None else time.monotonic() + timeout
+    with open(LOCKS_DIR / f"{name}.lock", "w") as lock_file:
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    yield False
+                    return
+                time.sleep(POLL_INTERVAL)
+                continue
+            break
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def calendar_lock_name(employee) -> str:
+    return f"calendar-{employee.pk}"
@@ -1,8 +1,17 @@
 from django.core.management import BaseCommand
 
 from white_rabbit.hydrate_cache import hydrate_cache
+from white_rabbit.settings import HYDRATE_CACHE_PARSE_WORKERS
 
 
 class Command(BaseCommand):
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=HYDRATE_CACHE_PARSE_WORKERS,
+            help="Number of processes used to parse calendars",
+        )
+
     def handle(self, *args, **options):
-        hydrate_cache()
+        hydrate_cache(workers=options["workers"])
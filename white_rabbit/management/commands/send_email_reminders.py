@@ -1,97 +1,127 @@
 import datetime
-from typing import List, Tuple
+import time
+from typing import Dict, List, Tuple
 
-import html2text
-from django.core.mail import send_mail
+from django.core.mail import get_connection
 from django.core.management import BaseCommand
-from django.template.loader import render_to_string
 
-from white_rabbit.constants import DayState
-from white_rabbit.events import get_events_by_url
+from white_rabbit.events import get_fresh_events_of_employees
 from white_rabbit.models import Employee
 from white_rabbit.project_name_finder import ProjectFinder
-from white_rabbit.settings import ENVIRONMENT
-from white_rabbit.state_of_day import state_of_days_for_week
+from white_rabbit.reminder_emails import render_missing_days_emails, send_in_batches
+from white_rabbit.settings import (
+    ENVIRONMENT,
+    REMINDER_EMAIL_BATCH_SIZE,
+    REMINDER_EMAIL_RETRIES,
+)
+from white_rabbit.state_of_day import incomplete_working_days
 
 
-def send_missing_days_email(missing_days: List[Tuple], employee: Employee):
-    html_message = render_to_string(
-        "email/missing_days_reminder.html",
-        {"days": missing_days, "current_year": datetime.date.today().year},
-    )
-    message = html2text.html2text(html_message)
-    send_mail(
-        "[Lapin Blanc]: Des jours manquants à remplir",
-        message,
-        "contact@telescoop.fr",
-        [employee.user.email],
-        html_message=html_message,
-    )
+def employees_to_remind(is_monday: bool) -> List[Employee]:
+    return [
+        employee
+        for employee in Employee.objects.filter(
+            user__email__isnull=False,
+            start_time_tracking_from__isnull=False,
+        ).select_related("user")
+        # Skip employees without reminders or with weekly frequency if today is not Monday
+        if not (
+            employee.reminders_frequency == "never"
+            or (employee.reminders_frequency == "weekly" and not is_monday)
+        )
+    ]
+
+
+def find_missing_days(
+    employees: List[Employee], end: datetime.date
+) -> Tuple[Dict[Employee, List[Tuple]], List[Employee]]:
+    """
+    Missing days of the employees until end, for the employees with missing
+    days, and the employees whose calendars could not be read.
+    """
+    # calendars cached recently are reused, the others are downloaded
+    # concurrently
+    events_per_employee = get_fresh_events_of_employees(employees, ProjectFinder())
+    missing_days_per_employee = {}
+    unreadable = []
+    for employee, events in events_per_employee.items():
+        if events is None:
+            print(f"could not get events for {employee.user.email}")
+            unreadable.append(employee)
+            continue
+
+        # days off, bank holidays and days out of time tracking are not
+        # reminded
+        missing_days = incomplete_working_days(
+            events, employee, employee.start_time_tracking_from, end
+        )
+        if missing_days:
+            missing_days_per_employee[employee] = missing_days
+    return missing_days_per_employee, unreadable
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):  # noqa: C901
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Write the emails to the console instead of sending them",
+        )
+        parser.add_argument(
+            "--output-dir",
+            help="Write the emails to files in this directory instead of sending them",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=REMINDER_EMAIL_BATCH_SIZE,
+            help="Number of emails sent over each connection to the email backend",
+        )
+
+    def handle(self, *args, **options):
         today = datetime.date.today()
         weekday = today.weekday()
-        is_monday = weekday == 0
-        is_weekend = weekday in [5, 6]
 
         # do not run on week-ends
-        if is_weekend:
+        if weekday in [5, 6]:
             self.stdout.write("Not sending reminders on week-ends")
             return
 
-        project_finder = ProjectFinder()
-        for employee in Employee.objects.filter(
-            user__email__isnull=False,
-            start_time_tracking_from__isnull=False,
-        ):
-            # Skip employees without reminders or with weekly frequency if today is not Monday
-            if employee.reminders_frequency == "never" or (
-                employee.reminders_frequency == "weekly" and not is_monday
-            ):
-                continue
-            try:
-                events = get_events_by_url(
-                    employee.calendar_ical_url, employee, project_finder
-                )
-            except ValueError:
-                print(f"could not get events for {employee.user.email}")
-                continue
+        start = time.time()
+        employees = employees_to_remind(is_monday=weekday == 0)
+        end_of_last_week = today - datetime.timedelta(days=weekday + 1)
+        missing_days_per_employee, unreadable = find_missing_days(
+            employees, end_of_last_week
+        )
+        print(
+            f"Missing days of {len(employees)} employees were found in {time.time() - start:.2f} seconds."
+        )
 
-            missing_days: List[Tuple] = []
-            day = employee.start_time_tracking_from
-            today = datetime.date.today()
-            end_of_last_week = (
-                today
-                + datetime.timedelta(days=6 - today.weekday())
-                - datetime.timedelta(days=7)
+        if options["output_dir"]:
+            connection = get_connection(
+                "django.core.mail.backends.filebased.EmailBackend",
+                file_path=options["output_dir"],
             )
-            last_day = end_of_last_week
-            if employee.end_time_tracking_on:
-                last_day = min(end_of_last_week, employee.end_time_tracking_on)
-
-            while day < last_day:
-                for day_in_week, state_of_day in state_of_days_for_week(
-                    events, employee, day=day
-                ).items():
-                    if not getattr(employee, f"works_day_{day_in_week.weekday() + 1}"):
-                        # employee does not work on that day, so no reminders to be sent
-                        continue
-                    if day_in_week < employee.start_time_tracking_from:
-                        # can happen in the first week
-                        continue
-
-                    if state_of_day["state"] != DayState.complete:
-                        missing_days.append((day_in_week, state_of_day))
-                day += datetime.timedelta(days=7)
-
-            if not missing_days:
-                # all days are complete
-                continue
-
-            if ENVIRONMENT != "production":
+        elif options["dry_run"]:
+            connection = get_connection(
+                "django.core.mail.backends.console.EmailBackend"
+            )
+        elif ENVIRONMENT != "production":
+            for employee, missing_days in missing_days_per_employee.items():
                 print(f"missing days for {employee.user.email}: {missing_days}")
-                continue
+            return
+        else:
+            connection = get_connection()
 
-            send_missing_days_email(missing_days, employee)
+        messages = render_missing_days_emails(missing_days_per_employee)
+        failed = send_in_batches(
+            messages, connection, options["batch_size"], REMINDER_EMAIL_RETRIES
+        )
+        for message in failed:
+            print(f"could not send reminder to {', '.join(message.to)}")
+        print(
+            f"Reminders: {len(messages) - len(failed)} sent, {len(failed)} failed, "
+            f"{len(employees) - len(messages) - len(unreadable)} employees without "
+            f"missing days, {len(unreadable)} calendars unreadable, "
+            f"in {time.time() - start:.2f} seconds."
+        )
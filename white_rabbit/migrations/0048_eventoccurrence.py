@@ -0,0 +1,103 @@
+# Generated by Django 5.0.12 on 2026-10-18 06:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("white_rabbit", "0047_add_subproject_names_to_project"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventOccurrence",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="jour")),
+                (
+                    "position",
+                    models.PositiveSmallIntegerField(
+                        help_text="Ordre de l'événement dans la journée",
+                        verbose_name="position",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=256, verbose_name="nom dans le calendrier"
+                    ),
+                ),
+                (
+                    "subproject_name",
+                    models.CharField(
+                        blank=True,
+                        max_length=256,
+                        null=True,
+                        verbose_name="sous-projet",
+                    ),
+                ),
+                (
+                    "start_time",
+                    models.TimeField(
+                        blank=True,
+                        help_text="Vide pour un événement sur la journée entière",
+                        null=True,
+                        verbose_name="heure de début",
+                    ),
+                ),
+                ("end_day", models.DateField(verbose_name="jour de fin")),
+                (
+                    "end_time",
+                    models.TimeField(
+                        blank=True, null=True, verbose_name="heure de fin"
+                    ),
+                ),
+                (
+                    "time_zone",
+                    models.CharField(
+                        blank=True, max_length=64, verbose_name="fuseau horaire"
+                    ),
+                ),
+                ("duration", models.FloatField(verbose_name="durée (heures)")),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="event_occurrences",
+                        to="white_rabbit.employee",
+                        verbose_name="salarié",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="event_occurrences",
+                        to="white_rabbit.project",
+                        verbose_name="projet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "occurrence d'événement",
+                "verbose_name_plural": "occurrences d'événements",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="eventoccurrence",
+            constraint=models.UniqueConstraint(
+                fields=("employee", "day", "position"),
+                name="event occurrence day position",
+            ),
+        ),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 5.0.12 on 2026-10-18 06:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("white_rabbit", "0048_eventoccurrence"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DailyProjectTime",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="jour")),
+                (
+                    "position",
+                    models.PositiveSmallIntegerField(
+                        help_text="Position du premier événement dans la journée",
+                        verbose_name="position",
+                    ),
+                ),
+                (
+                    "subproject_name",
+                    models.CharField(
+                        blank=True,
+                        max_length=256,
+                        null=True,
+                        verbose_name="sous-projet",
+                    ),
+                ),
+                (
+                    "category",
+                    models.CharField(
+                        blank=True, max_length=32, null=True, verbose_name="catégorie"
+                    ),
+                ),
+                (
+                    "end_day",
+                    models.DateField(verbose_name="jour de fin des événements"),
+                ),
+                ("hours", models.FloatField(verbose_name="durée (heures)")),
+                ("fraction", models.FloatField(verbose_name="part de la journée")),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_project_times",
+                        to="white_rabbit.employee",
+                        verbose_name="salarié",
+                    ),
+                ),
+                (
+                    "project",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_project_times",
+                        to="white_rabbit.project",
+                        verbose_name="projet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "temps journalier par projet",
+                "verbose_name_plural": "temps journaliers par projet",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="dailyprojecttime",
+            constraint=models.UniqueConstraint(
+                fields=("employee", "day", "position"),
+                name="daily project time day position",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.0.12 on 2026-10-18 06:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("white_rabbit", "0049_dailyprojecttime"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DayCompleteness",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("day", models.DateField(verbose_name="jour")),
+                (
+                    "state",
+                    models.CharField(
+                        choices=[
+                            ("empty", "Vide"),
+                            ("incomplete", "Incomplet"),
+                            ("complete", "Complet"),
+                        ],
+                        max_length=10,
+                        verbose_name="état",
+                    ),
+                ),
+                ("hours", models.FloatField(verbose_name="durée (heures)")),
+                (
+                    "employee",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="day_completeness",
+                        to="white_rabbit.employee",
+                        verbose_name="salarié",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "complétude d'une journée",
+                "verbose_name_plural": "complétude des journées",
+                "indexes": [
+                    models.Index(
+                        fields=["employee", "state", "day"],
+                        name="day_completeness_state",
+                    )
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="daycompleteness",
+            constraint=models.UniqueConstraint(
+                fields=("employee", "day"), name="day completeness employee day"
+            ),
+        ),
+    ]
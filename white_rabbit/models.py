@@ -240,7 +240,7 @@ class Project(TimeStampedModel):
         if not self.pk:
             super().save(*args, **kwargs)
             self.update_total_sold_and_days_from_invoices()
-            super().save()
+            super().save(update_fields=["total_sold", "estimated_days_count"])
             return
         self.update_total_sold_and_days_from_invoices()
         super().save(*args, **kwargs)
@@ -406,6 +406,15 @@ class Employee(TimeStampedModel):
             employee_assignments__employee=self
         ).distinct()
 
+    @property
+    def day_settings(self) -> tuple:
+        """Settings that the fraction of a day spent on a project depends on."""
+        return (
+            self.min_working_hours_for_full_day,
+            self.default_day_working_hours,
+            self.is_paid_hourly,
+        )
+
 
 class EmployeeForecastAssignment(models.Model):
     employee = models.ForeignKey(
@@ -569,3 +578,151 @@ class EmployeeForecastAssignment(models.Model):
 
     def __str__(self):
         return f"{self.employee.name} → {self.forecast_project.name} ({self.start_date} - {self.end_date})"
+
+
+class EventOccurrence(models.Model):
+    """
+    An event of an employee calendar on one day, as read by hydrate_cache. Events
+    over several days have an occurrence for each day. Times are wall-clock times
+    in the time zone of the event.
+    """
+
+    class Meta:
+        verbose_name = "occurrence d'événement"
+        verbose_name_plural = "occurrences d'événements"
+        constraints = [
+            # also the index used to get the events of an employee between dates
+            UniqueConstraint(
+                name="event occurrence day position",
+                fields=["employee", "day", "position"],
+            )
+        ]
+
+    employee = models.ForeignKey(
+        Employee,
+        verbose_name="salarié",
+        related_name="event_occurrences",
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField(verbose_name="jour")
+    position = models.PositiveSmallIntegerField(
+        verbose_name="position", help_text="Ordre de l'événement dans la journée"
+    )
+    project = models.ForeignKey(
+        Project,
+        verbose_name="projet",
+        related_name="event_occurrences",
+        on_delete=models.CASCADE,
+    )
+    name = models.CharField(max_length=256, verbose_name="nom dans le calendrier")
+    subproject_name = models.CharField(
+        max_length=256, verbose_name="sous-projet", null=True, blank=True
+    )
+    start_time = models.TimeField(
+        verbose_name="heure de début",
+        null=True,
+        blank=True,
+        help_text="Vide pour un événement sur la journée entière",
+    )
+    end_day = models.DateField(verbose_name="jour de fin")
+    end_time = models.TimeField(verbose_name="heure de fin", null=True, blank=True)
+    time_zone = models.CharField(
+        max_length=64, verbose_name="fuseau horaire", blank=True
+    )
+    duration = models.FloatField(verbose_name="durée (heures)")
+
+    def __str__(self):
+        return f"{self.employee} - {self.name} ({self.day})"
+
+
+class DailyProjectTime(models.Model):
+    """
+    Time spent by an employee on a project on one day, summed by hydrate_cache
+    from the occurrences of the events of that day with the same project,
+    subproject and end day. The fraction of the day is computed over all the
+    events of the day, as in day_distribution.
+    """
+
+    class Meta:
+        verbose_name = "temps journalier par projet"
+        verbose_name_plural = "temps journaliers par projet"
+        constraints = [
+            # also the index used to sum the times of employees between dates
+            UniqueConstraint(
+                name="daily project time day position",
+                fields=["employee", "day", "position"],
+            )
+        ]
+
+    employee = models.ForeignKey(
+        Employee,
+        verbose_name="salarié",
+        related_name="daily_project_times",
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField(verbose_name="jour")
+    position = models.PositiveSmallIntegerField(
+        verbose_name="position",
+        help_text="Position du premier événement dans la journée",
+    )
+    project = models.ForeignKey(
+        Project,
+        verbose_name="projet",
+        related_name="daily_project_times",
+        on_delete=models.CASCADE,
+    )
+    subproject_name = models.CharField(
+        max_length=256, verbose_name="sous-projet", null=True, blank=True
+    )
+    category = models.CharField(
+        max_length=32, verbose_name="catégorie", null=True, blank=True
+    )
+    end_day = models.DateField(verbose_name="jour de fin des événements")
+    hours = models.FloatField(verbose_name="durée (heures)")
+    fraction = models.FloatField(verbose_name="part de la journée")
+
+    def __str__(self):
+        return f"{self.employee} - {self.project} ({self.day})"
+
+
+class DayCompleteness(models.Model):
+    """
+    State of a working day of an employee, with the hours of the events of that
+    day, as in state_of_day. Saved by hydrate_cache for each working day from
+    the start of time tracking until the day of the hydration.
+    """
+
+    STATE_CHOICES = [
+        ("empty", "Vide"),
+        ("incomplete", "Incomplet"),
+        ("complete", "Complet"),
+    ]
+
+    class Meta:
+        verbose_name = "complétude d'une journée"
+        verbose_name_plural = "complétude des journées"
+        constraints = [
+            UniqueConstraint(
+                name="day completeness employee day", fields=["employee", "day"]
+            )
+        ]
+        indexes = [
+            # used to list the missing days of employees between dates
+            models.Index(
+                name="day_completeness_state",
+                fields=["employee", "state", "day"],
+            )
+        ]
+
+    employee = models.ForeignKey(
+        Employee,
+        verbose_name="salarié",
+        related_name="day_completeness",
+        on_delete=models.CASCADE,
+    )
+    day = models.DateField(verbose_name="jour")
+    state = models.CharField(verbose_name="état", max_length=10, choices=STATE_CHOICES)
+    hours = models.FloatField(verbose_name="durée (heures)")
+
+    def __str__(self):
+        return f"{self.employee} - {self.day} ({self.state})"
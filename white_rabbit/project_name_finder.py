@@ -1,163 +1,326 @@
+import bisect
 import datetime
+import itertools
+import threading
 from collections import defaultdict
-from typing import Union, Dict, Any
+from typing import Union, Dict, Any, List, Optional, Tuple
 
+from django.db import DatabaseError, transaction
+from django.db.models import prefetch_related_objects
+
+from white_rabbit.cache_keys import get_data_version
 from white_rabbit.models import Project, Company
-from white_rabbit.text_utils import normalize_name
+from white_rabbit.text_utils import normalize_name, parse_summary
 
 
-class ProjectFinder:
-    def __init__(self):
-        self.all_projects = Project.objects.prefetch_related("company", "aliases").all()
-        self.projects_with_dates = list(
-            self.all_projects.filter(start_date__isnull=False, end_date__isnull=False)
+class ProjectIntervals:
+    """
+    Projects that a normalized name matches, to find the one of a date with
+    bisect: the dates of projects with both start and end dates, and then of
+    projects with only a start date, are split into disjoint intervals sorted by
+    start, each with the first project covering it. Projects without dates come
+    last.
+    """
+
+    def __init__(self, projects: List[Project]):
+        self.projects = projects
+        self.dated = disjoint_intervals(
+            [project for project in projects if project.start_date and project.end_date]
+        )
+        self.start_only = disjoint_intervals(
+            [
+                project
+                for project in projects
+                if project.start_date and not project.end_date
+            ]
+        )
+        self.undated = next(
+            (
+                project
+                for project in projects
+                if not project.start_date and not project.end_date
+            ),
+            None,
+        )
+
+    def find(self, date: Union[datetime.date, None]) -> Optional[Project]:
+        if date is not None:
+            for starts, ends, projects in (self.dated, self.start_only):
+                index = bisect.bisect_right(starts, date) - 1
+                if index >= 0 and date <= ends[index]:
+                    return projects[index]
+        return self.undated
+
+
+Intervals = Tuple[List[datetime.date], List[datetime.date], List[Project]]
+
+
+def disjoint_intervals(projects: List[Project]) -> Intervals:
+    """
+    Starts, ends and projects of the disjoint intervals covered by the dates of
+    projects, where the first of them wins.
+    """
+    bounds = {project.start_date for project in projects} | {
+        project.end_date + datetime.timedelta(days=1)
+        for project in projects
+        if project.end_date and project.end_date < datetime.date.max
+    }
+    starts: List[datetime.date] = []
+    ends: List[datetime.date] = []
+    winners: List[Project] = []
+    sorted_bounds = sorted(bounds)
+    for start, next_bound in itertools.zip_longest(sorted_bounds, sorted_bounds[1:]):
+        end = (
+            next_bound - datetime.timedelta(days=1) if next_bound else datetime.date.max
         )
-        self.project_with_only_start_date = list(
-            self.all_projects.filter(start_date__isnull=False, end_date__isnull=True)
+        winner = next(
+            (
+                project
+                for project in projects
+                if project.start_date
+                <= start
+                <= (project.end_date or datetime.date.max)
+            ),
+            None,
         )
-        self.project_without_dates = list(
-            self.all_projects.filter(start_date__isnull=True, end_date__isnull=True)
+        if winner is None:
+            continue
+        if (
+            winners
+            and winners[-1] is winner
+            and ends[-1] + datetime.timedelta(days=1) == start
+        ):
+            ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+            winners.append(winner)
+    return starts, ends, winners
+
+
+class CompanyProjects:
+    """
+    Projects of a company that event names can match, indexed by normalized
+    name. Built once per data version of the company, and shared by the threads
+    of the process.
+    """
+
+    def __init__(self, company: Company, data_version: int):
+        self.company = company
+        self.data_version = data_version
+        self.lock = threading.Lock()
+        projects = list(
+            Project.objects.filter(company=company)
+            .select_related("category")
+            .prefetch_related("aliases")
         )
-        self.temp_one_project_per_company = {}
-        self.projects_for_matching_per_company = {}
-        # sorted names per company
-        self.sorted_names_per_company = {}
-        self.sorted_projects_pks_per_company = {}
-        # Dictionary mapping companies to normalized names to lists of projects
-        self.projects_for_normalized_name_per_company = defaultdict(
-            lambda: defaultdict(list)
+        # We first want to match with projects that have both start and end dates,
+        # then with projects that have only a start date,
+        # and finally with projects that have no dates.
+        self.projects_for_matching: List[Project] = (
+            [project for project in projects if project.start_date and project.end_date]
+            + [
+                project
+                for project in projects
+                if project.start_date and not project.end_date
+            ]
+            + [
+                project
+                for project in projects
+                if not project.start_date and not project.end_date
+            ]
         )
+        # normalized names and aliases to the projects they match
+        projects_for_normalized_name: Dict[str, List[Project]] = defaultdict(list)
+        for project in self.projects_for_matching:
+            for normalized_name in names_of_project(project):
+                projects_for_normalized_name[normalized_name].append(project)
+        self.intervals_for_normalized_name: Dict[str, ProjectIntervals] = {
+            normalized_name: ProjectIntervals(projects)
+            for normalized_name, projects in projects_for_normalized_name.items()
+        }
 
-    def populate_projects_for_normalized_name_per_company(self, company: Company):
+    def is_current(self, company: Company, data_version: int) -> bool:
+        # a company with the same id can be another one in another database,
+        # such as in tests
+        return (
+            self.data_version == data_version
+            and self.company.created == company.created
+        )
+
+    def add_project(self, project: Project):
+        self.projects_for_matching.append(project)
+        for normalized_name in names_of_project(project):
+            intervals = self.intervals_for_normalized_name.get(normalized_name)
+            projects = intervals.projects if intervals else []
+            # replaced at once, for threads reading the index
+            self.intervals_for_normalized_name[normalized_name] = ProjectIntervals(
+                projects + [project]
+            )
+
+    def find(self, name: str, date: Union[datetime.date, None]) -> Optional[Project]:
+        intervals = self.intervals_for_normalized_name.get(
+            parse_summary(name).normalized_name
+        )
+        if intervals is None:
+            return None
+        return intervals.find(date)
+
+    def create_project(self, name: str, date: Union[datetime.date, None]) -> Project:
         """
-        Populate the projects_for_normalized_name_per_company dictionary for a given company.
+        Create a project without dates for a name that matches no project. It
+        may have been created by another process since the index was built.
         """
-        for project in self.get_projects_for_matching(company):
-            # Add project under its own normalized name
-            normalized_name = normalize_name(project.name)
-            self.projects_for_normalized_name_per_company[company][
-                normalized_name
-            ].append(project)
-
-            # Add project under each of its aliases' normalized names
-            for alias in project.aliases.all():
-                normalized_alias = normalize_name(alias.name)
-                self.projects_for_normalized_name_per_company[company][
-                    normalized_alias
-                ].append(project)
-
-    def get_project_names_for_company(self, company: Company):
-        if company in self.sorted_names_per_company:
-            return self.sorted_names_per_company[company]
-
-        self.sorted_names_per_company[company] = []
-        self.sorted_projects_pks_per_company[company] = []
-        for project in self.all_projects:
-            if project.company != company:
-                continue
-            for names in [project.lowercase_name] + [
-                alias.lowercase_name for alias in project.aliases.all()
-            ]:
-                self.sorted_names_per_company[company] += names
-                self.sorted_projects_pks_per_company[company] += [project.pk] * len(
-                    names
-                )
-
-        # sort by name
-        self.sorted_projects_pks_per_company[company] = [
-            project_pk
-            for _, project_pk in sorted(
-                zip(
-                    self.sorted_names_per_company[company],
-                    self.sorted_projects_pks_per_company[company],
-                )
+        with self.lock:
+            project = self.find(name, date)
+            if project is not None:
+                return project
+            project = Project.objects.filter(
+                company=self.company,
+                lowercase_name=normalize_name(name),
+                start_date__isnull=True,
+                is_forecast=False,
+            ).first() or Project.objects.create(name=name, company=self.company)
+            prefetch_related_objects([project], "aliases")
+            self.add_project(project)
+            return project
+
+    def create_projects(self, projects: List[Project]) -> List[Project]:
+        """
+        Create projects without dates at once, without the queries of their save
+        method. Those created by another process in the meantime are kept. If
+        they cannot be created at once, they are created one by one, and those
+        which cannot be created are reported and left unsaved.
+        """
+        with self.lock:
+            try:
+                with transaction.atomic():
+                    Project.objects.bulk_create(projects, ignore_conflicts=True)
+            except DatabaseError:
+                for project in projects:
+                    try:
+                        with transaction.atomic():
+                            Project.objects.bulk_create(
+                                [project], ignore_conflicts=True
+                            )
+                    except DatabaseError as e:
+                        print(
+                            f"Could not create project {project.name!r} for company "
+                            f"{self.company.pk}: {e!r}"
+                        )
+            created = list(
+                Project.objects.filter(
+                    company=self.company,
+                    name__in=[project.name for project in projects],
+                    start_date__isnull=True,
+                    is_forecast=False,
+                ).prefetch_related("aliases")
             )
-        ]
+            for project in created:
+                if self.find(project.name, None) is None:
+                    self.add_project(project)
+            return created
+
+
+def names_of_project(project: Project) -> List[str]:
+    return [project.lowercase_name] + [
+        alias.lowercase_name for alias in project.aliases.all()
+    ]
 
-        return self.sorted_names_per_company[company]
 
-    def get_projects_for_matching(self, company: Company):
+# indexes of the projects of each company, by company id
+company_projects_per_id: Dict[int, CompanyProjects] = {}
+
+
+def get_company_projects(company: Company) -> CompanyProjects:
+    """
+    Index of the projects of a company, built again if its projects changed.
+    """
+    # read before the projects, so that the index is built again if they change
+    # while they are loaded
+    data_version = get_data_version(company.pk)
+    company_projects = company_projects_per_id.get(company.pk)
+    if company_projects is None or not company_projects.is_current(
+        company, data_version
+    ):
+        company_projects = CompanyProjects(company, data_version)
+        company_projects_per_id[company.pk] = company_projects
+    return company_projects
+
+
+class ProjectFinder:
+    """
+    Finds the projects of event names. The data version of each company is read
+    once per project finder, so a new one should be used for each request or
+    command, and projects are only loaded again when they changed.
+
+    With defer_creation, names that match no project get unsaved projects, which
+    create_pending_projects then creates at once.
+    """
+
+    def __init__(self, defer_creation: bool = False):
+        self.company_projects_per_id: Dict[int, CompanyProjects] = {}
+        self.defer_creation = defer_creation
+        # unsaved projects, by company id and normalized name
+        self.pending_projects: Dict[int, Dict[str, Project]] = defaultdict(dict)
+
+    def company_projects(self, company: Company) -> CompanyProjects:
+        if company.pk not in self.company_projects_per_id:
+            self.company_projects_per_id[company.pk] = get_company_projects(company)
+        return self.company_projects_per_id[company.pk]
+
+    def get_projects_for_matching(self, company: Company) -> List[Project]:
         """
         We first want to match with projects that have both start and end dates,
         then with projects that have only a start date,
         and finally with projects that have no dates.
         """
-        if company in self.projects_for_matching_per_company:
-            return self.projects_for_matching_per_company[company]
-
-        def filter_projects_by_company(projects, company):
-            return [project for project in projects if project.company == company]
-
-        to_return = (
-            filter_projects_by_company(self.projects_with_dates, company)
-            + filter_projects_by_company(self.project_with_only_start_date, company)
-            + filter_projects_by_company(self.project_without_dates, company)
-        )
-        self.projects_for_matching_per_company[company] = to_return
-        return to_return
+        return self.company_projects(company).projects_for_matching
 
-    def create_project(self, name: str, company: Company):
-        name = name.strip()
-        if not is_full_uppercase(name):
-            name = name.title()
-
-        project = Project.objects.create(name=name, company=company)
-        self.project_without_dates.append(project)
-        self.projects_for_matching_per_company[company].append(project)
-        self.projects_for_normalized_name_per_company[company][
-            normalize_name(name)
-        ].append(project)
-        return project
+    def create_project(
+        self, name: str, company: Company, date: Union[datetime.date, None] = None
+    ):
+        return self.company_projects(company).create_project(clean_name(name), date)
 
     def get_project(
         self, name: str, company: Company, date: Union[datetime.date, None]
     ):
         """
-        Find a project by name, company, and date using the projects_for_normalized_name_per_company dictionary.
-        This method is much faster as it uses direct dictionary lookup and pre-filters by company.
+        Find a project by name, company, and date, using the index of the
+        projects of the company by normalized name.
         """
-        if not len(self.projects_for_normalized_name_per_company[company]):
-            self.populate_projects_for_normalized_name_per_company(company)
-        name = name.strip()
-        if not is_full_uppercase(name):
-            name = name.title()
-
         # Convert datetime to date if needed
         if isinstance(date, datetime.datetime):
             date = date.date()
 
-        # Get the normalized name for lookup
-        normalized_name = normalize_name(name)
-
-        # Look up projects with this normalized name for this company
-        candidate_projects = self.projects_for_normalized_name_per_company.get(
-            company, {}
-        ).get(normalized_name, [])
-
-        # Filter projects by date
-        for project in candidate_projects:
-            if self.project_corresponds(project, name, date):
-                return project
+        project = self.company_projects(company).find(name, date)
+        if project is not None:
+            return project
 
         # No matching project found, create a new one
-        return self.create_project(name, company)
-
-    @staticmethod
-    def project_corresponds(project, name, date) -> bool:
-        # reject if date does not correspond
-        if project.start_date and project.start_date > date:
-            return False
-        if project.end_date and project.end_date < date:
-            return False
-
-        # name corresponds
-        names = [project.lowercase_name] + [
-            alias.lowercase_name for alias in project.aliases.all()
-        ]
+        if self.defer_creation:
+            return self.pending_project(name, company)
+        return self.create_project(name, company, date)
+
+    def pending_project(self, name: str, company: Company) -> Project:
+        pending_projects = self.pending_projects[company.pk]
+        name = clean_name(name)
         normalized_name = normalize_name(name)
-        for project_name in names:
-            if project_name == normalized_name:
-                return True
+        if normalized_name not in pending_projects:
+            pending_projects[normalized_name] = Project(
+                name=name, company=company, lowercase_name=normalized_name
+            )
+        return pending_projects[normalized_name]
+
+    def create_pending_projects(self) -> List[Project]:
+        """Create the pending projects, with three queries per company."""
+        created = []
+        for company_id, pending_projects in self.pending_projects.items():
+            created += self.company_projects_per_id[company_id].create_projects(
+                list(pending_projects.values())
+            )
+        self.pending_projects.clear()
+        return created
 
     def by_company(self, company: Company) -> Dict[str, Any]:
         to_return: Dict[str, Any] = {}
@@ -174,5 +337,13 @@ class ProjectFinder:
         return to_return
 
 
+def clean_name(name: str) -> str:
+    """Name of a project created for an event name."""
+    name = name.strip()
+    if not is_full_uppercase(name):
+        name = name.title()
+    return name
+
+
 def is_full_uppercase(name: str) -> bool:
     return name == name.upper()
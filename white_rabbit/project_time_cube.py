@@ -0,0 +1,275 @@
+"""
+Time spent by the employees of a company on each project or category on each
+day before this year, held by each worker with its cumulative sums along the
+days, so that the time spent during any period is the difference of two sums.
+
+A cube is built from the daily project times saved by hydrate_cache, and built
+again when they are saved again, or when the projects of the company or the day
+settings of its employees change.
+"""
+
+import datetime
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+from django.db.models import Min, Sum
+
+from white_rabbit.aggregation import new_project_times
+from white_rabbit.cache_keys import get_data_versions
+from white_rabbit.daily_project_times import (
+    daily_project_times_saved_at,
+    employees_with_current_daily_project_times,
+)
+from white_rabbit.models import Company, DailyProjectTime, Employee
+from white_rabbit.typing import ProjectTime
+from white_rabbit.utils import Period, period_day_ranges
+
+# first and last ordinals of the days of a range, included
+DayRange = Tuple[int, int]
+
+
+class Series(NamedTuple):
+    """
+    Days (ordinals, sorted) with time spent on an identifier or a detail, the
+    position of the first event of each day, and the time spent on each day and
+    its cumulative sums, which start from 0.
+    """
+
+    days: np.ndarray
+    positions: np.ndarray
+    durations: np.ndarray
+    cumulative_durations: np.ndarray
+
+    @classmethod
+    def from_days(cls, days, positions, durations) -> "Series":
+        durations = np.asarray(durations, dtype=float)
+        return cls(
+            np.asarray(days, dtype=np.int64),
+            np.asarray(positions, dtype=np.int64),
+            durations,
+            np.concatenate(([0.0], np.cumsum(durations))),
+        )
+
+    @classmethod
+    def merge(cls, series: List["Series"]) -> "Series":
+        """Series of the time spent on all the series."""
+        days, inverse = np.unique(
+            np.concatenate([item.days for item in series]), return_inverse=True
+        )
+        positions = np.full(len(days), np.iinfo(np.int64).max)
+        np.minimum.at(
+            positions, inverse, np.concatenate([item.positions for item in series])
+        )
+        durations = np.bincount(
+            inverse, weights=np.concatenate([item.durations for item in series])
+        )
+        return cls.from_days(days, positions, durations)
+
+    def index_ranges(self, day_ranges: List[DayRange]) -> List[Tuple[int, int]]:
+        return [
+            (
+                int(np.searchsorted(self.days, first)),
+                int(np.searchsorted(self.days, last, side="right")),
+            )
+            for first, last in day_ranges
+        ]
+
+    def first_event(self, index_ranges: List[Tuple[int, int]]) -> Optional[tuple]:
+        """(day, position) of the first event in the index ranges, if any."""
+        for start, stop in index_ranges:
+            if start < stop:
+                return int(self.days[start]), int(self.positions[start])
+        return None
+
+    def duration(self, index_ranges: List[Tuple[int, int]]) -> float:
+        return sum(
+            float(self.cumulative_durations[stop] - self.cumulative_durations[start])
+            for start, stop in index_ranges
+        )
+
+
+# series of an identifier, and series of each of its details
+IdentifierSeries = Tuple[Series, Dict[Hashable, Series]]
+
+
+def in_order_of_first_event(
+    series_per_key: Dict[Hashable, Series], day_ranges: List[DayRange]
+) -> List[Tuple[Hashable, List[Tuple[int, int]]]]:
+    """
+    Keys whose series have events in the day ranges, with their index ranges, in
+    the order in which they first appear, as in aggregate.
+    """
+    found = []
+    for key, series in series_per_key.items():
+        index_ranges = series.index_ranges(day_ranges)
+        first_event = series.first_event(index_ranges)
+        if first_event is not None:
+            found.append((first_event, key, index_ranges))
+    found.sort(key=itemgetter(0))
+    return [(key, index_ranges) for _, key, index_ranges in found]
+
+
+def project_times_between(
+    series_per_identifier: Dict[Hashable, IdentifierSeries],
+    employee: Employee,
+    day_ranges: List[DayRange],
+) -> Dict[Union[str, int], ProjectTime]:
+    total = new_project_times()
+    for identifier, index_ranges in in_order_of_first_event(
+        {
+            identifier: series
+            for identifier, (series, _) in series_per_identifier.items()
+        },
+        day_ranges,
+    ):
+        series, details = series_per_identifier[identifier]
+        project_time = total[identifier]
+        project_time["duration"] = series.duration(index_ranges)
+        for start, stop in index_ranges:
+            project_time["events"] += [
+                {
+                    "employee": employee.name,
+                    "date": datetime.date.fromordinal(day),
+                    "duration": duration,
+                }
+                for day, duration in zip(
+                    series.days[start:stop].tolist(),
+                    series.durations[start:stop].tolist(),
+                )
+            ]
+        for detail, detail_ranges in in_order_of_first_event(details, day_ranges):
+            project_time["subprojects"][detail]["duration"] = details[detail].duration(
+                detail_ranges
+            )
+    return total
+
+
+class ProjectTimeCube:
+    """
+    Time spent by employees on each identifier (project or category) and each of
+    its details (subproject or project) on each day before end. Days from which
+    some events are not done yet are not in the cube, so that all its events are
+    done.
+
+    end is at most the start of the current year. Days of this year are left to
+    the events: web workers refresh calendars between two hydrate_cache runs,
+    so that the daily project times of recent days can be outdated. Periods of
+    this year are therefore still aggregated from the events of their days, and
+    only periods reaching into past years are faster.
+    """
+
+    def __init__(self, key: tuple, employees: List[Employee]):
+        self.key = key
+        self.employees_by_id = {employee.pk: employee for employee in employees}
+        today = datetime.date.today()
+        start_of_year = datetime.date(today.year, 1, 1)
+        first_day_not_done = DailyProjectTime.objects.filter(
+            employee__in=self.employees_by_id.keys(),
+            day__lt=start_of_year,
+            end_day__gte=today,
+        ).aggregate(day=Min("day"))["day"]
+        self.end = min(start_of_year, first_day_not_done or start_of_year)
+        self.series_per_group_by: Dict[str, Dict[int, Dict]] = {}
+
+    def series(self, group_by: str) -> Dict[int, Dict[Hashable, IdentifierSeries]]:
+        """Series of each identifier of each employee, by employee id."""
+        if group_by not in self.series_per_group_by:
+            self.series_per_group_by[group_by] = self.build_series(group_by)
+        return self.series_per_group_by[group_by]
+
+    def build_series(
+        self, group_by: str
+    ) -> Dict[int, Dict[Hashable, IdentifierSeries]]:
+        identifier_field, detail_field = (
+            ("project_id", "subproject_name")
+            if group_by == "project"
+            else ("category", "project_id")
+        )
+        rows = (
+            DailyProjectTime.objects.filter(
+                employee__in=self.employees_by_id.keys(), day__lt=self.end
+            )
+            .values_list("employee_id", identifier_field, detail_field, "day")
+            .annotate(total_fraction=Sum("fraction"), first_position=Min("position"))
+            .order_by("employee_id", identifier_field, detail_field, "day")
+        )
+        series_per_employee = {}
+        for (employee_id, identifier), identifier_rows in groupby(
+            rows.iterator(), key=itemgetter(0, 1)
+        ):
+            details = {
+                detail: Series.from_days(
+                    *zip(
+                        *(
+                            (day.toordinal(), position, fraction)
+                            for _, _, _, day, fraction, position in detail_rows
+                        )
+                    )
+                )
+                for detail, detail_rows in groupby(identifier_rows, key=itemgetter(2))
+            }
+            series_per_employee.setdefault(employee_id, {})[identifier] = (
+                Series.merge(list(details.values())),
+                details,
+            )
+        return series_per_employee
+
+    def projects_for_period(
+        self,
+        employees: List[Employee],
+        period: Period,
+        time_period: Union[str, None],
+        group_by: str = "project",
+    ) -> Dict[Employee, Dict[Union[str, int], ProjectTime]]:
+        """
+        Same as EmployeeEvents.projects_for_time_period for the days before end,
+        for the employees of the cube.
+        """
+        day_ranges = period_day_ranges(period.get("start"), time_period, period["key"])
+        if day_ranges is None:
+            day_ranges = [(datetime.date.min, datetime.date.max)]
+        if period["key"].endswith("todo"):
+            # all the events of the cube are done
+            day_ranges = []
+        last_day = self.end.toordinal() - 1
+        ordinal_ranges = [
+            (start.toordinal(), min(end.toordinal(), last_day))
+            for start, end in day_ranges
+            if start.toordinal() <= last_day
+        ]
+        series_per_employee = self.series(group_by)
+        return {
+            employee: project_times_between(
+                series_per_employee.get(employee.pk, {}), employee, ordinal_ranges
+            )
+            for employee in employees
+            if employee.pk in self.employees_by_id
+        }
+
+
+cube_per_company_id: Dict[int, ProjectTimeCube] = {}
+
+
+def get_project_time_cube(company: Company) -> ProjectTimeCube:
+    """
+    Cube of the employees of a company whose daily project times are current,
+    built again if their times changed.
+    """
+    employees = list(company.employees.filter(start_time_tracking_from__isnull=False))
+    data_versions = get_data_versions([company.pk])
+    current_employees = employees_with_current_daily_project_times(
+        employees, data_versions
+    )
+    key = (
+        data_versions[company.pk],
+        daily_project_times_saved_at(company.pk),
+        frozenset(employee.pk for employee in current_employees),
+        datetime.date.today().year,
+    )
+    cube = cube_per_company_id.get(company.pk)
+    if cube is None or cube.key != key:
+        cube = ProjectTimeCube(key, current_employees)
+        cube_per_company_id[company.pk] = cube
+    return cube
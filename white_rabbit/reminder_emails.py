@@ -0,0 +1,106 @@
+import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+import html2text
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+from django.template.loader import render_to_string
+
+from white_rabbit.models import Employee
+from white_rabbit.settings import (
+    REMINDER_EMAIL_BACKOFF,
+    REMINDER_EMAIL_BATCH_SIZE,
+    REMINDER_EMAIL_RENDER_WORKERS,
+    REMINDER_EMAIL_RETRIES,
+)
+
+REMINDER_SUBJECT = "[Lapin Blanc]: Des jours manquants à remplir"
+REMINDER_FROM_EMAIL = "contact@telescoop.fr"
+
+
+def missing_days_email(
+    employee: Employee, missing_days: List[Tuple]
+) -> EmailMultiAlternatives:
+    html_message = render_to_string(
+        "email/missing_days_reminder.html",
+        {"days": missing_days, "current_year": datetime.date.today().year},
+    )
+    message = EmailMultiAlternatives(
+        REMINDER_SUBJECT,
+        html2text.html2text(html_message),
+        REMINDER_FROM_EMAIL,
+        [employee.user.email],
+    )
+    message.attach_alternative(html_message, "text/html")
+    return message
+
+
+def render_missing_days_emails(
+    missing_days_per_employee: Dict[Employee, List[Tuple]],
+) -> List[EmailMultiAlternatives]:
+    """Emails of the missing days of the employees, rendered concurrently."""
+    with ThreadPoolExecutor(max_workers=REMINDER_EMAIL_RENDER_WORKERS) as executor:
+        return list(
+            executor.map(
+                missing_days_email,
+                missing_days_per_employee.keys(),
+                missing_days_per_employee.values(),
+            )
+        )
+
+
+def send_with_retries(
+    message: EmailMultiAlternatives, connection: BaseEmailBackend, retries: int
+) -> bool:
+    """
+    Send message over the open connection, trying again over a new connection
+    with an exponential backoff if it fails. Returns whether it was sent.
+    """
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(REMINDER_EMAIL_BACKOFF * 2 ** (attempt - 1))
+        try:
+            if attempt:
+                connection.close()
+                connection.open()
+            if connection.send_messages([message]):
+                return True
+        except Exception as e:
+            print(f"Error sending email to {', '.join(message.to)} ({attempt=}): {e!r}")
+    return False
+
+
+def send_in_batches(
+    messages: List[EmailMultiAlternatives],
+    connection: BaseEmailBackend,
+    batch_size: int = REMINDER_EMAIL_BATCH_SIZE,
+    retries: int = REMINDER_EMAIL_RETRIES,
+) -> List[EmailMultiAlternatives]:
+    """
+    Send messages over the connection, opened once for each batch of batch_size
+    messages. Returns the messages which could not be sent, including whole
+    batches for which the connection could not be opened.
+    """
+    failed = []
+    for batch_start in range(0, len(messages), batch_size):
+        batch = messages[batch_start : batch_start + batch_size]
+        try:
+            connection.open()
+        except Exception as e:
+            print(f"Error opening connection for {len(batch)} emails: {e!r}")
+            failed += batch
+            continue
+        try:
+            failed += [
+                message
+                for message in batch
+                if not send_with_retries(message, connection, retries)
+            ]
+        finally:
+            try:
+                connection.close()
+            except Exception as e:
+                print(f"Error closing connection: {e!r}")
+    return failed
@@ -7,8 +7,9 @@ from ..utils import generate_time_periods
 class ForecastService:
     """Service for handling forecast project operations"""
 
-    def __init__(self, time_period: str):
+    def __init__(self, time_period: str, n_periods: int = 12):
         self.time_period = time_period
+        self.n_periods = n_periods
 
     def get_forecast_projects_for_company(self, company):
         """Get all forecast projects for a company with required dates"""
@@ -89,7 +90,7 @@ class ForecastService:
         self, user, employees, projects_per_period, availability
     ):
         """Add forecast projects to the data structure using EmployeeForecastAssignment"""
-        periods_list = list(generate_time_periods(12, self.time_period))
+        periods_list = list(generate_time_periods(self.n_periods, self.time_period))
         assignments = self.get_assignments_for_company(user.employee.company)
 
         for assignment in assignments:
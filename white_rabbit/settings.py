@@ -41,16 +41,63 @@ else:
     ALLOWED_HOSTS = config.getlist("security.allowed_hosts")
     CSRF_TRUSTED_ORIGINS = [f"https://{host}" for host in ALLOWED_HOSTS]
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
-        "LOCATION": BASE_DIR / "cache_file",  # A unique identifier for the cache
+# "sqlite" for a single SQLite database, "file" for a file per key
+CACHE_BACKEND = config.getstr("cache.backend", "sqlite")
+# data versions and dates of saved project times, two keys per company, are
+# written without expiry and only removed when the cache is culled, which
+# removes the keys written the longest ago. Calendars, one key per employee,
+# and markers of saved occurrences, one per employee and data version, expire.
+# The limit is far above these keys, so that culling never removes a version.
+CACHE_MAX_ENTRIES = config.getint("cache.max_entries", 20000)
+if CACHE_BACKEND == "file":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": BASE_DIR / "cache_file",  # A unique identifier for the cache
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "white_rabbit.sqlite_cache.SQLiteCache",
+            "LOCATION": config.getstr(
+                "cache.location", str(BASE_DIR / "cache.sqlite3")
+            ),
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
     }
-}
 if IS_LOCAL_DEV:
     DEFAULT_CACHE_DURATION = 60 * 60 * 24
 else:
     DEFAULT_CACHE_DURATION = 660  # in seconds, so 11 minutes
+# how long events older than DEFAULT_CACHE_DURATION can still be displayed while
+# they are refreshed in the background, 0 to always wait for fresh events
+STALE_CACHE_DURATION = config.getint("cache.stale_duration", 60 * 60 * 24 * 7)
+
+# download of employees ical calendars
+CALENDAR_FETCH_TIMEOUT = config.getfloat("calendar_fetch.timeout", 15.0)  # in seconds
+CALENDAR_FETCH_RETRIES = config.getint("calendar_fetch.retries", 2)
+CALENDAR_FETCH_BACKOFF = config.getfloat("calendar_fetch.backoff", 1.0)  # in seconds
+CALENDAR_FETCH_CONCURRENCY_PER_HOST = config.getint(
+    "calendar_fetch.concurrency_per_host", 10
+)
+
+# locks shared by processes, so that a calendar is refreshed by one of them at a time
+LOCKS_DIR = BASE_DIR / "locks"
+# how long to wait for another process refreshing a calendar, in seconds
+CALENDAR_LOCK_TIMEOUT = config.getfloat("calendar_fetch.lock_timeout", 30.0)
+
+# number of processes parsing calendars in hydrate_cache
+HYDRATE_CACHE_PARSE_WORKERS = config.getint(
+    "hydrate_cache.parse_workers", os.cpu_count() or 1
+)
+
+# reminder emails of send_email_reminders, sent over one connection per batch
+REMINDER_EMAIL_RENDER_WORKERS = config.getint("reminder_email.render_workers", 4)
+REMINDER_EMAIL_BATCH_SIZE = config.getint("reminder_email.batch_size", 50)
+REMINDER_EMAIL_RETRIES = config.getint("reminder_email.retries", 2)
+REMINDER_EMAIL_BACKOFF = config.getfloat("reminder_email.backoff", 1.0)  # in seconds
 
 if DEBUG:
     ENVIRONMENT = "development"
@@ -112,6 +159,7 @@ TEMPLATES = [
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
                 "white_rabbit.context_processors.user_is_staff",
+                "white_rabbit.context_processors.events_fetched_at",
             ],
         },
     },
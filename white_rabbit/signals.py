@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from white_rabbit.cache_keys import bump_data_version
+from white_rabbit.models import Alias, Category, ForecastProject, Project
+
+# fields of projects used to read events
+EVENT_FIELDS = {
+    "name",
+    "lowercase_name",
+    "company",
+    "start_date",
+    "end_date",
+    "category",
+}
+
+
+@receiver(post_save, sender=Project)
+@receiver(post_save, sender=ForecastProject)
+def project_saved(sender, instance: Project, update_fields=None, raw=False, **kwargs):
+    # projects created at once for unknown names by hydrate_cache are created
+    # with bulk_create, which sends no signal
+    if raw or (update_fields is not None and not EVENT_FIELDS & set(update_fields)):
+        return
+    bump_data_version(instance.company_id)
+
+
+@receiver(post_delete, sender=Project)
+@receiver(post_delete, sender=ForecastProject)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def project_or_category_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_data_version(instance.company_id)
+
+
+@receiver(post_save, sender=Alias)
+@receiver(post_delete, sender=Alias)
+def alias_changed(sender, instance: Alias, raw=False, **kwargs):
+    if not raw:
+        bump_data_version(instance.project.company_id)
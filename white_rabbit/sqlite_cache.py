@@ -0,0 +1,234 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+# maximum number of keys in a query, below the SQLite limit on variables
+MAX_KEYS_PER_QUERY = 900
+# default number of keys written between two counts of the keys to cull
+DEFAULT_CULL_EVERY = 100
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache stored in a single SQLite database in WAL mode, so that reading never
+    waits for a process writing. Values are pickled into blobs. get_many reads
+    all the keys with a query and set_many writes them in a single transaction.
+    Keys are counted to be culled every CULL_EVERY keys written by a process.
+
+    Usage:
+        CACHES = {
+            "default": {
+                "BACKEND": "white_rabbit.sqlite_cache.SQLiteCache",
+                "LOCATION": "/path/to/cache.sqlite3",
+                "OPTIONS": {"MAX_ENTRIES": 20000, "CULL_EVERY": 100},
+            }
+        }
+    """
+
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = os.path.abspath(location)
+        self._local = threading.local()
+        self._cull_every = params.get("OPTIONS", {}).get(
+            "CULL_EVERY", DEFAULT_CULL_EVERY
+        )
+        self._written_since_cull = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # one connection per thread, opened again in forked processes
+        connection = getattr(self._local, "connection", None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        os.makedirs(os.path.dirname(self._path), exist_ok=True)
+        connection = sqlite3.connect(self._path, timeout=30, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS cache "
+            "(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)"
+        )
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys: Iterable[str], version=None) -> Dict[str, Any]:
+        keys_by_cache_key = {
+            self.make_and_validate_key(key, version=version): key for key in keys
+        }
+        cache_keys = list(keys_by_cache_key)
+        connection = self._connection()
+        now = time.time()
+        values = {}
+        for start in range(0, len(cache_keys), MAX_KEYS_PER_QUERY):
+            batch = cache_keys[start : start + MAX_KEYS_PER_QUERY]
+            rows = connection.execute(
+                f"SELECT key, value FROM cache WHERE key IN "
+                f"({', '.join('?' * len(batch))}) "
+                f"AND (expires IS NULL OR expires > ?)",
+                (*batch, now),
+            )
+            for cache_key, value in rows:
+                values[keys_by_cache_key[cache_key]] = pickle.loads(value)
+        return values
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(
+        self, data: Dict[str, Any], timeout=DEFAULT_TIMEOUT, version=None
+    ) -> List[str]:
+        expires = self.get_backend_timeout(timeout)
+        rows = [
+            (
+                self.make_and_validate_key(key, version=version),
+                pickle.dumps(value, self.pickle_protocol),
+                expires,
+            )
+            for key, value in data.items()
+        ]
+        with self._transaction() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._cull(connection, len(rows))
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        with self._transaction() as connection:
+            connection.execute(
+                "DELETE FROM cache WHERE key = ? AND expires <= ?", (key, time.time())
+            )
+            added = connection.execute(
+                "INSERT OR IGNORE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                (
+                    key,
+                    pickle.dumps(value, self.pickle_protocol),
+                    self.get_backend_timeout(timeout),
+                ),
+            ).rowcount
+            if added:
+                self._cull(connection, added)
+        return bool(added)
+
+    def incr(self, key, delta=1, version=None):
+        """Add delta to the value of key in a transaction, so that none is lost."""
+        cache_key = self.make_and_validate_key(key, version=version)
+        with self._transaction() as connection:
+            row = connection.execute(
+                "SELECT value FROM cache WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)",
+                (cache_key, time.time()),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                "UPDATE cache SET value = ? WHERE key = ?",
+                (pickle.dumps(value, self.pickle_protocol), cache_key),
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        return bool(
+            self._connection()
+            .execute(
+                "UPDATE cache SET expires = ? WHERE key = ? "
+                "AND (expires IS NULL OR expires > ?)",
+                (self.get_backend_timeout(timeout), key, time.time()),
+            )
+            .rowcount
+        )
+
+    def has_key(self, key, version=None) -> bool:
+        key = self.make_and_validate_key(key, version=version)
+        row = (
+            self._connection()
+            .execute(
+                "SELECT 1 FROM cache WHERE key = ? AND (expires IS NULL OR expires > ?)",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return row is not None
+
+    def delete(self, key, version=None) -> bool:
+        return self._delete_many([self.make_and_validate_key(key, version=version)])
+
+    def delete_many(self, keys: Iterable[str], version=None):
+        self._delete_many(
+            [self.make_and_validate_key(key, version=version) for key in keys]
+        )
+
+    def _delete_many(self, cache_keys: List[str]) -> bool:
+        deleted = 0
+        with self._transaction() as connection:
+            for start in range(0, len(cache_keys), MAX_KEYS_PER_QUERY):
+                batch = cache_keys[start : start + MAX_KEYS_PER_QUERY]
+                deleted += connection.execute(
+                    f"DELETE FROM cache WHERE key IN ({', '.join('?' * len(batch))})",
+                    batch,
+                ).rowcount
+        return bool(deleted)
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache")
+
+    def _cull(self, connection: sqlite3.Connection, n_written: int):
+        """
+        Every cull_every keys written, if there are more than max_entries keys,
+        remove the expired ones, then if needed 1/cull_frequency of the keys,
+        those written the longest ago.
+        """
+        # counting the keys reads the whole table, so it is not done on each write
+        self._written_since_cull += n_written
+        if self._written_since_cull < self._cull_every:
+            return
+        self._written_since_cull = 0
+        if self._count(connection) <= self._max_entries:
+            return
+        # uses the index on expires
+        connection.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        count = self._count(connection)
+        if count <= self._max_entries:
+            return
+        if self._cull_frequency == 0:
+            connection.execute("DELETE FROM cache")
+            return
+        # replaced keys get a new rowid, so the smallest are the oldest writes
+        connection.execute(
+            "DELETE FROM cache WHERE rowid IN "
+            "(SELECT rowid FROM cache ORDER BY rowid LIMIT ?)",
+            (count // self._cull_frequency,),
+        )
+
+    @staticmethod
+    def _count(connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
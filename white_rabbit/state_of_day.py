@@ -1,13 +1,14 @@
 import datetime
 from collections import defaultdict
 from datetime import date
-from typing import Dict, Any, Iterable, DefaultDict
+from typing import Dict, Any, Iterable, List, Tuple
 
 from white_rabbit.constants import DayState, DayStateDisplay
 
 from white_rabbit.models import Employee
 from white_rabbit.typing import EventsPerEmployee, Event
-from white_rabbit.utils import events_per_day
+from white_rabbit.utils import events_between, events_per_day, group_events_by_day
+from white_rabbit.working_days import working_days
 
 
 def state_of_days_per_employee(
@@ -40,30 +41,6 @@ def state_of_days_per_employee(
     return dict(to_return)
 
 
-def state_of_days(
-    employee: Employee,
-    events: Iterable[Event],
-    start_datetime: date,
-    end_datetime: date,
-) -> Dict[datetime.date, Dict[str, Any]]:
-    """
-    Returns a dict date -> (employee -> state of day) for each
-    combination, including days without events.
-    """
-    to_return: DefaultDict[datetime.date, Dict[str, Any]] = defaultdict()
-    per_day_events = events_per_day(events, start_datetime, end_datetime)
-    for day, events_for_day in per_day_events.items():
-        to_return[day] = {
-            "state": state_of_day(events_for_day, employee=employee),
-            "display_state": state_of_day(
-                events_for_day, employee=employee, display=True
-            ),
-            "events": events_for_day,
-        }
-
-    return dict(to_return)
-
-
 def state_of_days_per_employee_for_week(
     events_per_employee: EventsPerEmployee,
     day: datetime.date = None,
@@ -82,34 +59,57 @@ def state_of_days_per_employee_for_week(
     return to_return
 
 
-def state_of_days_for_week(
-    events: Iterable[Event], employee: Employee, day: datetime.date = None
-) -> Dict[datetime.date, Dict[str, Any]]:
-    if day is None:
-        day = datetime.date.today()
-    start_of_week = day - datetime.timedelta(days=day.weekday())
-    end_of_week = start_of_week + datetime.timedelta(days=6)
-    return state_of_days(employee, events, start_of_week, end_of_week)
+def incomplete_working_days(
+    events: Iterable[Event], employee: Employee, start: date, end: date
+) -> List[Tuple[date, Dict[str, Any]]]:
+    """
+    Working days of employee from start to end (included) which are not
+    complete, with their state, found in one sweep over the events of the days.
+    """
+    events_of_days = group_events_by_day(events_between(events, start, end))
+    incomplete_days = []
+    for day in working_days(start, end, employee):
+        events_of_day = events_of_days.get(day, [])
+        state = state_of_day(events_of_day, employee=employee)
+        if state != DayState.complete:
+            display_state = state_of_day(events_of_day, employee=employee, display=True)
+            incomplete_days.append(
+                (
+                    day,
+                    {
+                        "state": state,
+                        "display_state": display_state,
+                        "events": events_of_day,
+                    },
+                )
+            )
+    return incomplete_days
 
 
-def state_of_day(events: Iterable[Event], employee: Employee, display=False) -> str:
-    """Returns the state of a day as a string."""
-    if not events:
-        if display:
-            return DayStateDisplay.empty
-        return DayState.empty
-    total_duration = sum(event["duration"] for event in events)
+def state_of_hours(total_duration: float, employee: Employee) -> str:
+    """State of a day whose events last total_duration hours."""
     if not total_duration:
-        if display:
-            return DayStateDisplay.empty
         return DayState.empty
     if total_duration < employee.min_working_hours_for_full_day:
-        if display:
-            return DayStateDisplay.incomplete.format(
-                total_duration,
-                float(employee.min_working_hours_for_full_day) - total_duration,
-            )
         return DayState.incomplete
-    if display:
-        return DayStateDisplay.complete.format(total_duration)
     return DayState.complete
+
+
+def display_state_of_hours(total_duration: float, employee: Employee) -> str:
+    state = state_of_hours(total_duration, employee)
+    if state == DayState.empty:
+        return DayStateDisplay.empty
+    if state == DayState.incomplete:
+        return DayStateDisplay.incomplete.format(
+            total_duration,
+            float(employee.min_working_hours_for_full_day) - total_duration,
+        )
+    return DayStateDisplay.complete.format(total_duration)
+
+
+def state_of_day(events: Iterable[Event], employee: Employee, display=False) -> str:
+    """Returns the state of a day as a string."""
+    total_duration = sum(event["duration"] for event in events)
+    if display:
+        return display_state_of_hours(total_duration, employee)
+    return state_of_hours(total_duration, employee)
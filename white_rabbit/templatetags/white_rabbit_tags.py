@@ -3,12 +3,14 @@ import json
 import numbers
 import locale
 
+from dateutil.relativedelta import relativedelta
 from django.template.defaultfilters import pluralize, floatformat
 from django.template.defaulttags import register
 
 from white_rabbit.constants import SEVERITY_COLORS
 from white_rabbit.models import PROJECT_CATEGORY_TO_DISPLAY_NAME, Category
 from white_rabbit.utils import is_total_key
+from white_rabbit.working_days import count_working_days
 
 
 @register.simple_tag
@@ -207,17 +209,10 @@ def floatval(value):
 def number_of_working_days_for_period_key(period_key: str):
     # period_key is MM-YYYY
     month, year = period_key.split("-")
-    month = int(month)
-    year = int(year)
-    n_days = 0
-    for day in range(1, 32):
-        try:
-            date = datetime.datetime(year, month, day)
-            if date.weekday() < 5:
-                n_days += 1
-        except ValueError:
-            continue
-    return n_days
+    start_of_month = datetime.date(int(year), int(month), 1)
+    return count_working_days(
+        start_of_month, start_of_month + relativedelta(months=1, days=-1)
+    )
 
 
 @register.filter
@@ -0,0 +1,175 @@
+import datetime
+import random
+from collections import defaultdict
+from decimal import Decimal
+
+from django.test import TestCase
+
+from white_rabbit.aggregation import full_day_threshold, projects_for_time_period
+from white_rabbit.event_store import EventStore
+from white_rabbit.tests.factory import EmployeeFactory
+from white_rabbit.utils import (
+    day_distribution,
+    filter_events_per_time_period,
+    generate_time_periods,
+    group_events_by_day,
+)
+
+PROJECTS = [
+    # project_id, project_name, category, name: two names for project 2
+    (1, "Alpha", "CLIENT", "Alpha"),
+    (2, "Beta", "CLIENT", "Beta"),
+    (2, "Beta", "CLIENT", "beta alias"),
+    (3, "Gamma", None, "Gamma"),
+    (4, "Internal", "INTERNE", "Internal"),
+]
+
+
+def random_events(seed: int, n_events: int = 1500):
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    timezone = datetime.timezone(datetime.timedelta(hours=1))
+    events = []
+    for _ in range(n_events):
+        day = today + datetime.timedelta(days=rng.randint(-500, 200))
+        project_id, project_name, category, name = rng.choice(PROJECTS)
+        if rng.random() < 0.05:
+            start = day
+            end = day + datetime.timedelta(days=rng.randint(1, 3))
+            duration = 8
+        else:
+            start = datetime.datetime.combine(
+                day, datetime.time(rng.randint(7, 18), rng.randrange(60)), timezone
+            )
+            # includes durations such as 6.3 hours, close to a full day
+            minutes = rng.choice([378, 360, 25, 7, rng.randint(1, 600)])
+            end = start + datetime.timedelta(minutes=minutes)
+            duration = min(minutes / 60, 8)
+        events.append(
+            {
+                "project_id": project_id,
+                "project_name": project_name,
+                "category": category,
+                "name": name,
+                "subproject_name": rng.choice([None, None, "dev", "design"]),
+                "start_datetime": start,
+                "end_datetime": end,
+                "duration": duration,
+            }
+        )
+    return events
+
+
+def reference_projects_for_time_period(
+    events, employee, timeperiod, timeperiod_type, period_key, group_by
+):
+    """Previous implementation, with a day_distribution call for each day."""
+    total = defaultdict(
+        lambda: {
+            "duration": 0.0,
+            "events": [],
+            "subprojects": defaultdict(lambda: {"duration": 0.0}),
+        }
+    )
+    filtered_events = filter_events_per_time_period(
+        events, timeperiod, timeperiod_type, period_key=period_key
+    )
+    for event_date, events_for_day in group_events_by_day(filtered_events).items():
+        distribution = day_distribution(
+            events_for_day, employee=employee, group_by=group_by
+        )
+        for identifier, data in distribution.items():
+            total[identifier]["duration"] += data["duration"]
+            total[identifier]["events"].append(
+                {
+                    "employee": employee.name,
+                    "date": event_date,
+                    "duration": data["duration"],
+                }
+            )
+            for detail_name, duration in data["details"].items():
+                total[identifier]["subprojects"][detail_name]["duration"] += duration
+    return total
+
+
+def periods():
+    for time_period in ["month", "week"]:
+        for direction in ["past", "future"]:
+            for period in generate_time_periods(30, time_period, direction):
+                yield period["start"], time_period, period["key"]
+    today = datetime.date.today()
+    for day in [today - datetime.timedelta(days=offset) for offset in range(0, 60, 7)]:
+        yield day, "day", day.strftime("%d-%m-%Y")
+    year = today.year
+    for start_year in [year - 1, year]:
+        yield datetime.date(start_year, 1, 1), "year", f"total-{start_year}"
+    for key in ["total", "total_done", "total_todo"]:
+        yield datetime.date(2020, 1, 1), None, key
+
+
+class TestAggregation(TestCase):
+    def assertSameProjectTimes(self, events, employee):
+        store = EventStore.from_events(events)
+        events = list(store)
+        for group_by in ["project", "category"]:
+            for timeperiod, timeperiod_type, period_key in periods():
+                args = (employee, timeperiod, timeperiod_type, period_key, group_by)
+                expected = reference_projects_for_time_period(events, *args)
+                for aggregated_events in [store, events]:
+                    result = projects_for_time_period(aggregated_events, *args)
+                    # same numbers, and also same order
+                    self.assertEqual(result, expected)
+                    self.assertEqual(list(result), list(expected))
+                    for identifier, project_time in result.items():
+                        self.assertEqual(
+                            list(project_time["subprojects"]),
+                            list(expected[identifier]["subprojects"]),
+                        )
+
+    def test_same_results_as_day_distribution(self):
+        employees = [
+            EmployeeFactory(),
+            EmployeeFactory(min_working_hours_for_full_day=Decimal("6.3")),
+            EmployeeFactory(default_day_working_hours=7, is_paid_hourly=True),
+        ]
+        for seed, employee in enumerate(employees):
+            with self.subTest(employee=employee.name):
+                self.assertSameProjectTimes(random_events(seed), employee)
+
+    def test_store_filtered_as_events(self):
+        events = random_events(0)
+        store = EventStore.from_events(events)
+        events = list(store)
+        year = datetime.date.today().year
+        # weeks whose number is shared by days at both ends of a year
+        edge_weeks = [
+            (datetime.date(year, 1, 1), "week", None),
+            (datetime.date(year, 12, 29), "week", None),
+            (datetime.date(year - 1, 1, 1), "week", None),
+        ]
+        for timeperiod, timeperiod_type, period_key in [*periods(), *edge_weeks]:
+            with self.subTest(timeperiod=timeperiod, period_key=period_key):
+                self.assertEqual(
+                    filter_events_per_time_period(
+                        store, timeperiod, timeperiod_type, period_key
+                    ),
+                    filter_events_per_time_period(
+                        events, timeperiod, timeperiod_type, period_key
+                    ),
+                )
+
+    def test_no_events(self):
+        employee = EmployeeFactory()
+        self.assertEqual(
+            projects_for_time_period(
+                EventStore(), employee, datetime.date(2024, 1, 1), "month", "01-2024"
+            ),
+            {},
+        )
+
+    def test_full_day_threshold(self):
+        hours = 378 / 60
+        self.assertLess(hours, Decimal("6.3"))
+        self.assertLess(hours, full_day_threshold(Decimal("6.3")))
+        self.assertEqual(full_day_threshold(Decimal("6.5")), 6.5)
+        self.assertEqual(full_day_threshold(6), 6.0)
@@ -0,0 +1,69 @@
+import datetime
+import random
+
+from django.test import TestCase
+
+from white_rabbit.available_time import BusyHours, available_time_of_employee
+from white_rabbit.event_store import EventStore, day_of
+from white_rabbit.tests.factory import EmployeeFactory
+from white_rabbit.tests.test_aggregation import random_events
+from white_rabbit.working_days import working_days
+
+
+def reference_available_time(employee, events, start, end):
+    """Previous implementation, looping over each day."""
+    availability = 0
+    for day in working_days(start, end, employee):
+        busy_duration = sum(
+            event["duration"]
+            for event in events
+            if day_of(event["start_datetime"]) == day
+        )
+        availability += (
+            max(employee.default_day_working_hours - busy_duration, 0)
+            / employee.default_day_working_hours
+        )
+    return availability
+
+
+class TestAvailableTime(TestCase):
+    def test_same_results_as_each_day(self):
+        employee = EmployeeFactory(works_day_5=False)
+        store = EventStore.from_events(random_events(0, n_events=500))
+        events = list(store)
+        today = datetime.date.today()
+        busy_hours = BusyHours(
+            employee,
+            store,
+            today - datetime.timedelta(days=400),
+            today + datetime.timedelta(days=400),
+        )
+        rng = random.Random(0)
+        for _ in range(20):
+            start = today + datetime.timedelta(days=rng.randint(-300, 200))
+            end = start + datetime.timedelta(days=rng.randint(0, 90))
+            expected = reference_available_time(employee, events, start, end)
+            for aggregated_events in [store, events]:
+                self.assertAlmostEqual(
+                    available_time_of_employee(employee, aggregated_events, start, end),
+                    expected,
+                )
+            self.assertAlmostEqual(busy_hours.availability(start, end), expected)
+
+    def test_outside_of_busy_hours(self):
+        employee = EmployeeFactory()
+        busy_hours = BusyHours(
+            employee, [], datetime.date(2025, 1, 6), datetime.date(2025, 1, 12)
+        )
+        self.assertEqual(
+            busy_hours.availability(
+                datetime.date(2025, 1, 1), datetime.date(2025, 1, 31)
+            ),
+            5,
+        )
+        self.assertEqual(
+            busy_hours.availability(
+                datetime.date(2025, 1, 10), datetime.date(2025, 1, 8)
+            ),
+            0,
+        )
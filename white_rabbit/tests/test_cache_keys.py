@@ -0,0 +1,75 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from white_rabbit.cache_keys import calendar_key, get_data_version
+from white_rabbit.models import Alias, Category, Project
+from white_rabbit.project_name_finder import ProjectFinder
+from white_rabbit.tests.factory import EmployeeFactory, ProjectFactory
+from white_rabbit.tests.test_calendar_fetch import LOCMEM_CACHES
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestDataVersion(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeFactory()
+        self.company = self.employee.company
+        self.other_company = EmployeeFactory().company
+        self.project = ProjectFactory(company=self.company, name="Alpha")
+        self.versions = self.data_versions()
+
+    def data_versions(self):
+        return get_data_version(self.company.pk), get_data_version(
+            self.other_company.pk
+        )
+
+    def assertInvalidated(self):
+        version, other_version = self.data_versions()
+        self.assertGreater(version, self.versions[0])
+        # other companies keep their cached values
+        self.assertEqual(other_version, self.versions[1])
+        self.versions = (version, other_version)
+
+    def test_keys(self):
+        self.assertEqual(get_data_version(self.company.pk), self.versions[0])
+        self.assertEqual(
+            calendar_key(self.employee), f"white_rabbit:v3:calendar:{self.employee.pk}"
+        )
+
+    def test_alias_changed(self):
+        alias = Alias.objects.create(project=self.project, name="alpha alias")
+        self.assertInvalidated()
+        alias.delete()
+        self.assertInvalidated()
+
+    def test_project_changed(self):
+        self.project.start_date = datetime.date(2020, 1, 1)
+        self.project.save()
+        self.assertInvalidated()
+
+    def test_category_changed(self):
+        category = Category.objects.create(name="CLIENT", company=self.company)
+        self.assertInvalidated()
+        category.delete()
+        self.assertInvalidated()
+
+    def test_project_without_dates_created(self):
+        ProjectFactory(company=self.company, name="Beta")
+        self.assertInvalidated()
+
+    def test_project_created_for_unknown_name(self):
+        finder = ProjectFinder()
+        finder.get_project("Unknown", self.company, datetime.date.today())
+        self.assertInvalidated()
+        # a project differing only in case is found instead of created again
+        project = finder.create_project("UNKNOWN", self.company)
+        self.assertEqual(project.lowercase_name, "unknown")
+        self.assertEqual(Project.objects.filter(lowercase_name="unknown").count(), 1)
+
+    def test_projects_created_at_once_for_unknown_names(self):
+        finder = ProjectFinder(defer_creation=True)
+        finder.get_project("Unknown", self.company, datetime.date.today())
+        finder.create_pending_projects()
+        self.assertEqual(self.data_versions(), self.versions)
@@ -0,0 +1,269 @@
+import datetime
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DataError
+from django.test import TestCase, override_settings
+
+from white_rabbit import calendar_fetcher
+from white_rabbit.cache_keys import calendar_key
+from white_rabbit import events as events_module
+from white_rabbit.calendar_fetcher import fetch_calendars
+from white_rabbit import locks
+from white_rabbit.events import (
+    create_events_single_flight,
+    get_events_by_url,
+    get_events_from_employees_from_cache,
+    get_fresh_events_of_employees,
+    set_cached_calendar,
+)
+from white_rabbit.hydrate_cache import hydrate_cache
+from white_rabbit.locks import calendar_lock_name, file_lock
+from white_rabbit.models import EventOccurrence, Project
+from white_rabbit.event_store import EventStore
+from white_rabbit.tests.factory import EmployeeFactory, EventFactory
+from white_rabbit.tests.test_events import CALENDAR
+
+LOCMEM_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+class StubCalendarHandler(BaseHTTPRequestHandler):
+    """Serves CALENDAR, with an ETag if the server has use_etag set."""
+
+    def do_GET(self):
+        if self.path == "/hung.ics":
+            time.sleep(1)
+            return
+        self.server.requests_headers.append(dict(self.headers))
+        if self.server.use_etag and self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = CALENDAR.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/calendar")
+        self.send_header("Content-Length", str(len(body)))
+        if self.server.use_etag:
+            self.send_header("ETag", '"v1"')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestConditionalFetch(TestCase):
+    def setUp(self):
+        cache.clear()
+        locks_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(locks_dir.cleanup)
+        patcher = mock.patch.object(locks, "LOCKS_DIR", Path(locks_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start_server(self, use_etag):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubCalendarHandler)
+        server.use_etag = use_etag
+        server.requests_headers = []
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, f"http://127.0.0.1:{server.server_port}/calendar.ics"
+
+    def fetch_twice(self, use_etag):
+        server, url = self.start_server(use_etag)
+        employee = EmployeeFactory(start_time_tracking_from=datetime.date(2024, 1, 1))
+        with mock.patch.object(
+            events_module,
+            "entries_from_day_slices",
+            wraps=events_module.entries_from_day_slices,
+        ) as read_entries:
+            first = get_events_by_url(url, employee)
+            second = get_events_by_url(url, employee)
+        self.assertEqual(read_entries.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 4)
+        return server
+
+    def test_not_modified(self):
+        server = self.fetch_twice(use_etag=True)
+        self.assertNotIn("If-None-Match", server.requests_headers[0])
+        self.assertEqual(server.requests_headers[1]["If-None-Match"], '"v1"')
+
+    def test_same_content(self):
+        self.fetch_twice(use_etag=False)
+
+    def test_hydrate_cache_skips_unchanged_calendars(self):
+        _, url = self.start_server(use_etag=True)
+        EmployeeFactory(
+            start_time_tracking_from=datetime.date(2024, 1, 1), calendar_ical_url=url
+        )
+        self.assertEqual(hydrate_cache(), {"employees": 1, "unchanged": 0})
+        self.assertEqual(EventOccurrence.objects.count(), 4)
+        # projects of unknown names are created at once, then assigned to events
+        self.assertEqual(
+            set(EventOccurrence.objects.values_list("project__name", flat=True)),
+            {"Later Project", "Conference"},
+        )
+        self.assertEqual(hydrate_cache(), {"employees": 1, "unchanged": 1})
+
+    def test_hydrate_cache_skips_events_of_projects_not_created(self):
+        _, url = self.start_server(use_etag=False)
+        EmployeeFactory(
+            start_time_tracking_from=datetime.date(2024, 1, 1), calendar_ical_url=url
+        )
+        bulk_create = Project.objects.bulk_create
+
+        def fail_on_conference(projects, **kwargs):
+            if any(project.name == "Conference" for project in projects):
+                raise DataError("value too long")
+            return bulk_create(projects, **kwargs)
+
+        with mock.patch.object(
+            Project.objects, "bulk_create", side_effect=fail_on_conference
+        ):
+            hydrate_cache()
+        self.assertEqual(
+            set(EventOccurrence.objects.values_list("project__name", flat=True)),
+            {"Later Project"},
+        )
+        # occurrences are saved again by the next run
+        hydrate_cache()
+        self.assertEqual(
+            set(EventOccurrence.objects.values_list("project__name", flat=True)),
+            {"Later Project", "Conference"},
+        )
+
+    def test_hung_calendar_does_not_block_others(self):
+        _, url = self.start_server(use_etag=False)
+        hung_url = url.replace("calendar.ics", "hung.ics")
+        start = time.time()
+        with mock.patch.object(calendar_fetcher, "CALENDAR_FETCH_TIMEOUT", 0.2):
+            hung, response = fetch_calendars([(hung_url, {}), (url, {})], retries=0)
+        self.assertLess(time.time() - start, 1)
+        self.assertIsNone(hung)
+        self.assertEqual(response.status_code, 200)
+
+    def test_stale_events_are_served_and_refreshed_in_background(self):
+        server, url = self.start_server(use_etag=True)
+        employee = EmployeeFactory(
+            start_time_tracking_from=datetime.date(2024, 1, 1), calendar_ical_url=url
+        )
+        request = mock.Mock()
+        with mock.patch.object(events_module, "refresh_in_background") as refresh:
+            # cold miss: the calendar is downloaded
+            events = get_events_from_employees_from_cache([employee], request=request)
+            self.assertEqual(len(events[employee]), 4)
+            refresh.assert_called_with([])
+
+            # stale: served from the cache, and refreshed in the background
+            with mock.patch.object(events_module, "DEFAULT_CACHE_DURATION", 0):
+                stale_events = get_events_from_employees_from_cache(
+                    [employee], request=request
+                )
+            self.assertEqual(stale_events, events)
+            refresh.assert_called_with([employee])
+        self.assertEqual(len(server.requests_headers), 1)
+        self.assertLess(
+            datetime.datetime.now(datetime.timezone.utc) - request.events_fetched_at,
+            datetime.timedelta(minutes=1),
+        )
+
+    def test_fresh_calendars_are_not_downloaded_again(self):
+        server, url = self.start_server(use_etag=True)
+        employee = EmployeeFactory(
+            start_time_tracking_from=datetime.date(2024, 1, 1), calendar_ical_url=url
+        )
+        events = get_events_by_url(url, employee)
+        self.assertEqual(get_fresh_events_of_employees([employee]), {employee: events})
+        self.assertEqual(len(server.requests_headers), 1)
+        # stale: the calendar is requested again
+        with mock.patch.object(events_module, "DEFAULT_CACHE_DURATION", 0):
+            self.assertEqual(
+                get_fresh_events_of_employees([employee]), {employee: events}
+            )
+        self.assertEqual(len(server.requests_headers), 2)
+
+    def test_cached_calendars_are_read_at_once(self):
+        server, url = self.start_server(use_etag=False)
+        employees = [
+            EmployeeFactory(
+                start_time_tracking_from=datetime.date(2024, 1, 1),
+                calendar_ical_url=url,
+            )
+            for _ in range(3)
+        ]
+        # the first one is fresh, the second one stale, the last one is not cached
+        get_events_by_url(url, employees[0])
+        get_events_by_url(url, employees[1])
+        stale_calendar = events_module.get_cached_calendar(employees[1])
+        cache.set(calendar_key(employees[1]), {**stale_calendar, "fetched_at": 0})
+        request = mock.Mock()
+        with mock.patch.object(
+            cache, "get_many", wraps=cache.get_many
+        ) as get_many, mock.patch.object(events_module, "refresh_in_background"):
+            events = get_events_from_employees_from_cache(employees, request=request)
+        calendar_reads = [
+            len(call.args[0])
+            for call in get_many.call_args_list
+            if ":calendar:" in next(iter(call.args[0]), "")
+        ]
+        # all at once, then the missing one again before it is downloaded
+        self.assertEqual(calendar_reads, [3, 1])
+        self.assertEqual(list(events), employees)
+        self.assertEqual(
+            request.events_cache_stats,
+            {"hits": 1, "stale": 1, "database": 0, "misses": 1},
+        )
+        self.assertEqual(len(server.requests_headers), 3)
+
+    def test_hydrate_cache_exits_if_already_running(self):
+        with file_lock("hydrate_cache"):
+            self.assertIsNone(hydrate_cache())
+
+    def test_single_flight(self):
+        """A calendar being fetched by another process is not fetched again."""
+        server, url = self.start_server(use_etag=False)
+        employee = EmployeeFactory(
+            start_time_tracking_from=datetime.date(2024, 1, 1), calendar_ical_url=url
+        )
+        cached_entries = EventStore.from_events(
+            [EventFactory(project_id=None, project_name=None, category=None)]
+        )
+        cached_calendar = {
+            "entries": cached_entries,
+            "etag": None,
+            "last_modified": None,
+            "sha256": "",
+            "start_time_tracking_from": employee.start_time_tracking_from,
+        }
+        lock_acquired = threading.Event()
+
+        def other_process():
+            with file_lock(calendar_lock_name(employee)):
+                lock_acquired.set()
+                time.sleep(0.2)
+                set_cached_calendar(employee, cached_calendar)
+
+        other = threading.Thread(target=other_process)
+        other.start()
+        lock_acquired.wait()
+        events = create_events_single_flight([employee])
+        other.join()
+
+        # the projects of the cached entries are resolved
+        (event,) = events[employee]
+        (entry,) = cached_entries
+        self.assertEqual(event["name"], entry["name"])
+        self.assertEqual(
+            event["project_id"], Project.objects.get(name=entry["name"].title()).pk
+        )
+        self.assertEqual(server.requests_headers, [])
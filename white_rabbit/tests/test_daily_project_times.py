@@ -0,0 +1,95 @@
+import datetime
+from typing import List
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from white_rabbit.cache_keys import bump_data_version, get_data_version
+from white_rabbit.daily_project_times import (
+    employees_with_current_daily_project_times,
+    save_daily_project_times,
+)
+from white_rabbit.event_occurrences import mark_occurrences_saved
+from white_rabbit.event_store import EventStore, day_of
+from white_rabbit.models import Category, DailyProjectTime, Employee
+from white_rabbit.tests.factory import EmployeeFactory, ProjectFactory
+from white_rabbit.tests.test_aggregation import PROJECTS, random_events
+from white_rabbit.tests.test_calendar_fetch import LOCMEM_CACHES
+from white_rabbit.typing import Event
+
+
+def events_of_projects(employee: Employee) -> List[Event]:
+    """Random events of projects of the company of employee."""
+    projects = {}
+    for project_id, project_name, category, _ in PROJECTS:
+        if project_id not in projects:
+            projects[project_id] = ProjectFactory(
+                name=project_name,
+                company=employee.company,
+                category=category
+                and Category.objects.get_or_create(
+                    name=category, company=employee.company
+                )[0],
+            )
+    events = random_events(seed=0)
+    # a day with events done and an event ending today
+    yesterday = datetime.datetime.combine(
+        datetime.date.today() - datetime.timedelta(days=1), datetime.time(9)
+    )
+    for start, hours, project_id in [(yesterday, 3, 1), (yesterday, 20, 2)]:
+        events.append(
+            {
+                **events[0],
+                "project_id": project_id,
+                "start_datetime": start,
+                "end_datetime": start + datetime.timedelta(hours=hours),
+                "duration": hours,
+            }
+        )
+    for event in events:
+        event["project_id"] = projects[event["project_id"]].pk
+    return events
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestDailyProjectTimes(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeFactory(min_working_hours_for_full_day=7)
+        self.events = events_of_projects(self.employee)
+        self.store = EventStore.from_events(self.events)
+
+    def test_only_changed_days_are_rewritten(self):
+        n_days = len(set(self.store.days))
+        self.assertEqual(save_daily_project_times(self.employee, self.store), n_days)
+        self.assertEqual(save_daily_project_times(self.employee, self.store), 0)
+
+        # the events of the first day are removed, and an event is longer
+        first_day = datetime.date.fromordinal(self.store.days[0])
+        events = [
+            event
+            for event in self.events
+            if day_of(event["start_datetime"]) != first_day
+        ]
+        events[-1] = {**events[-1], "duration": events[-1]["duration"] + 1}
+        self.assertEqual(
+            save_daily_project_times(self.employee, EventStore.from_events(events)), 2
+        )
+        self.assertFalse(DailyProjectTime.objects.filter(day=first_day).exists())
+
+    def test_employees_with_current_times(self):
+        employees = [self.employee]
+        self.assertEqual(employees_with_current_daily_project_times(employees), [])
+        mark_occurrences_saved(
+            {self.employee: get_data_version(self.employee.company_id)}
+        )
+        self.assertEqual(
+            employees_with_current_daily_project_times(employees), employees
+        )
+        # saved with other day settings
+        self.employee.default_day_working_hours += 1
+        self.assertEqual(employees_with_current_daily_project_times(employees), [])
+        # saved with projects which changed since
+        self.employee.refresh_from_db()
+        bump_data_version(self.employee.company_id)
+        self.assertEqual(employees_with_current_daily_project_times(employees), [])
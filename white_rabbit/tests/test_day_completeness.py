@@ -0,0 +1,62 @@
+import datetime
+
+from django.test import TestCase
+
+from white_rabbit.day_completeness import (
+    missing_days_of_employees,
+    save_day_completeness,
+)
+from white_rabbit.event_store import EventStore
+from white_rabbit.models import DayCompleteness
+from white_rabbit.state_of_day import incomplete_working_days
+from white_rabbit.tests.factory import EmployeeFactory
+from white_rabbit.tests.test_daily_project_times import events_of_projects
+
+
+class TestDayCompleteness(TestCase):
+    def setUp(self):
+        self.employee = EmployeeFactory(min_working_hours_for_full_day=7)
+        self.events = events_of_projects(self.employee)
+        self.store = EventStore.from_events(self.events)
+        self.employee.start_time_tracking_from = datetime.date.fromordinal(
+            self.store.days[0]
+        )
+        self.today = datetime.date.today()
+
+    def test_same_missing_days_as_events(self):
+        save_day_completeness(self.employee, self.store)
+        start = self.employee.start_time_tracking_from + datetime.timedelta(days=20)
+        with self.assertNumQueries(1):
+            missing_days = missing_days_of_employees([self.employee], start, self.today)
+        expected = incomplete_working_days(self.store, self.employee, start, self.today)
+        self.assertTrue(expected)
+        self.assertEqual(
+            missing_days[self.employee],
+            [
+                (day, {key: state[key] for key in ["state", "display_state"]})
+                for day, state in expected
+            ],
+        )
+
+    def test_only_changed_days_are_rewritten(self):
+        end = self.today - datetime.timedelta(days=1)
+        n_days = save_day_completeness(self.employee, self.store, end)
+        self.assertEqual(n_days, DayCompleteness.objects.count())
+        self.assertEqual(save_day_completeness(self.employee, self.store, end), 0)
+        # one more working day, or none if today is not a working day
+        self.assertLessEqual(save_day_completeness(self.employee, self.store), 1)
+
+        # complete days are no longer complete with a higher minimum
+        self.employee.min_working_hours_for_full_day = 100
+        n_complete = DayCompleteness.objects.filter(state="complete").count()
+        self.assertEqual(save_day_completeness(self.employee, self.store), n_complete)
+        self.assertFalse(DayCompleteness.objects.filter(state="complete").exists())
+
+        # days which are no longer working days are removed
+        self.employee.end_time_tracking_on = end - datetime.timedelta(days=10)
+        self.assertGreater(save_day_completeness(self.employee, self.store), 0)
+        self.assertFalse(
+            DayCompleteness.objects.filter(
+                day__gt=self.employee.end_time_tracking_on
+            ).exists()
+        )
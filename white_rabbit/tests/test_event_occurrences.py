@@ -0,0 +1,89 @@
+import datetime
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from white_rabbit import events as events_module
+from white_rabbit.cache_keys import bump_data_version, get_data_version
+from white_rabbit.event_occurrences import (
+    mark_occurrences_saved,
+    save_occurrences,
+    stored_events,
+    time_zone_from_name,
+    time_zone_name,
+)
+from white_rabbit.event_store import EventStore
+from white_rabbit.events import get_events_from_employees_from_cache, read_events
+from white_rabbit.models import EventOccurrence
+from white_rabbit.tests.factory import EmployeeFactory
+from white_rabbit.tests.test_calendar_fetch import LOCMEM_CACHES
+from white_rabbit.tests.test_events import CALENDAR
+
+
+class TestEventOccurrences(TestCase):
+    def setUp(self):
+        self.employee = EmployeeFactory(
+            start_time_tracking_from=datetime.date(2024, 1, 1)
+        )
+        self.store = EventStore.from_events(read_events(CALENDAR, self.employee))
+
+    def test_save_and_read(self):
+        self.assertEqual(save_occurrences(self.employee, self.store), 4)
+        self.assertEqual(stored_events([self.employee]), {self.employee: self.store})
+        # nothing changed
+        self.assertEqual(save_occurrences(self.employee, self.store), 0)
+
+        # the first slice of the conference is removed, the others are unchanged
+        store = EventStore.from_events(list(self.store)[1:])
+        self.assertEqual(save_occurrences(self.employee, store), 1)
+        self.assertEqual(stored_events([self.employee]), {self.employee: store})
+        self.assertEqual(EventOccurrence.objects.count(), 3)
+
+    def test_time_zones(self):
+        start = datetime.datetime(2024, 7, 1, 9)
+        for timezone, name in [
+            (ZoneInfo("Europe/Paris"), "Europe/Paris"),
+            (datetime.timezone.utc, "UTC"),
+            (datetime.timezone(datetime.timedelta(hours=-5, minutes=-30)), "UTC-05:30"),
+        ]:
+            self.assertEqual(time_zone_name(timezone, start), name)
+            self.assertEqual(
+                start.replace(tzinfo=time_zone_from_name(name)),
+                start.replace(tzinfo=timezone),
+            )
+        self.assertIsNone(time_zone_from_name(""))
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_events_not_cached_are_read_from_database(self):
+        cache.clear()
+        save_occurrences(self.employee, self.store)
+        mark_occurrences_saved(
+            {self.employee: get_data_version(self.employee.company_id)}
+        )
+        with mock.patch.object(
+            events_module, "refresh_in_background"
+        ) as refresh, mock.patch.object(
+            events_module, "create_events_single_flight", return_value={}
+        ) as create_events:
+            events = get_events_from_employees_from_cache([self.employee])
+        self.assertEqual(events, {self.employee: self.store})
+        refresh.assert_called_with([self.employee])
+        create_events.assert_called_with([], None, None)
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_events_read_with_outdated_projects_are_not_displayed(self):
+        cache.clear()
+        save_occurrences(self.employee, self.store)
+        mark_occurrences_saved(
+            {self.employee: get_data_version(self.employee.company_id)}
+        )
+        bump_data_version(self.employee.company_id)
+        with mock.patch.object(
+            events_module,
+            "create_events_single_flight",
+            return_value={self.employee: []},
+        ) as create_events:
+            get_events_from_employees_from_cache([self.employee])
+        create_events.assert_called_with([self.employee], None, None)
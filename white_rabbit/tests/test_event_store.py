@@ -0,0 +1,86 @@
+import datetime
+import pickle
+
+from django.test import TestCase
+
+from white_rabbit.event_store import EventStore
+from white_rabbit.events import read_events
+from white_rabbit.tests.factory import EmployeeFactory
+from white_rabbit.tests.test_events import CALENDAR
+
+
+class TestEventStore(TestCase):
+    def test_store_yields_the_same_events(self):
+        employee = EmployeeFactory(start_time_tracking_from=datetime.date(2024, 1, 1))
+        events = read_events(CALENDAR, employee)
+        store = pickle.loads(pickle.dumps(EventStore.from_events(events)))
+
+        self.assertEqual(len(store), len(events))
+        self.assertEqual(list(store), events)
+        self.assertEqual(
+            store.between(datetime.date(2024, 1, 9), datetime.date(2024, 1, 10)),
+            events[1:],
+        )
+        self.assertEqual(
+            store.subprojects_per_project(), {events[0]["project_id"]: {"talk"}}
+        )
+
+    def test_events_without_saved_project_left_out(self):
+        employee = EmployeeFactory(start_time_tracking_from=datetime.date(2024, 1, 1))
+        events = read_events(CALENDAR, employee)
+        store = EventStore.from_events(events)
+        self.assertIs(store.with_saved_projects(), store)
+
+        events[1]["project_id"] = None
+        store = EventStore.from_events(events)
+        self.assertEqual(list(store.with_saved_projects()), [events[0]] + events[2:])
+
+    def test_store_is_smaller(self):
+        start = datetime.datetime(2024, 1, 1, 9, tzinfo=datetime.timezone.utc)
+        events = [
+            {
+                "project_id": index % 10,
+                "project_name": f"Project {index % 10}",
+                "category": "CLIENT",
+                "name": f"project {index % 10}",
+                "subproject_name": None,
+                "start_datetime": start + datetime.timedelta(days=index // 3),
+                "end_datetime": start + datetime.timedelta(days=index // 3, hours=2),
+                "duration": 2.0,
+            }
+            for index in range(3000)
+        ]
+        store = EventStore.from_events(events)
+        self.assertEqual(list(store), events)
+        self.assertLess(len(pickle.dumps(store)) * 5, len(pickle.dumps(events)))
+
+    def test_pickled_store_keeps_wide_values_and_timezones(self):
+        paris = datetime.timezone(datetime.timedelta(hours=1))
+        events = [
+            {
+                "project_id": index,
+                "project_name": f"Project {index}",
+                "category": None,
+                "name": f"project {index}",
+                "subproject_name": None,
+                "start_datetime": start,
+                "end_datetime": start + datetime.timedelta(days=200),
+                "duration": 1000.5,
+            }
+            for index, start in enumerate(
+                [
+                    datetime.date(2020, 1, 1),
+                    datetime.datetime(2021, 1, 1, 9, tzinfo=paris),
+                    datetime.datetime(2024, 1, 1, 9, tzinfo=datetime.timezone.utc),
+                ]
+            )
+        ]
+        store = EventStore.from_events(events)
+        for pickled_store in [store, EventStore()]:
+            loaded = pickle.loads(pickle.dumps(pickled_store))
+            self.assertEqual(list(loaded), list(pickled_store))
+            for attribute in ["days", "end_day_offsets", "timezones"]:
+                self.assertEqual(
+                    getattr(loaded, attribute).typecode,
+                    getattr(pickled_store, attribute).typecode,
+                )
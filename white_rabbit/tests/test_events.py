@@ -0,0 +1,102 @@
+import datetime
+
+from django.test import SimpleTestCase, TestCase
+
+from white_rabbit.events import (
+    entries_from_day_slices,
+    parse_calendar,
+    read_events,
+    resolve_projects,
+)
+from white_rabbit.hydrate_cache import parse_calendars
+from white_rabbit.models import Alias, Project
+from white_rabbit.project_name_finder import ProjectFinder
+from white_rabbit.tests.factory import EmployeeFactory, ProjectFactory
+
+CALENDAR = """BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//white-rabbit//tests//FR
+BEGIN:VEVENT
+UID:1
+SUMMARY:Later project - details
+DTSTART:20240110T090000Z
+DTEND:20240110T120000Z
+END:VEVENT
+BEGIN:VEVENT
+UID:2
+SUMMARY:Conference [talk]
+DTSTART;VALUE=DATE:20240108
+DTEND;VALUE=DATE:20240111
+END:VEVENT
+BEGIN:VEVENT
+UID:3
+SUMMARY:!ignored
+DTSTART:20240109T090000Z
+DTEND:20240109T100000Z
+END:VEVENT
+BEGIN:VEVENT
+UID:4
+SUMMARY:Before tracking
+DTSTART:20231229T090000Z
+DTEND:20231229T100000Z
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+class TestReadEvents(TestCase):
+    def test_events_are_split_per_day_and_sorted(self):
+        employee = EmployeeFactory(start_time_tracking_from=datetime.date(2024, 1, 1))
+        events = read_events(CALENDAR, employee)
+
+        self.assertEqual(
+            [(event["name"], event["start_datetime"]) for event in events],
+            [
+                ("Conference", datetime.date(2024, 1, 8)),
+                ("Conference", datetime.date(2024, 1, 9)),
+                # same day events keep the order in which they were read
+                (
+                    "Later project",
+                    datetime.datetime(2024, 1, 10, 9, tzinfo=datetime.timezone.utc),
+                ),
+                ("Conference", datetime.date(2024, 1, 10)),
+            ],
+        )
+        self.assertEqual(events[0]["subproject_name"], "talk")
+        self.assertEqual(events[0]["duration"], 8)
+        self.assertEqual(events[2]["duration"], 3)
+
+    def test_projects_of_entries_are_resolved_when_read(self):
+        employee = EmployeeFactory(start_time_tracking_from=datetime.date(2024, 1, 1))
+        entries = entries_from_day_slices(
+            parse_calendar(CALENDAR.encode(), employee.start_time_tracking_from)
+        )
+        self.assertEqual(
+            resolve_projects(entries, employee, ProjectFinder()),
+            read_events(CALENDAR, employee),
+        )
+
+        # the project is transformed into an alias of another one
+        project = ProjectFactory(
+            company=employee.company, name="Events", start_date=None, end_date=None
+        )
+        Project.objects.get(name="Conference").delete()
+        Alias.objects.create(project=project, name="Conference")
+        events = list(resolve_projects(entries, employee, ProjectFinder()))
+        self.assertEqual(
+            [event["project_id"] for event in events],
+            [project.pk, project.pk, events[2]["project_id"], project.pk],
+        )
+        self.assertEqual(events[2]["project_name"], "Later Project")
+
+
+class TestParseCalendars(SimpleTestCase):
+    def test_parse_in_worker_processes(self):
+        start = datetime.date(2024, 1, 1)
+        calendars = [(CALENDAR.encode(), start), (b"not a calendar", start)] * 2
+        results = parse_calendars(calendars, workers=2)
+
+        self.assertEqual(results[0], parse_calendar(CALENDAR.encode(), start))
+        self.assertEqual(len(results[0]), 4)
+        self.assertIsInstance(results[1], ValueError)
+        self.assertEqual(results[2], results[0])
@@ -1,10 +1,14 @@
 import datetime
+from unittest import mock
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import DataError
+from django.test import TestCase, override_settings
 
 from white_rabbit.models import Project
 from white_rabbit.project_name_finder import ProjectFinder
 from white_rabbit.tests.factory import CompanyFactory
+from white_rabbit.tests.test_calendar_fetch import LOCMEM_CACHES
 
 
 class TestProjectNameFinder(TestCase):
@@ -84,6 +88,52 @@ class TestProjectNameFinder(TestCase):
             p3_2020_plus,
         )
 
+    def test_overlapping_dates(self):
+        """
+        Test that when dated projects overlap, the first one matches on their
+        common dates, and that the others match on the rest of their dates.
+        """
+        company = CompanyFactory()
+        formation = Project.objects.create(company=company, name="Formation")
+        long_formation = Project.objects.create(
+            company=company,
+            name="Formation longue",
+            start_date="2019-06-01",
+            end_date="2021-06-30",
+        )
+        long_formation.aliases.create(name="formation")
+        formations = [
+            Project.objects.create(
+                company=company,
+                name=f"Formation {year}",
+                start_date=f"{year}-01-01",
+                end_date=f"{year}-12-31",
+            )
+            for year in range(2015, 2025)
+        ]
+        for project in formations:
+            project.aliases.create(name="formation")
+        formation_since_2030 = Project.objects.create(
+            company=company, name="Formation 2030", start_date="2030-01-01"
+        )
+        formation_since_2030.aliases.create(name="formation")
+
+        project_finder = ProjectFinder()
+        for date, project in [
+            (datetime.date(2014, 12, 31), formation),
+            (datetime.date(2015, 1, 1), formations[0]),
+            (datetime.date(2019, 5, 31), formations[4]),
+            (datetime.date(2019, 6, 1), long_formation),
+            (datetime.date(2021, 6, 30), long_formation),
+            (datetime.date(2021, 7, 1), formations[6]),
+            (datetime.date(2024, 12, 31), formations[-1]),
+            (datetime.date(2025, 1, 1), formation),
+            (datetime.date(2030, 1, 1), formation_since_2030),
+        ]:
+            self.assertEqual(
+                project_finder.get_project("formation", company, date), project
+            )
+
     def test_accents(self):
         company = CompanyFactory()
         p1 = Project.objects.create(company=company, name="été")
@@ -103,3 +153,95 @@ class TestProjectNameFinder(TestCase):
         self.assertEqual(project_finder.get_project(alias, company, None), p2)
 
         self.assertEqual(project_finder.get_project("Congé Quentin", company, None), p3)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestSharedProjectIndex(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.company = CompanyFactory()
+        self.p1 = Project.objects.create(company=self.company, name="P1")
+        ProjectFinder().get_project("p1", self.company, None)
+
+    def test_projects_loaded_once(self):
+        with self.assertNumQueries(0):
+            project_finder = ProjectFinder()
+            self.assertEqual(
+                project_finder.get_project("p1", self.company, None), self.p1
+            )
+            self.assertEqual(
+                project_finder.by_company(self.company).keys(), {self.p1.pk}
+            )
+
+    def test_created_project_added_to_index(self):
+        project_finder = ProjectFinder()
+        p2 = project_finder.get_project("p2", self.company, None)
+        with self.assertNumQueries(0):
+            self.assertEqual(project_finder.get_project("P2", self.company, None), p2)
+        # the created project changed the data version, so that other workers
+        # load the projects again
+        with self.assertNumQueries(2):
+            self.assertEqual(ProjectFinder().get_project("P2", self.company, None), p2)
+
+    def test_project_created_by_another_process(self):
+        p2 = Project.objects.create(company=self.company, name="P2")
+        self.assertEqual(ProjectFinder().get_project("p2", self.company, None), p2)
+
+    def test_index_built_again_when_projects_change(self):
+        self.p1.aliases.create(name="alias")
+        project_finder = ProjectFinder()
+        self.assertEqual(
+            project_finder.get_project("alias", self.company, None), self.p1
+        )
+
+    def test_other_companies_not_loaded(self):
+        other_company = CompanyFactory()
+        Project.objects.create(company=other_company, name="P1")
+        self.p1.aliases.create(name="alias")
+        with self.assertNumQueries(2):
+            # projects and their aliases, for this company only
+            self.assertEqual(
+                ProjectFinder().get_project("p1", self.company, None), self.p1
+            )
+
+    def test_deferred_creation(self):
+        project_finder = ProjectFinder(defer_creation=True)
+        pending = project_finder.get_project("new", self.company, None)
+        self.assertIsNone(pending.pk)
+        self.assertIs(project_finder.get_project("NEW ", self.company, None), pending)
+        self.assertIsNone(project_finder.get_project("p2", self.company, None).pk)
+        # created by another process since the index was built
+        p2 = Project.objects.create(company=self.company, name="P2")
+
+        # three queries, and the savepoint of the creation
+        with self.assertNumQueries(5):
+            created = project_finder.create_pending_projects()
+        self.assertEqual({project.name for project in created}, {"New", "P2"})
+        self.assertIn(p2, created)
+        # projects created at once do not change the data version, unlike the
+        # project created by another process
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                ProjectFinder().get_project("new", self.company, None).name, "New"
+            )
+        with self.assertNumQueries(0):
+            self.assertEqual(ProjectFinder().get_project("p2", self.company, None), p2)
+
+    def test_project_not_created_does_not_stop_others(self):
+        project_finder = ProjectFinder(defer_creation=True)
+        project_finder.get_project("new", self.company, None)
+        too_long = project_finder.get_project("x" * 40, self.company, None)
+        bulk_create = Project.objects.bulk_create
+
+        def fail_on_long_names(projects, **kwargs):
+            if any(len(project.name) > 32 for project in projects):
+                raise DataError("value too long")
+            return bulk_create(projects, **kwargs)
+
+        with mock.patch.object(
+            Project.objects, "bulk_create", side_effect=fail_on_long_names
+        ):
+            created = project_finder.create_pending_projects()
+        self.assertEqual([project.name for project in created], ["New"])
+        self.assertIsNone(too_long.pk)
+        self.assertIsNone(project_finder.get_project("x" * 40, self.company, None).pk)
@@ -0,0 +1,134 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from white_rabbit.aggregation import add_project_times
+from white_rabbit.cache_keys import get_data_version
+from white_rabbit.daily_project_times import (
+    mark_daily_project_times_saved,
+    save_daily_project_times,
+)
+from white_rabbit.event_occurrences import mark_occurrences_saved
+from white_rabbit.event_store import EventStore
+from white_rabbit.events import EmployeeEvents
+from white_rabbit.project_time_cube import get_project_time_cube
+from white_rabbit.tests.factory import EmployeeFactory
+from white_rabbit.tests.test_calendar_fetch import LOCMEM_CACHES
+from white_rabbit.tests.test_daily_project_times import events_of_projects
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TestProjectTimeCube(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = EmployeeFactory(min_working_hours_for_full_day=7)
+        self.events = events_of_projects(self.employee)
+        today = datetime.date.today()
+        # an event of last year which is not done yet
+        self.first_day_not_done = datetime.date(today.year - 1, 12, 30)
+        self.events.append(
+            {
+                **self.events[0],
+                "start_datetime": self.first_day_not_done,
+                "end_datetime": today + datetime.timedelta(days=1),
+                "duration": 8,
+            }
+        )
+        self.store = EventStore.from_events(self.events)
+        save_daily_project_times(self.employee, self.store)
+        mark_occurrences_saved(
+            {self.employee: get_data_version(self.employee.company_id)}
+        )
+
+    def assertSameProjectTimes(self, result, expected):
+        self.assertEqual(list(result.keys()), list(expected.keys()))
+        for identifier, project_time in result.items():
+            expected_time = expected[identifier]
+            self.assertAlmostEqual(project_time["duration"], expected_time["duration"])
+            self.assertEqual(
+                [
+                    (event["date"], round(event["duration"], 9))
+                    for event in project_time["events"]
+                ],
+                [
+                    (event["date"], round(event["duration"], 9))
+                    for event in expected_time["events"]
+                ],
+            )
+            self.assertEqual(
+                list(project_time["subprojects"].keys()),
+                list(expected_time["subprojects"].keys()),
+            )
+            for name, subproject in project_time["subprojects"].items():
+                self.assertAlmostEqual(
+                    subproject["duration"],
+                    expected_time["subprojects"][name]["duration"],
+                )
+
+    def test_same_results_as_events(self):
+        cube = get_project_time_cube(self.employee.company)
+        # days from the first event not done are read from the events
+        self.assertEqual(cube.end, self.first_day_not_done)
+
+        today = datetime.date.today()
+        last_year = today.year - 1
+        periods = [
+            ({"key": "total", "start": datetime.date(2020, 1, 1)}, None),
+            ({"key": "total_done", "start": datetime.date(2020, 1, 1)}, None),
+            ({"key": "total_todo", "start": datetime.date(2020, 1, 1)}, None),
+            (
+                {"key": f"total-{last_year}", "start": datetime.date(last_year, 1, 1)},
+                "year",
+            ),
+            (
+                {
+                    "key": f"total-{last_year}-done",
+                    "start": datetime.date(last_year, 1, 1),
+                },
+                "year",
+            ),
+            (
+                {"key": f"06-{last_year}", "start": datetime.date(last_year, 6, 1)},
+                "month",
+            ),
+            ({"key": today.strftime("%m-%Y"), "start": today.replace(day=1)}, "month"),
+        ]
+        employee_events = EmployeeEvents(self.employee, self.store)
+        for period, time_period in periods:
+            for group_by in ["project", "category"]:
+                with self.subTest(period=period["key"], group_by=group_by):
+                    result = cube.projects_for_period(
+                        [self.employee], period, time_period, group_by
+                    )[self.employee]
+                    add_project_times(
+                        result,
+                        employee_events.projects_for_time_period(
+                            period, time_period, group_by=group_by, from_day=cube.end
+                        ),
+                    )
+                    self.assertSameProjectTimes(
+                        result,
+                        employee_events.projects_for_time_period(
+                            period, time_period, group_by=group_by
+                        ),
+                    )
+
+    def test_cube_is_built_again_when_times_are_saved(self):
+        cube = get_project_time_cube(self.employee.company)
+        with self.assertNumQueries(1):
+            self.assertIs(get_project_time_cube(self.employee.company), cube)
+        mark_daily_project_times_saved([self.employee.company_id])
+        self.assertIsNot(get_project_time_cube(self.employee.company), cube)
+
+    def test_employees_without_current_times_are_not_in_cube(self):
+        other_employee = EmployeeFactory(company=self.employee.company)
+        period = {"key": "total", "start": datetime.date(2020, 1, 1)}
+        self.assertEqual(
+            list(
+                get_project_time_cube(self.employee.company).projects_for_period(
+                    [self.employee, other_employee], period, None
+                )
+            ),
+            [self.employee],
+        )
@@ -0,0 +1,96 @@
+import datetime
+from unittest import mock
+
+from django.core import mail
+from django.core.mail import get_connection
+from django.test import TestCase
+
+from white_rabbit.reminder_emails import (
+    render_missing_days_emails,
+    send_in_batches,
+)
+from white_rabbit.tests.factory import EmployeeFactory
+
+
+class TestReminderEmails(TestCase):
+    def setUp(self):
+        self.employees = [EmployeeFactory() for _ in range(5)]
+        day = datetime.date(2024, 3, 4)
+        self.messages = render_missing_days_emails(
+            {
+                employee: [(day, {"state": "missing", "display_state": "Vide"})]
+                for employee in self.employees
+            }
+        )
+
+    def test_emails_are_rendered_in_order(self):
+        self.assertEqual(
+            [message.to for message in self.messages],
+            [[employee.user.email] for employee in self.employees],
+        )
+        self.assertIn("text/html", self.messages[0].alternatives[0][1])
+
+    def test_emails_are_sent_in_batches(self):
+        connection = get_connection("django.core.mail.backends.locmem.EmailBackend")
+        with mock.patch.object(connection, "open") as open_connection:
+            failed = send_in_batches(self.messages, connection, batch_size=2)
+        self.assertEqual(failed, [])
+        self.assertEqual(len(mail.outbox), 5)
+        # one connection per batch
+        self.assertEqual(open_connection.call_count, 3)
+
+    @mock.patch("white_rabbit.reminder_emails.time.sleep")
+    def test_emails_are_sent_again_when_sending_fails(self, sleep):
+        connection = get_connection("django.core.mail.backends.locmem.EmailBackend")
+        send_messages = connection.send_messages
+        errors = iter([ConnectionError(), None, ConnectionError(), ConnectionError()])
+
+        def flaky_send_messages(messages):
+            error = next(errors, None)
+            if error is not None:
+                raise error
+            return send_messages(messages)
+
+        with mock.patch.object(
+            connection, "send_messages", side_effect=flaky_send_messages
+        ):
+            failed = send_in_batches(self.messages, connection, retries=1)
+        # the second message failed twice, the others were sent once
+        self.assertEqual(failed, [self.messages[1]])
+        self.assertEqual(len(mail.outbox), 4)
+
+    @mock.patch("white_rabbit.reminder_emails.time.sleep")
+    def test_batch_fails_when_connection_cannot_be_opened(self, sleep):
+        connection = get_connection("django.core.mail.backends.locmem.EmailBackend")
+        errors = iter([None, ConnectionError(), None])
+
+        def flaky_open():
+            error = next(errors, None)
+            if error is not None:
+                raise error
+
+        with mock.patch.object(connection, "open", side_effect=flaky_open):
+            failed = send_in_batches(self.messages, connection, batch_size=2)
+        # the second batch failed, the next one was still sent
+        self.assertEqual(failed, self.messages[2:4])
+        self.assertEqual(len(mail.outbox), 3)
+
+    @mock.patch("white_rabbit.reminder_emails.time.sleep")
+    def test_message_fails_when_connection_cannot_be_opened_again(self, sleep):
+        connection = get_connection("django.core.mail.backends.locmem.EmailBackend")
+        send_messages = connection.send_messages
+        failures = iter([True])
+
+        def send_messages_failing_once(messages):
+            if next(failures, False):
+                raise ConnectionError()
+            return send_messages(messages)
+
+        with mock.patch.object(
+            connection, "send_messages", side_effect=send_messages_failing_once
+        ), mock.patch.object(connection, "open") as open_connection:
+            # the connection cannot be opened again after the first failure
+            open_connection.side_effect = [None, ConnectionError(), None, None]
+            failed = send_in_batches(self.messages, connection, retries=1)
+        self.assertEqual(failed, [self.messages[0]])
+        self.assertEqual(len(mail.outbox), 4)
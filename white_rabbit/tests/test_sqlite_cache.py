@@ -0,0 +1,118 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from white_rabbit import sqlite_cache
+from white_rabbit.event_store import EventStore
+from white_rabbit.sqlite_cache import SQLiteCache
+from white_rabbit.tests.test_aggregation import random_events
+
+
+class TestSQLiteCache(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = os.path.join(directory.name, "cache.sqlite3")
+        self.cache = SQLiteCache(self.location, {})
+
+    def test_get_and_set(self):
+        store = EventStore.from_events(random_events(seed=0, n_events=100))
+        self.cache.set("1", {"events": store, "fetched_at": 1.5})
+        self.assertEqual(self.cache.get("1"), {"events": store, "fetched_at": 1.5})
+        self.assertIsNone(self.cache.get("2"))
+        self.assertEqual(self.cache.get("2", "default"), "default")
+        # another connection to the same database
+        self.assertEqual(SQLiteCache(self.location, {}).get("1")["events"], store)
+
+        self.assertFalse(self.cache.add("1", "other"))
+        self.assertTrue(self.cache.add("2", "value"))
+        self.assertTrue(self.cache.has_key("2"))
+        self.assertTrue(self.cache.delete("2"))
+        self.assertFalse(self.cache.delete("2"))
+        self.assertFalse(self.cache.has_key("2"))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get("1"))
+
+    def test_get_and_set_many(self):
+        cache = SQLiteCache(self.location, {"OPTIONS": {"MAX_ENTRIES": 1000}})
+        values = {str(key): key for key in range(sqlite_cache.MAX_KEYS_PER_QUERY + 5)}
+        self.assertEqual(cache.set_many(values), [])
+        self.assertEqual(cache.get_many([*values, "missing"]), values)
+        cache.delete_many(list(values)[1:])
+        self.assertEqual(cache.get_many(values), {"0": 0})
+
+    def test_expiry(self):
+        with mock.patch.object(sqlite_cache.time, "time", return_value=1000):
+            self.cache.set("short", 1, timeout=10)
+            self.cache.set("forever", 2, timeout=None)
+            self.cache.set("touched", 3, timeout=10)
+            self.assertTrue(self.cache.touch("touched", timeout=100))
+        with mock.patch.object(sqlite_cache.time, "time", return_value=1050):
+            self.assertEqual(
+                self.cache.get_many(["short", "forever", "touched"]),
+                {"forever": 2, "touched": 3},
+            )
+            self.assertFalse(self.cache.touch("short"))
+            # an expired key can be added again
+            self.assertTrue(self.cache.add("short", 4))
+            self.assertEqual(self.cache.get("short"), 4)
+
+    def test_cull(self):
+        cache = SQLiteCache(
+            self.location,
+            {"OPTIONS": {"MAX_ENTRIES": 10, "CULL_FREQUENCY": 2, "CULL_EVERY": 1}},
+        )
+        with mock.patch.object(sqlite_cache.time, "time", return_value=1000):
+            cache.set("expired", 0, timeout=10)
+        cache.set_many({str(key): key for key in range(10)})
+        # only the expired key was removed
+        self.assertEqual(len(cache.get_many(map(str, range(10)))), 10)
+        self.assertFalse(cache.has_key("expired"))
+
+        cache.set("10", 10)
+        # the keys written the longest ago were removed
+        self.assertEqual(
+            cache.get_many(map(str, range(11))),
+            {str(key): key for key in range(5, 11)},
+        )
+
+    def test_keys_are_counted_every_cull_every_writes(self):
+        cache = SQLiteCache(
+            self.location, {"OPTIONS": {"MAX_ENTRIES": 2, "CULL_EVERY": 5}}
+        )
+        with mock.patch.object(cache, "_count", wraps=cache._count) as count:
+            cache.set_many({str(key): key for key in range(3)})
+            cache.set("3", 3)
+            self.assertEqual(count.call_count, 0)
+            self.assertEqual(len(cache.get_many(map(str, range(4)))), 4)
+            cache.set("4", 4)
+        self.assertEqual(count.call_count, 2)
+        # 1/3 of the keys were removed
+        self.assertEqual(len(cache.get_many(map(str, range(5)))), 4)
+
+    def test_connection_per_thread(self):
+        self.cache.set("key", "value")
+        values = []
+        thread = threading.Thread(target=lambda: values.append(self.cache.get("key")))
+        thread.start()
+        thread.join()
+        self.assertEqual(values, ["value"])
+
+    def test_concurrent_increments_are_not_lost(self):
+        self.cache.set("counter", 0)
+        threads = [
+            threading.Thread(
+                target=lambda: [self.cache.incr("counter") for _ in range(20)]
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get("counter"), 80)
+        with self.assertRaises(ValueError):
+            self.cache.incr("missing")
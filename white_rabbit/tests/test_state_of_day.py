@@ -0,0 +1,44 @@
+import datetime
+
+from django.test import TestCase
+
+from white_rabbit.constants import DayState
+from white_rabbit.event_store import EventStore
+from white_rabbit.state_of_day import incomplete_working_days
+from white_rabbit.tests.factory import EmployeeFactory, EventFactory
+
+
+class TestIncompleteWorkingDays(TestCase):
+    def test_incomplete_working_days(self):
+        employee = EmployeeFactory(
+            min_working_hours_for_full_day=6,
+            end_time_tracking_on=datetime.date(2025, 5, 9),
+        )
+        events = [
+            EventFactory(start_datetime=datetime.datetime(2025, 4, 28, 9), duration=7),
+            EventFactory(start_datetime=datetime.datetime(2025, 4, 29, 9), duration=2),
+            # bank holiday
+            EventFactory(start_datetime=datetime.datetime(2025, 5, 1, 9), duration=2),
+            EventFactory(start_datetime=datetime.datetime(2025, 5, 2, 9), duration=3),
+            EventFactory(start_datetime=datetime.datetime(2025, 5, 2, 14), duration=4),
+        ]
+        expected_days = [
+            (datetime.date(2025, 4, 29), DayState.incomplete),
+            (datetime.date(2025, 4, 30), DayState.empty),
+            # until the end of time tracking, 8th of may is a bank holiday
+            (datetime.date(2025, 5, 5), DayState.empty),
+            (datetime.date(2025, 5, 6), DayState.empty),
+            (datetime.date(2025, 5, 7), DayState.empty),
+            (datetime.date(2025, 5, 9), DayState.empty),
+        ]
+        for employee_events in [events, EventStore.from_events(events)]:
+            days = incomplete_working_days(
+                employee_events,
+                employee,
+                datetime.date(2025, 4, 28),
+                datetime.date(2025, 5, 31),
+            )
+            self.assertEqual(
+                [(day, state["state"]) for day, state in days], expected_days
+            )
+            self.assertEqual([event["duration"] for event in days[0][1]["events"]], [2])
@@ -8,17 +8,29 @@ from white_rabbit.templatetags.white_rabbit_tags import (
     number_of_working_days_for_period_key,
     monthly_hours_color,
 )
+from white_rabbit.text_utils import ParsedSummary, parse_summary
 from white_rabbit.utils import group_events_by_day
 
 
 class TestUtils(TestCase):
     def test_monthly_colors(self):
-        self.assertEqual(number_of_working_days_for_period_key("01-2025"), 23)
+        # 1st of january is a bank holiday
+        self.assertEqual(number_of_working_days_for_period_key("01-2025"), 22)
         self.assertEqual(number_of_working_days_for_period_key("02-2025"), 20)
         self.assertEqual(monthly_hours_color(20 * 20, "02-2025"), SEVERITY_COLORS[0])
         self.assertEqual(monthly_hours_color(20 * 11, "02-2025"), SEVERITY_COLORS[1])
         self.assertEqual(monthly_hours_color(20 * 5, "02-2025"), SEVERITY_COLORS[-1])
 
+    def test_parse_summary(self):
+        parse_summary.cache_clear()
+        self.assertEqual(
+            parse_summary("Été [Réunion] - details"),
+            ParsedSummary("Été", "ete", "reunion"),
+        )
+        self.assertEqual(parse_summary("Été"), ParsedSummary("Été", "ete", None))
+        parse_summary("Été [Réunion] - details")
+        self.assertEqual(parse_summary.cache_info().hits, 1)
+
     def test_group_events_by_day(self):
         events = [
             {
@@ -0,0 +1,38 @@
+import datetime
+
+from django.test import TestCase
+
+from white_rabbit.tests.factory import EmployeeFactory
+from white_rabbit.working_days import count_working_days, working_days
+
+
+class TestWorkingDays(TestCase):
+    def test_weekends_and_bank_holidays(self):
+        # 1st and 8th of may and ascension are bank holidays
+        days = working_days(datetime.date(2025, 4, 28), datetime.date(2025, 5, 31))
+        self.assertEqual(len(days), 22)
+        self.assertNotIn(datetime.date(2025, 5, 1), days)
+        self.assertNotIn(datetime.date(2025, 5, 29), days)
+        self.assertNotIn(datetime.date(2025, 5, 3), days)
+        # over several years, 1st of january is a bank holiday
+        self.assertEqual(
+            count_working_days(datetime.date(2024, 12, 30), datetime.date(2025, 1, 3)),
+            4,
+        )
+
+    def test_employee(self):
+        employee = EmployeeFactory(
+            works_day_3=False,
+            works_day_6=True,
+            end_time_tracking_on=datetime.date(2025, 1, 17),
+        )
+        days = working_days(
+            datetime.date(2025, 1, 6), datetime.date(2025, 1, 31), employee
+        )
+        self.assertEqual([day.day for day in days], [6, 7, 9, 10, 11, 13, 14, 16, 17])
+        self.assertEqual(
+            count_working_days(
+                datetime.date(2025, 1, 6), datetime.date(2025, 1, 31), employee
+            ),
+            9,
+        )
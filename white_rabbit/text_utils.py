@@ -1,5 +1,43 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
 from unidecode import unidecode
 
+# summaries of recurring events repeat, across employees too
+SUMMARY_CACHE_SIZE = 4096
+
 
 def normalize_name(name: str) -> str:
     return unidecode(name.lower()).strip()
+
+
+class ParsedSummary(NamedTuple):
+    name: str
+    normalized_name: str
+    subproject_name: Optional[str]
+
+
+@lru_cache(maxsize=SUMMARY_CACHE_SIZE)
+def parse_summary(summary: str) -> ParsedSummary:
+    """
+    Project name, normalized project name and normalized subproject name of an
+    event summary such as "Project [subproject] - details".
+    """
+    calendar_name = summary.split(" - ")[0]
+    name = calendar_name.split(" [")[0]
+    subproject_name = None
+    if len(calendar_name.split(" [")) > 1:
+        subproject_name = normalize_name(
+            calendar_name[calendar_name.find("[") + 1 : calendar_name.find("]")]
+        )
+    return ParsedSummary(name, normalize_name(name), subproject_name)
+
+
+def summary_cache_stats() -> str:
+    info = parse_summary.cache_info()
+    calls = info.hits + info.misses
+    hit_rate = info.hits / calls if calls else 0
+    return (
+        f"{info.hits} hits, {info.misses} misses ({hit_rate:.0%}), "
+        f"{info.currsize}/{info.maxsize} summaries"
+    )
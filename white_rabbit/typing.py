@@ -1,4 +1,4 @@
-from typing import List, TypedDict, Dict, Iterable, Union
+from typing import List, TypedDict, Dict, Iterable, Tuple, Union
 import datetime
 
 from white_rabbit.models import Employee
@@ -37,6 +37,27 @@ class Event(TypedDict):
     category: str
 
 
+# (start, end, calendar name) of an event for one of the days it covers
+DaySlice = Tuple[
+    Union[datetime.date, datetime.datetime],
+    Union[datetime.date, datetime.datetime],
+    str,
+]
+
+
+class CachedCalendar(TypedDict):
+    """Events read from a calendar, with what is needed to know if it changed."""
+
+    # an EventStore of the entries of the calendar, without their projects
+    entries: Iterable[Event]
+    etag: Union[str, None]
+    last_modified: Union[str, None]
+    sha256: str
+    start_time_tracking_from: Union[datetime.date, None]
+    # timestamp of when the calendar was last downloaded or checked unchanged
+    fetched_at: float
+
+
 AllProjectClient = List[Dict[str, float]]
 EventsPerEmployee = Dict[Employee, Iterable[Event]]
 MonthDetailPerEmployeePerMonth = Dict[str, Dict[str, MonthDetail]]
@@ -20,6 +20,7 @@ from white_rabbit.views.project_view import (
     FinancialTrackingView,
 )
 from white_rabbit.views.gantt_view import GanttView
+from white_rabbit.views.missing_days_view import MissingDaysView
 
 urlpatterns = [
     path("configuration/", admin.site.urls),
@@ -78,6 +79,7 @@ urlpatterns = [
     path("resume", ResumeView.as_view()),
     path("alias/", AliasView.as_view(), name="alias"),
     path("gantt/", GanttView.as_view(), name="gantt"),
+    path("jours-manquants", MissingDaysView.as_view(), name="missing-days"),
     path("__debug__/", include(debug_toolbar.urls)),
     # django-hijack
     path(r"hijack/", include("hijack.urls", namespace="hijack")),
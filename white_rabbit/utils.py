@@ -1,10 +1,12 @@
 import datetime
 from collections import defaultdict
+from bisect import bisect_left
 from itertools import groupby
-from typing import Union, Iterable, Dict, Any, NamedTuple
+from typing import Union, Iterable, Dict, Any, List, NamedTuple, Optional, Tuple
 
 from dateutil.relativedelta import relativedelta
 
+from white_rabbit.event_store import EventStore, day_of
 from white_rabbit.typing import Event, ProjectDistribution
 
 
@@ -96,6 +98,19 @@ def is_event_between_dates(event_datetime, start_datetime, end_datetime):
     return start_datetime <= event_datetime <= end_datetime
 
 
+def events_between(
+    events: Iterable[Event], start_datetime: datetime.date, end_datetime: datetime.date
+) -> Iterable[Event]:
+    """Events starting from start day to end day (included)."""
+    if isinstance(events, EventStore):
+        return events.between(start_datetime, end_datetime)
+    return [
+        event
+        for event in events
+        if is_event_between_dates(event["start_datetime"], start_datetime, end_datetime)
+    ]
+
+
 def events_per_day(
     events: Iterable[Event], start_datetime: datetime.date, end_datetime: datetime.date
 ) -> Dict[datetime.date, Iterable[Event]]:
@@ -105,12 +120,9 @@ def events_per_day(
     Days without events are included.
     """
     delta = end_datetime - start_datetime
-    events = [
-        event
-        for event in events
-        if is_event_between_dates(event["start_datetime"], start_datetime, end_datetime)
-    ]
-    to_return = group_events_by_day(events)
+    to_return = group_events_by_day(
+        events_between(events, start_datetime, end_datetime)
+    )
 
     # also include days without events
     for i in range(delta.days + 1):
@@ -131,12 +143,106 @@ def filter_todo_or_done(events, key: str):
     return events
 
 
+def week_day_ranges(day: datetime.date) -> List[Tuple[datetime.date, datetime.date]]:
+    """
+    Ranges of the days of the year of day that have the same ISO week number: the
+    first days of January can be in the last week of the previous year, and the
+    last days of December in the first week of the next year.
+    """
+    week = day.isocalendar()[1]
+    start_of_year = datetime.date(day.year, 1, 1)
+    end_of_year = datetime.date(day.year, 12, 31)
+    mondays = sorted(
+        {
+            d - datetime.timedelta(days=d.weekday())
+            for d in [start_of_year, day, end_of_year]
+        }
+    )
+    return [
+        (
+            max(monday, start_of_year),
+            min(monday + datetime.timedelta(days=6), end_of_year),
+        )
+        for monday in mondays
+        if (max(monday, start_of_year)).isocalendar()[1] == week
+    ]
+
+
+def period_day_ranges(
+    timeperiod: datetime.date, timeperiod_type: str, period_key: str = None
+) -> Optional[List[Tuple[datetime.date, datetime.date]]]:
+    """
+    Ranges of days (included) of the events kept by filter_events_per_time_period,
+    or None if all days are kept.
+    """
+    if timeperiod_type == "year":
+        return [
+            (
+                datetime.date(timeperiod.year, 1, 1),
+                datetime.date(timeperiod.year, 12, 31),
+            )
+        ]
+    if (period_key and is_total_key(period_key)) or timeperiod is None:
+        return None
+    if timeperiod_type == "month":
+        start_of_month = datetime.date(timeperiod.year, timeperiod.month, 1)
+        return [(start_of_month, start_of_month + relativedelta(months=1, days=-1))]
+    if timeperiod_type == "week":
+        return week_day_ranges(timeperiod)
+    if timeperiod_type == "day":
+        return [(timeperiod, timeperiod)]
+    raise ValueError("Invalid timeperiod_type. Choose 'month', 'week' or 'year'")
+
+
+def period_indexes(
+    store: EventStore,
+    timeperiod: datetime.date = None,
+    timeperiod_type: str = "month",
+    period_key: str = None,
+) -> List[int]:
+    """
+    Indexes of the events of store kept by filter_events_per_time_period, found
+    by bisect on their days.
+    """
+    day_ranges = period_day_ranges(timeperiod, timeperiod_type, period_key)
+    if day_ranges is None:
+        index_ranges = [range(len(store))]
+    else:
+        index_ranges = [store.index_range(start, end) for start, end in day_ranges]
+    if not (period_key and period_key.endswith(("todo", "done"))):
+        return [index for index_range in index_ranges for index in index_range]
+
+    # events starting from today end from today, so only events of previous days
+    # can be done
+    today = datetime.date.today().toordinal()
+    first_from_today = bisect_left(store.days, today)
+    days, end_day_offsets = store.days, store.end_day_offsets
+    done = period_key.endswith("done")
+    indexes = []
+    for index_range in index_ranges:
+        indexes += [
+            index
+            for index in range(
+                index_range.start, min(index_range.stop, first_from_today)
+            )
+            if (days[index] + end_day_offsets[index] < today) == done
+        ]
+        if not done:
+            indexes += range(max(index_range.start, first_from_today), index_range.stop)
+    return indexes
+
+
 def filter_events_per_time_period(
     events,
     timeperiod: datetime.datetime = None,
     timeperiod_type: str = "month",
     period_key=None,
 ):
+    if isinstance(events, EventStore):
+        return [
+            events.event(index)
+            for index in period_indexes(events, timeperiod, timeperiod_type, period_key)
+        ]
     events = filter_todo_or_done(events, period_key)
     if timeperiod_type == "year":
         return [
@@ -161,15 +267,9 @@ def filter_events_per_time_period(
             and event["start_datetime"].year == timeperiod.year
         ]
     if timeperiod_type == "day":
-        events = []
-        for event in events:
-            is_datetime = isinstance(event["start_datetime"], datetime.datetime)
-            event_date = event["start_datetime"]
-            if is_datetime:
-                event_date = event_date.date()
-            if event_date == timeperiod:
-                events.append(event)
-        return events
+        return [
+            event for event in events if day_of(event["start_datetime"]) == timeperiod
+        ]
 
     raise ValueError("Invalid timeperiod_type. Choose 'month', 'week' or 'year'")
 
@@ -191,14 +291,7 @@ def group_events_by_day(
     """Returns a dict day -> events for day."""
     return {
         k: list(g)
-        for k, g in groupby(
-            events,
-            lambda event: (
-                event["start_datetime"].date()
-                if isinstance(event["start_datetime"], datetime.datetime)
-                else event["start_datetime"]
-            ),
-        )
+        for k, g in groupby(events, lambda event: day_of(event["start_datetime"]))
     }
 
 
@@ -16,6 +16,11 @@ from white_rabbit.services.forecast_service import ForecastService
 from white_rabbit.project_name_finder import ProjectFinder
 from white_rabbit.utils import generate_time_periods
 
+DEFAULT_N_PERIODS = 12
+# keys of weeks are their numbers, which repeat after a year
+MAX_N_PERIODS = {"week": 52, "month": 36}
+HORIZONS = {"week": [12, 26, 52], "month": [12, 24, 36]}
+
 
 class AvailabilityBaseView(TemplateView):
     template_name = "pages/availability.html"
@@ -25,14 +30,22 @@ class AvailabilityBaseView(TemplateView):
         self.time_period = time_period
 
     def retrieve_forecasted_projects(
-        self, user, employees, projects_per_period, availability
+        self, user, employees, projects_per_period, availability, n_periods
     ):
         """Add forecast projects to the data structure using EmployeeForecastAssignment"""
-        forecast_service = ForecastService(self.time_period)
+        forecast_service = ForecastService(self.time_period, n_periods)
         return forecast_service.retrieve_forecasted_projects(
             user, employees, projects_per_period, availability
         )
 
+    def get_n_periods(self) -> int:
+        """Number of periods displayed, from the "periods" parameter."""
+        try:
+            n_periods = int(self.request.GET.get("periods", DEFAULT_N_PERIODS))
+        except ValueError:
+            n_periods = DEFAULT_N_PERIODS
+        return min(max(n_periods, 1), MAX_N_PERIODS[self.time_period])
+
     def get(self, request):
         user = request.user
         employees = employees_for_user(user)
@@ -44,11 +57,13 @@ class AvailabilityBaseView(TemplateView):
             or employee.end_time_tracking_on > today
         ]
 
+        n_periods = self.get_n_periods()
+
         project_finder = ProjectFinder()
         events: EventsPerEmployee = get_events_from_employees_from_cache(
             employees, project_finder, request=self.request
         )
-        events_per_employee = process_employees_events(events, n_periods=12)
+        events_per_employee = process_employees_events(events, n_periods=n_periods)
 
         # index by employee, then by project, then by period
         projects_per_period: Dict[str, Dict[int, Dict[str, float]]] = defaultdict(
@@ -58,7 +73,7 @@ class AvailabilityBaseView(TemplateView):
         availability: Dict[str, Dict[str, float]] = defaultdict(Counter)
         for employee_name, employee_events in events_per_employee.items():
             periods = employee_events.group_by_time_period(
-                self.time_period, time_shift_direction="future", n_periods=12
+                self.time_period, time_shift_direction="future", n_periods=n_periods
             )
             for period_key, period_data in periods.items():
                 availability[employee_name][period_key] = period_data["availability"]
@@ -82,7 +97,7 @@ class AvailabilityBaseView(TemplateView):
 
         availabitily_with_forceast = copy.deepcopy(availability)
         forecast_projects = self.retrieve_forecasted_projects(
-            user, employees, projects_per_period, availabitily_with_forceast
+            user, employees, projects_per_period, availabitily_with_forceast, n_periods
         )
 
         # Combine regular projects with forecast projects for display
@@ -108,9 +123,11 @@ class AvailabilityBaseView(TemplateView):
             "periodicity": self.time_period,
             "periods_per_key": {
                 period["key"]: period
-                for period in generate_time_periods(12, self.time_period)
+                for period in generate_time_periods(n_periods, self.time_period)
             },
             "is_monthly_hours": self.time_period == "month",
+            "n_periods": n_periods,
+            "horizons": HORIZONS[self.time_period],
         }
 
         return render(request, self.template_name, context)
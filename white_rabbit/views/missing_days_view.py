@@ -0,0 +1,41 @@
+import datetime
+
+from django.views.generic import TemplateView
+
+from white_rabbit.day_completeness import missing_days_of_employees
+from white_rabbit.events import employees_for_user
+
+
+def date_parameter(value: str, default: datetime.date) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class MissingDaysView(TemplateView):
+    """
+    Missing days of the employees between two dates, read from the completeness
+    of days saved by hydrate_cache.
+    """
+
+    template_name = "pages/missing-days.html"
+
+    def get_context_data(self, **kwargs):
+        today = datetime.date.today()
+        start = date_parameter(
+            self.request.GET.get("start"), datetime.date(today.year, 1, 1)
+        )
+        end = date_parameter(
+            self.request.GET.get("end"), today - datetime.timedelta(days=1)
+        )
+        employees = employees_for_user(self.request.user)
+        missing_days_per_employee = missing_days_of_employees(employees, start, end)
+        return {
+            "start": start,
+            "end": end,
+            "missing_days_per_employee": {
+                employee: missing_days_per_employee.get(employee, [])
+                for employee in employees
+            },
+        }
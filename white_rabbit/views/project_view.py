@@ -7,7 +7,9 @@ from django.db.models import Q
 from django.http import HttpResponse
 from django.views.generic import TemplateView
 
+from white_rabbit.aggregation import add_project_times
 from white_rabbit.events import (
+    EmployeeEvents,
     EventsPerEmployee,
     get_events_from_employees_from_cache,
     employees_for_user,
@@ -22,6 +24,7 @@ from white_rabbit.models import (
     ProjectCategories,
 )
 from white_rabbit.project_name_finder import ProjectFinder
+from white_rabbit.project_time_cube import get_project_time_cube
 from white_rabbit.typing import ProjectTime
 from white_rabbit.utils import (
     generate_time_periods_with_total,
@@ -29,6 +32,7 @@ from white_rabbit.utils import (
     is_total_key,
     is_year_key,
     filter_events_per_time_period,
+    period_day_ranges,
 )
 
 
@@ -238,6 +242,54 @@ class AbstractTotalView(TemplateView):
 
             writer.writerow(sub_row)
 
+    def projects_per_employee(
+        self, employees, period, time_period_type, group_by, project_finder
+    ) -> Dict[str, Dict[int, ProjectTime]]:
+        # days of past years are summed from the project times saved by
+        # hydrate_cache, held by the worker, and days of this year are read
+        # from the events, which are more recent (see ProjectTimeCube)
+        start_of_year = datetime.date(datetime.date.today().year, 1, 1)
+        day_ranges = period_day_ranges(
+            period.get("start"), time_period_type, period["key"]
+        )
+        projects_per_employee = {}
+        from_day = start_of_year
+        if day_ranges is None or day_ranges[0][0] < start_of_year:
+            cube = get_project_time_cube(self.request.user.employee.company)
+            projects_per_employee = cube.projects_for_period(
+                employees, period, time_period_type, group_by
+            )
+            from_day = cube.end
+        if day_ranges is None or day_ranges[-1][1] >= from_day:
+            with_events = employees
+        else:
+            with_events = [
+                employee
+                for employee in employees
+                if employee not in projects_per_employee
+            ]
+
+        events_per_employee = get_events_from_employees_from_cache(
+            with_events, project_finder, request=self.request
+        )
+        for employee, employee_events in events_per_employee.items():
+            from_cube = projects_per_employee.get(employee)
+            project_times = EmployeeEvents(
+                employee, employee_events, 24
+            ).projects_for_time_period(
+                period,
+                time_period_type,
+                group_by=group_by,
+                from_day=from_day if from_cube is not None else None,
+            )
+            if from_cube is not None:
+                add_project_times(from_cube, project_times)
+            else:
+                projects_per_employee[employee] = project_times
+        return {
+            employee.name: projects_per_employee[employee] for employee in employees
+        }
+
     def get_context_data(self, group_by, **kwargs):
         assert group_by in ["category", "project"]
         request = self.request
@@ -269,16 +321,9 @@ class AbstractTotalView(TemplateView):
         employees_names = {employee.name for employee in employees}
         project_finder = ProjectFinder()
 
-        events_per_employee = get_events_from_employees_from_cache(
-            employees, project_finder, request=self.request
+        employees_events = self.projects_per_employee(
+            employees, period, time_period_type, group_by, project_finder
         )
-        events_per_employee = process_employees_events(events_per_employee, 24)
-
-        employees_events: Dict[str, Dict[int, ProjectTime]] = {}
-        for employee_name, employee_events in events_per_employee.items():
-            employees_events[employee_name] = employee_events.projects_for_time_period(
-                period, time_period_type, group_by=group_by
-            )
 
         total_per_identifier = Counter()
         subtotal_per_identifier: Dict[int, Dict[str, float]] = defaultdict(Counter)
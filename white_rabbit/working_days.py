@@ -0,0 +1,94 @@
+"""
+Working days, read from a calendar of each year built once per process. A day is
+a working day if it is not a French bank holiday and is one of the days of the
+week worked on (monday to friday by default). For an employee, these are their
+works_day_N, and days after the end of their time tracking are not working days.
+"""
+
+import datetime
+from functools import lru_cache
+from typing import Iterator, List, Optional, Tuple
+
+from jours_feries_france import JoursFeries
+
+from white_rabbit.models import Employee
+from white_rabbit.event_store import day_of
+
+BANK_HOLIDAYS_ZONE = "Métropole"
+# whether each day of the week is worked on, from monday
+WEEK_DAYS = (True, True, True, True, True, False, False)
+
+
+@lru_cache(maxsize=None)
+def working_days_of_year(year: int, works_days: Tuple[bool, ...] = WEEK_DAYS) -> bytes:
+    """One byte per day of the year, 1 for working days and 0 for others."""
+    start_of_year = datetime.date(year, 1, 1)
+    n_days = (datetime.date(year + 1, 1, 1) - start_of_year).days
+    bank_holidays = set(JoursFeries.for_year(year, zone=BANK_HOLIDAYS_ZONE).values())
+    return bytes(
+        works_days[day.weekday()] and day not in bank_holidays
+        for day in (
+            start_of_year + datetime.timedelta(days=offset) for offset in range(n_days)
+        )
+    )
+
+
+def works_days_of(employee: Employee) -> Tuple[bool, ...]:
+    return tuple(getattr(employee, f"works_day_{day}") for day in range(1, 8))
+
+
+def year_slices(
+    start: datetime.date, end: datetime.date, employee: Optional[Employee]
+) -> Iterator[Tuple[int, bytes, int, int]]:
+    """
+    (ordinal of the first day of the year, calendar of the year, offsets of the
+    first and after the last days) of each year from start to end (included).
+    """
+    works_days = WEEK_DAYS
+    start, end = day_of(start), day_of(end)
+    if employee is not None:
+        works_days = works_days_of(employee)
+        if employee.end_time_tracking_on:
+            end = min(end, employee.end_time_tracking_on)
+    for year in range(start.year, end.year + 1):
+        start_of_year = datetime.date(year, 1, 1).toordinal()
+        yield (
+            start_of_year,
+            working_days_of_year(year, works_days),
+            max(start.toordinal(), start_of_year) - start_of_year,
+            min(end, datetime.date(year, 12, 31)).toordinal() - start_of_year + 1,
+        )
+
+
+def working_days(
+    start: datetime.date, end: datetime.date, employee: Employee = None
+) -> List[datetime.date]:
+    """Working days from start to end (included), of an employee if given."""
+    return [
+        datetime.date.fromordinal(start_of_year + offset)
+        for start_of_year, calendar, first, stop in year_slices(start, end, employee)
+        for offset in range(first, stop)
+        if calendar[offset]
+    ]
+
+
+def count_working_days(
+    start: datetime.date, end: datetime.date, employee: Employee = None
+) -> int:
+    """Number of working days from start to end (included)."""
+    return sum(
+        calendar.count(1, first, stop)
+        for _, calendar, first, stop in year_slices(start, end, employee)
+    )
+
+
+def working_days_flags(
+    start: datetime.date, end: datetime.date, employee: Employee = None
+) -> bytes:
+    """One byte per day from start to end (included), 1 for working days."""
+    flags = b"".join(
+        calendar[first:stop]
+        for _, calendar, first, stop in year_slices(start, end, employee)
+    )
+    # days after the end of time tracking are not working days
+    return flags.ljust((day_of(end) - day_of(start)).days + 1, b"\0")